@@ -23,6 +23,8 @@ admin_urls = [
         name='core_oaipmh_harvester_app_check_harvest_registry'),
     url(r'^harvesters/registry/check/update', admin_ajax.check_update_registry,
         name='core_oaipmh_harvester_app_check_update_registry'),
+    url(r'^harvesters/registry/events', admin_ajax.registry_events,
+        name='core_oaipmh_harvester_app_registry_events'),
     url(r'^harvesters/registry/check', admin_ajax.check_registry,
         name='core_oaipmh_harvester_app_check_registry'),
     url(r'^harvesters/registry/harvest/(?P<pk>[\w-]+)/edit/$',
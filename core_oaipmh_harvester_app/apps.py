@@ -5,6 +5,7 @@ from django.apps import AppConfig
 
 from core_main_app.utils.databases.mongoengine_database import init_text_index
 from core_oaipmh_harvester_app.tasks import init_harvest
+from core_oaipmh_harvester_app.utils.index_operations import init_indexes
 
 
 class HarvesterAppConfig(AppConfig):
@@ -19,4 +20,5 @@ class HarvesterAppConfig(AppConfig):
 
         """
         init_text_index(OaiRecord)
+        init_indexes()
         init_harvest()
@@ -0,0 +1,60 @@
+"""
+OaiHarvesterCheckpoint API
+"""
+
+from core_oaipmh_harvester_app.components.oai_harvester_checkpoint.models import OaiHarvesterCheckpoint
+
+
+def get_by_metadata_format_and_set(oai_harvester_metadata_format, oai_harvester_set):
+    """ Get an OaiHarvesterCheckpoint by its OaiHarvesterMetadataFormat and OaiHarvesterSet.
+
+        Args:
+            oai_harvester_metadata_format:
+            oai_harvester_set: OaiHarvesterSet, None for a chain harvesting all the sets.
+
+        Returns:
+            OaiHarvesterCheckpoint instance.
+
+    """
+    return OaiHarvesterCheckpoint.get_by_metadata_format_and_set(oai_harvester_metadata_format,
+                                                                 oai_harvester_set)
+
+
+def upsert_by_metadata_format_and_set(harvester_metadata_format, harvester_set, registry,
+                                      resumption_token, from_date, harvest_date, cursor=None,
+                                      complete_list_size=None, expiration_date=None):
+    """ Save the position of a harvest chain after a page. Create an OaiHarvesterCheckpoint if
+    doesn't exist.
+
+        Args:
+            harvester_metadata_format: Metadata format.
+            harvester_set: Set, None for a chain harvesting all the sets.
+            registry: Registry.
+            resumption_token: Resumption token of the next page.
+            from_date: From date of the chain requests.
+            harvest_date: Start date of the chain.
+            cursor: Cursor of the resumption token.
+            complete_list_size: Complete list size of the resumption token.
+            expiration_date: Expiration date of the resumption token.
+
+    """
+    OaiHarvesterCheckpoint.\
+        upsert_by_metadata_format_and_set(harvester_metadata_format, harvester_set,
+                                          set__registry=registry,
+                                          set__resumption_token=resumption_token,
+                                          set__from_date=from_date,
+                                          set__harvest_date=harvest_date,
+                                          set__cursor=cursor,
+                                          set__complete_list_size=complete_list_size,
+                                          set__expiration_date=expiration_date)
+
+
+def delete_by_metadata_format_and_set(harvester_metadata_format, harvester_set):
+    """ Delete the checkpoint of a given metadata_format and set, if any.
+
+        Args:
+            harvester_metadata_format: Metadata format.
+            harvester_set: Set, None for a chain harvesting all the sets.
+
+    """
+    OaiHarvesterCheckpoint.delete_by_metadata_format_and_set(harvester_metadata_format, harvester_set)
@@ -0,0 +1,78 @@
+"""
+OaiHarvesterCheckpoint model
+"""
+
+from django_mongoengine import fields, Document
+from mongoengine.queryset.base import CASCADE
+from mongoengine import errors as mongoengine_errors
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import OaiHarvesterMetadataFormat
+from core_oaipmh_harvester_app.components.oai_harvester_set.models import OaiHarvesterSet
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_main_app.commons import exceptions
+
+
+class OaiHarvesterCheckpoint(Document):
+    """Position of an interrupted harvest chain (metadata format and set) in its resumption token list"""
+    registry = fields.ReferenceField(OaiRegistry, reverse_delete_rule=CASCADE)
+    harvester_set = fields.ReferenceField(OaiHarvesterSet, reverse_delete_rule=CASCADE, blank=True)
+    harvester_metadata_format = fields.ReferenceField(OaiHarvesterMetadataFormat, reverse_delete_rule=CASCADE,
+                                                      unique_with='harvester_set')
+    resumption_token = fields.StringField()
+    cursor = fields.IntField(blank=True)
+    complete_list_size = fields.IntField(blank=True)
+    expiration_date = fields.DateTimeField(blank=True)
+    from_date = fields.StringField(blank=True)
+    harvest_date = fields.DateTimeField()
+
+    @staticmethod
+    def get_by_metadata_format_and_set(oai_harvester_metadata_format, oai_harvester_set):
+        """ Get an OaiHarvesterCheckpoint by its OaiHarvesterMetadataFormat and OaiHarvesterSet.
+
+            Args:
+                oai_harvester_metadata_format:
+                oai_harvester_set: OaiHarvesterSet, None for a chain harvesting all the sets.
+
+            Returns:
+                OaiHarvesterCheckpoint instance.
+
+        """
+        try:
+            return OaiHarvesterCheckpoint.objects.get(harvester_metadata_format=oai_harvester_metadata_format,
+                                                      harvester_set=oai_harvester_set)
+        except mongoengine_errors.DoesNotExist as e:
+            raise exceptions.DoesNotExist(e.message)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
+
+    @staticmethod
+    def upsert_by_metadata_format_and_set(harvester_metadata_format, harvester_set, **values):
+        """ Update the checkpoint of a given metadata_format and set. Create an
+        OaiHarvesterCheckpoint if doesn't exist.
+
+            Args:
+                harvester_metadata_format: Metadata format.
+                harvester_set: Set, None for a chain harvesting all the sets.
+                **values: Checkpoint fields to set.
+
+        """
+        try:
+            OaiHarvesterCheckpoint.objects(
+                harvester_metadata_format=harvester_metadata_format,
+                harvester_set=harvester_set).update_one(upsert=True, **values)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
+
+    @staticmethod
+    def delete_by_metadata_format_and_set(harvester_metadata_format, harvester_set):
+        """ Delete the checkpoint of a given metadata_format and set, if any.
+
+            Args:
+                harvester_metadata_format: Metadata format.
+                harvester_set: Set, None for a chain harvesting all the sets.
+
+        """
+        try:
+            OaiHarvesterCheckpoint.objects(harvester_metadata_format=harvester_metadata_format,
+                                           harvester_set=harvester_set).delete()
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
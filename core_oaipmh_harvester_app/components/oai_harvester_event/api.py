@@ -0,0 +1,59 @@
+"""
+OaiHarvesterEvent API
+"""
+
+from core_oaipmh_harvester_app.components.oai_harvester_event.models import OaiHarvesterEvent
+
+
+def get_all_after(event_id=None):
+    """ Get the OaiHarvesterEvent with an id greater than the given id, in id order.
+
+        Args:
+            event_id: Event id. All events if None.
+
+        Returns:
+            List of OaiHarvesterEvent.
+
+    """
+    return OaiHarvesterEvent.get_all_after(event_id)
+
+
+def get_all_by_registry_and_event_type(registry, event_type, date):
+    """ Get the OaiHarvesterEvent of a given type published for a registry since a given date,
+    in publication order.
+
+        Args:
+            registry: Registry.
+            event_type: Type of the events.
+            date: Date.
+
+        Returns:
+            List of OaiHarvesterEvent.
+
+    """
+    return OaiHarvesterEvent.get_all_by_registry_and_event_type(registry, event_type, date)
+
+
+def get_last_id():
+    """ Get the id of the last published OaiHarvesterEvent.
+
+        Returns:
+            Event id, None if there is no event.
+
+    """
+    return OaiHarvesterEvent.get_last_id()
+
+
+def publish(registry, event_type, data):
+    """ Publish an OaiHarvesterEvent.
+
+        Args:
+            registry: Registry.
+            event_type: Type of the event.
+            data: Data of the event.
+
+        Returns:
+            OaiHarvesterEvent instance.
+
+    """
+    return OaiHarvesterEvent.publish(registry, event_type, data)
@@ -0,0 +1,85 @@
+"""
+OaiHarvesterEvent model
+"""
+import datetime
+
+from django_mongoengine import fields, Document
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_EVENTS_TTL
+from core_main_app.commons import exceptions
+
+
+class OaiHarvesterEvent(Document):
+    """Status or harvest progress event of a registry"""
+    # Events expire, no need to delete them with the registry
+    registry = fields.ReferenceField(OaiRegistry)
+    event_type = fields.StringField()
+    data = fields.DictField(blank=True)
+    date = fields.DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        'indexes': [
+            {'fields': ['date'], 'expireAfterSeconds': OAI_HARVESTER_EVENTS_TTL},
+        ]
+    }
+
+    @staticmethod
+    def get_all_after(event_id=None):
+        """ Get the OaiHarvesterEvent with an id greater than the given id, in id order.
+
+            Args:
+                event_id: Event id. All events if None.
+
+            Returns:
+                List of OaiHarvesterEvent.
+
+        """
+        events = OaiHarvesterEvent.objects().no_dereference()
+        if event_id is not None:
+            events = events.filter(id__gt=event_id)
+        return events.order_by('id')
+
+    @staticmethod
+    def get_all_by_registry_and_event_type(registry, event_type, date):
+        """ Get the OaiHarvesterEvent of a given type published for a registry since a given date,
+        in publication order.
+
+            Args:
+                registry: Registry.
+                event_type: Type of the events.
+                date: Date.
+
+            Returns:
+                List of OaiHarvesterEvent.
+
+        """
+        return OaiHarvesterEvent.objects(registry=registry, event_type=event_type,
+                                         date__gte=date).no_dereference().order_by('id')
+
+    @staticmethod
+    def get_last_id():
+        """ Get the id of the last published OaiHarvesterEvent.
+
+            Returns:
+                Event id, None if there is no event.
+
+        """
+        return OaiHarvesterEvent.objects().order_by('-id').scalar('id').first()
+
+    @staticmethod
+    def publish(registry, event_type, data):
+        """ Publish an OaiHarvesterEvent.
+
+            Args:
+                registry: Registry.
+                event_type: Type of the event.
+                data: Data of the event.
+
+            Returns:
+                OaiHarvesterEvent instance.
+
+        """
+        try:
+            return OaiHarvesterEvent(registry=registry, event_type=event_type, data=data).save()
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
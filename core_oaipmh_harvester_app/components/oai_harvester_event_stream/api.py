@@ -0,0 +1,38 @@
+"""
+OaiHarvesterEventStream API
+"""
+
+from core_oaipmh_harvester_app.components.oai_harvester_event_stream.models import OaiHarvesterEventStream
+
+
+def create(expiration_date):
+    """ Create an OaiHarvesterEventStream.
+
+        Args:
+            expiration_date: Date after which the stream is not counted as open (UTC).
+
+        Returns:
+            OaiHarvesterEventStream instance.
+
+    """
+    return OaiHarvesterEventStream.create(expiration_date)
+
+
+def get_open_count():
+    """ Count the OaiHarvesterEventStream open in all the server processes.
+
+        Returns:
+            Number of streams.
+
+    """
+    return OaiHarvesterEventStream.get_open_count()
+
+
+def delete_by_id(stream_id):
+    """ Delete an OaiHarvesterEventStream.
+
+        Args:
+            stream_id: Stream id.
+
+    """
+    OaiHarvesterEventStream.delete_by_id(stream_id)
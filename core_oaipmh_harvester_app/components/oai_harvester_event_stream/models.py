@@ -0,0 +1,55 @@
+"""
+OaiHarvesterEventStream model
+"""
+import datetime
+
+from django_mongoengine import fields, Document
+from core_main_app.commons import exceptions
+
+
+class OaiHarvesterEventStream(Document):
+    """Event stream open in one of the server processes"""
+    # A stream not closed (process killed) expires
+    expiration_date = fields.DateTimeField()
+
+    meta = {
+        'indexes': [
+            {'fields': ['expiration_date'], 'expireAfterSeconds': 0},
+        ]
+    }
+
+    @staticmethod
+    def create(expiration_date):
+        """ Create an OaiHarvesterEventStream.
+
+            Args:
+                expiration_date: Date after which the stream is not counted as open (UTC).
+
+            Returns:
+                OaiHarvesterEventStream instance.
+
+        """
+        try:
+            return OaiHarvesterEventStream(expiration_date=expiration_date).save()
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
+
+    @staticmethod
+    def get_open_count():
+        """ Count the OaiHarvesterEventStream open in all the server processes.
+
+            Returns:
+                Number of streams.
+
+        """
+        return OaiHarvesterEventStream.objects(expiration_date__gt=datetime.datetime.utcnow()).count()
+
+    @staticmethod
+    def delete_by_id(stream_id):
+        """ Delete an OaiHarvesterEventStream.
+
+            Args:
+                stream_id: Stream id.
+
+        """
+        OaiHarvesterEventStream.objects(id=stream_id).delete()
@@ -0,0 +1,31 @@
+"""
+OaiHarvesterJob API
+"""
+
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob
+
+
+def get_by_id(job_id):
+    """ Get an OaiHarvesterJob by its id.
+
+        Args:
+            job_id: OaiHarvesterJob id.
+
+        Returns:
+            OaiHarvesterJob instance.
+
+    """
+    return OaiHarvesterJob.get_by_id(job_id)
+
+
+def upsert(oai_harvester_job):
+    """ Create or update an OaiHarvesterJob.
+
+        Args:
+            oai_harvester_job: OaiHarvesterJob to create or update.
+
+        Returns:
+            OaiHarvesterJob instance.
+
+    """
+    return oai_harvester_job.save()
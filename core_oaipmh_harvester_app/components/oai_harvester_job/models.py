@@ -0,0 +1,58 @@
+"""
+OaiHarvesterJob model
+"""
+import datetime
+
+from django_mongoengine import fields, Document
+from mongoengine.queryset.base import CASCADE
+from mongoengine import errors as mongoengine_errors
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_JOBS_TTL
+from core_main_app.commons import exceptions
+
+HARVEST = 'harvest'
+UPDATE = 'update'
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCESS = 'success'
+FAILURE = 'failure'
+
+
+class OaiHarvesterJob(Document):
+    """Harvest or update of a registry, run in the background by a Celery worker"""
+    registry = fields.ReferenceField(OaiRegistry, reverse_delete_rule=CASCADE)
+    job_type = fields.StringField(choices=(HARVEST, UPDATE))
+    status = fields.StringField(choices=(PENDING, RUNNING, SUCCESS, FAILURE), default=PENDING)
+    errors = fields.ListField(fields.DictField(), blank=True)
+    creation_date = fields.DateTimeField(default=datetime.datetime.utcnow)
+    start_date = fields.DateTimeField(blank=True)
+    end_date = fields.DateTimeField(blank=True)
+
+    meta = {
+        'indexes': [
+            {'fields': ['creation_date'], 'expireAfterSeconds': OAI_HARVESTER_JOBS_TTL},
+        ]
+    }
+
+    @staticmethod
+    def get_by_id(job_id):
+        """ Get an OaiHarvesterJob by its id.
+
+            Args:
+                job_id: OaiHarvesterJob id.
+
+            Returns:
+                OaiHarvesterJob instance.
+
+            Raises:
+                DoesNotExist: The job doesn't exist
+                ModelError: Internal error during the process
+
+        """
+        try:
+            return OaiHarvesterJob.objects().get(pk=str(job_id))
+        except mongoengine_errors.DoesNotExist as e:
+            raise exceptions.DoesNotExist(e.message)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
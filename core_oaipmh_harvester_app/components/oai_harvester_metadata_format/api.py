@@ -1,10 +1,9 @@
 """
 OaiHarvesterMetadataFormat API
 """
-from core_main_app.utils.requests_utils.requests_utils import send_get_request
+from core_oaipmh_harvester_app.utils import document_operations, query_cache_operations, \
+    schema_cache_operations
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import OaiHarvesterMetadataFormat
-from rest_framework import status
-from core_main_app.utils.xml import get_hash
 from core_main_app.components.template import api as api_template
 from core_main_app.commons import exceptions
 
@@ -18,7 +17,12 @@ def upsert(oai_harvester_metadata_format):
     Returns: OaiHarvesterMetadataFormat instance.
 
     """
-    return oai_harvester_metadata_format.save()
+    is_cache_changed = document_operations.is_document_changed(oai_harvester_metadata_format,
+                                                               ['template', 'registry'])
+    oai_harvester_metadata_format = oai_harvester_metadata_format.save()
+    if is_cache_changed:
+        query_cache_operations.clear_cache()
+    return oai_harvester_metadata_format
 
 
 def delete(oai_harvester_metadata_format):
@@ -29,6 +33,8 @@ def delete(oai_harvester_metadata_format):
 
     """
     oai_harvester_metadata_format.delete()
+    if oai_harvester_metadata_format.template is not None:
+        query_cache_operations.clear_cache()
 
 
 def get_by_id(oai_harvester_metadata_format_id):
@@ -97,6 +103,17 @@ def get_all_by_list_registry_ids(list_registry_ids, order_by_field=None):
                                                                    order_by_field=order_by_field)
 
 
+def get_all_with_template():
+    """ Return all OaiHarvesterMetadataFormat linked to a template, with their registry and template
+    references only.
+
+    Returns:
+        List of OaiHarvesterMetadataFormat.
+
+    """
+    return OaiHarvesterMetadataFormat.get_all_with_template()
+
+
 def get_all_to_harvest_by_registry_id(registry_id, order_by_field=None):
     """ List all OaiHarvesterMetadataFormat to harvest used by a registry
 
@@ -121,6 +138,7 @@ def delete_all_by_registry_id(registry_id):
 
     """
     OaiHarvesterMetadataFormat.delete_all_by_registry_id(registry_id)
+    query_cache_operations.clear_cache()
 
 
 def update_for_all_harvest_by_registry_id(registry_id, harvest):
@@ -155,15 +173,19 @@ def init_schema_info(oai_harvester_metadata_format):
         Init OaiHarvesterMetadataFormat.
 
     """
-    http_response = send_get_request(oai_harvester_metadata_format.schema)
-    if http_response.status_code == status.HTTP_200_OK:
-        string_xml = http_response.text
-        oai_harvester_metadata_format.xml_schema = string_xml
-        try:
-            oai_harvester_metadata_format.hash = get_hash(string_xml)
-        except exceptions.XSDError:
-            raise exceptions.ApiError("Impossible to hash the schema for the following "
-                                      "metadata format: {0}.")
+    try:
+        schema = schema_cache_operations.get_schema(oai_harvester_metadata_format.schema)
+    except exceptions.XSDError:
+        raise exceptions.ApiError("Impossible to hash the schema for the following "
+                                  "metadata format: {0}.")
+    if schema is None:
+        raise exceptions.ApiError("Impossible to init schema information for the following "
+                                  "metadata format: {0}.".format(oai_harvester_metadata_format.metadata_prefix))
+
+    previous_hash = oai_harvester_metadata_format.hash
+    oai_harvester_metadata_format.xml_schema, oai_harvester_metadata_format.hash = schema
+    # The template of an unchanged schema is already known
+    if oai_harvester_metadata_format.hash != previous_hash or oai_harvester_metadata_format.template is None:
         list_template = api_template.get_all_by_hash(oai_harvester_metadata_format.hash)
         # FIXME: What to do if several templates with the same hash.
         if len(list_template) == 1:
@@ -172,8 +194,5 @@ def init_schema_info(oai_harvester_metadata_format):
             raise exceptions.ApiError("Several templates have the same hash. "
                                       "Impossible to determine a template for the following "
                                       "metadata format: {0}.".format(oai_harvester_metadata_format.metadata_prefix))
-    else:
-        raise exceptions.ApiError("Impossible to init schema information for the following "
-                                  "metadata format: {0}.".format(oai_harvester_metadata_format.metadata_prefix))
 
     return oai_harvester_metadata_format
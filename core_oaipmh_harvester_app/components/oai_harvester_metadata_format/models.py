@@ -20,6 +20,14 @@ class OaiHarvesterMetadataFormat(OaiMetadataFormat):
     harvest = fields.BooleanField(default=False)
     last_update = fields.DateTimeField(blank=True)
 
+    meta = {
+        'indexes': [
+            # get_all_by_registry_id is covered by the (registry, metadata_prefix) unique index
+            ('registry', 'harvest'),
+            'template',
+        ]
+    }
+
     @staticmethod
     def get_all_by_registry_id(registry_id, order_by_field=None):
         """ Return a list of OaiHarvesterMetadataFormat by registry id. Possibility to order_by the list
@@ -48,6 +56,18 @@ class OaiHarvesterMetadataFormat(OaiMetadataFormat):
         """
         return OaiHarvesterMetadataFormat.objects(registry__in=list_registry_ids).order_by(order_by_field)
 
+    @staticmethod
+    def get_all_with_template():
+        """ Return all OaiHarvesterMetadataFormat linked to a template. Only the registry and template
+        references are loaded, and they are not dereferenced.
+
+        Returns:
+            List of OaiHarvesterMetadataFormat.
+
+        """
+        return OaiHarvesterMetadataFormat.objects(template__ne=None).only('registry', 'template')\
+            .no_dereference()
+
     @staticmethod
     def get_all_by_registry_id_and_harvest(registry_id, harvest, order_by_field=None):
         """
@@ -17,6 +17,13 @@ class OaiHarvesterMetadataFormatSet(Document):
                                                       unique_with='harvester_set')
     last_update = fields.DateTimeField(blank=True)
 
+    meta = {
+        'indexes': [
+            # Lookups by (harvester_metadata_format, harvester_set) are covered by the unique index
+            'harvester_set',
+        ]
+    }
+
     @staticmethod
     def get_by_metadata_format_and_set(oai_harvester_metadata_format, oai_harvester_set):
         """ Get an OaiHarvesterMetadataFormatSet by its OaiHarvesterMetadataFormat and OaiHarvesterSet.
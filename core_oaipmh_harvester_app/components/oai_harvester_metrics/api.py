@@ -0,0 +1,42 @@
+"""
+OaiHarvesterMetrics API
+"""
+
+from core_oaipmh_harvester_app.components.oai_harvester_metrics.models import OaiHarvesterMetrics
+
+
+def get_all():
+    """ Get all OaiHarvesterMetrics.
+
+        Returns:
+            List of OaiHarvesterMetrics.
+
+    """
+    return OaiHarvesterMetrics.get_all()
+
+
+def inc_by_metadata_format_and_set(harvester_metadata_format, harvester_set, registry, pages,
+                                   records, bytes_, seconds, stage_seconds):
+    """ Add the metrics of a page to the metrics of a given metadata_format and set. Create an
+    OaiHarvesterMetrics if doesn't exist.
+
+        Args:
+            harvester_metadata_format: Metadata format.
+            harvester_set: Set, None for a chain harvesting all the sets.
+            registry: Registry.
+            pages: Number of pages.
+            records: Number of records.
+            bytes_: Number of bytes downloaded.
+            seconds: Harvest time in seconds.
+            stage_seconds: Time in seconds by stage (fetch, parse, transform, convert, mongo).
+
+    """
+    increments = {'inc__{0}_seconds'.format(stage): value for stage, value in stage_seconds.iteritems()}
+    OaiHarvesterMetrics.\
+        inc_by_metadata_format_and_set(harvester_metadata_format, harvester_set,
+                                       set__registry=registry,
+                                       inc__pages=pages,
+                                       inc__records=records,
+                                       inc__bytes=bytes_,
+                                       inc__seconds=seconds,
+                                       **increments)
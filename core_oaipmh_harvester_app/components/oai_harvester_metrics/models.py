@@ -0,0 +1,55 @@
+"""
+OaiHarvesterMetrics model
+"""
+
+from django_mongoengine import fields, Document
+from mongoengine.queryset.base import CASCADE
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import OaiHarvesterMetadataFormat
+from core_oaipmh_harvester_app.components.oai_harvester_set.models import OaiHarvesterSet
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_main_app.commons import exceptions
+
+
+class OaiHarvesterMetrics(Document):
+    """Harvest counters and stage timings of a harvest chain (metadata format and set)"""
+    registry = fields.ReferenceField(OaiRegistry, reverse_delete_rule=CASCADE)
+    harvester_set = fields.ReferenceField(OaiHarvesterSet, reverse_delete_rule=CASCADE, blank=True)
+    harvester_metadata_format = fields.ReferenceField(OaiHarvesterMetadataFormat, reverse_delete_rule=CASCADE,
+                                                      unique_with='harvester_set')
+    pages = fields.IntField(default=0)
+    records = fields.IntField(default=0)
+    bytes = fields.LongField(default=0)
+    seconds = fields.FloatField(default=0)
+    fetch_seconds = fields.FloatField(default=0)
+    parse_seconds = fields.FloatField(default=0)
+    transform_seconds = fields.FloatField(default=0)
+    convert_seconds = fields.FloatField(default=0)
+    mongo_seconds = fields.FloatField(default=0)
+
+    @staticmethod
+    def get_all():
+        """ Get all OaiHarvesterMetrics.
+
+            Returns:
+                List of OaiHarvesterMetrics.
+
+        """
+        return OaiHarvesterMetrics.objects().all()
+
+    @staticmethod
+    def inc_by_metadata_format_and_set(harvester_metadata_format, harvester_set, **increments):
+        """ Increment the metrics of a given metadata_format and set. Create an
+        OaiHarvesterMetrics if doesn't exist.
+
+            Args:
+                harvester_metadata_format: Metadata format.
+                harvester_set: Set, None for a chain harvesting all the sets.
+                **increments: Update of the fields.
+
+        """
+        try:
+            OaiHarvesterMetrics.objects(
+                harvester_metadata_format=harvester_metadata_format,
+                harvester_set=harvester_set).update_one(upsert=True, **increments)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
@@ -79,6 +79,20 @@ def get_all_by_registry_id(registry_id, order_by_field=None):
                                                   order_by_field=order_by_field)
 
 
+def get_references_by_set_spec_and_registry_id(registry_id):
+    """ Get a reference to each OaiHarvesterSet of a registry, by set spec, without loading the
+    documents.
+
+    Args:
+        registry_id: The registry id.
+
+    Returns:
+        Dict of DBRef by set spec.
+
+    """
+    return OaiHarvesterSet.get_references_by_set_spec_and_registry_id(registry_id)
+
+
 def get_all_by_list_registry_ids(list_registry_ids, order_by_field=None):
     """ Return a list of OaiHarvesterSet by a list of registry ids. Possibility to order_by the list
 
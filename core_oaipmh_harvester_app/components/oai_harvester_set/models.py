@@ -2,6 +2,7 @@
 OaiHarvesterSet model
 """
 
+from bson.dbref import DBRef
 from django_mongoengine import fields
 from mongoengine.queryset.base import CASCADE
 from core_oaipmh_common_app.components.oai_set.models import OaiSet
@@ -16,6 +17,13 @@ class OaiHarvesterSet(OaiSet):
     registry = fields.ReferenceField(OaiRegistry, reverse_delete_rule=CASCADE, unique_with='set_spec')
     harvest = fields.BooleanField(blank=True)
 
+    meta = {
+        'indexes': [
+            # get_all_by_registry_id is covered by the (registry, set_spec) unique index
+            ('registry', 'harvest'),
+        ]
+    }
+
     @staticmethod
     def get_all_by_registry_id(registry_id, order_by_field=None):
         """ Return a list of OaiHarvesterSet by registry id. Possibility to order_by the list
@@ -30,6 +38,22 @@ class OaiHarvesterSet(OaiSet):
         """
         return OaiHarvesterSet.objects(registry=str(registry_id)).order_by(order_by_field)
 
+    @staticmethod
+    def get_references_by_set_spec_and_registry_id(registry_id):
+        """ Return a reference to each OaiHarvesterSet of a registry, by set spec. Only the set spec
+        and the id of the sets are loaded.
+
+        Args:
+            registry_id: The registry id.
+
+        Returns:
+            Dict of DBRef by set spec.
+
+        """
+        collection_name = OaiHarvesterSet._get_collection_name()
+        return {set_spec: DBRef(collection_name, set_id) for set_spec, set_id in
+                OaiHarvesterSet.objects(registry=str(registry_id)).scalar('set_spec', 'id')}
+
     @staticmethod
     def get_all_by_registry_id_and_harvest(registry_id, harvest, order_by_field=None):
         """ Return a list of OaiHarvesterSet by registry and harvest. Possibility to order_by the list.
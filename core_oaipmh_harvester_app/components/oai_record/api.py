@@ -1,15 +1,18 @@
 """
 OaiRecord API
 """
+from mongoengine.errors import NotUniqueError
 
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.utils import metrics_operations
 
 
-def upsert(oai_record):
+def upsert(oai_record, convert_to_dict=True):
     """ Create or update an OaiRecord.
 
     Args:
         oai_record: OaiRecord to create or update.
+        convert_to_dict: False if the dict_content has already been converted.
 
         Returns:
             OaiRecord instance.
@@ -17,7 +20,64 @@ def upsert(oai_record):
     """
     # Set the title with the OAI identifier.
     oai_record.title = oai_record.identifier
-    return oai_record.convert_and_save()
+    # Same steps as convert_and_save, timed separately
+    if convert_to_dict:
+        with metrics_operations.stage(metrics_operations.CONVERT):
+            oai_record.convert_to_dict()
+
+    with metrics_operations.stage(metrics_operations.MONGO):
+        oai_record.convert_to_file()
+        try:
+            return oai_record.save()
+        except NotUniqueError:
+            if oai_record.id is not None:
+                raise
+            # Inserted meanwhile by a concurrent chain of the metadata format: update it
+            oai_record.id = OaiRecord.get_by_identifier_and_metadata_format(
+                oai_record.identifier, oai_record.harvester_metadata_format).id
+            return oai_record.save()
+
+
+def upsert_many(list_oai_records, convert_to_dict=True):
+    """ Create or update a list of OaiRecord with a single bulk write.
+
+    Args:
+        list_oai_records: List of OaiRecord to create or update.
+        convert_to_dict: False if the dict_content has already been converted.
+
+    """
+    # No xml_content means that the record has no metadata (Deleted). Nothing to convert.
+    list_oai_records_with_content = [oai_record for oai_record in list_oai_records
+                                     if oai_record.xml_content is not None]
+    for oai_record in list_oai_records:
+        # Set the title with the OAI identifier.
+        oai_record.title = oai_record.identifier
+
+    if convert_to_dict:
+        with metrics_operations.stage(metrics_operations.CONVERT):
+            for oai_record in list_oai_records_with_content:
+                oai_record.convert_to_dict()
+
+    with metrics_operations.stage(metrics_operations.MONGO):
+        for oai_record in list_oai_records_with_content:
+            oai_record.convert_to_file()
+        OaiRecord.bulk_upsert(list_oai_records)
+
+
+def update_headers(list_oai_records):
+    """ Update the header (status, datestamp, sets) of a list of existing OaiRecord, without
+    rewriting their metadata.
+
+    Args:
+        list_oai_records: List of OaiRecord to update.
+
+    """
+    for oai_record in list_oai_records:
+        # Set the title with the OAI identifier.
+        oai_record.title = oai_record.identifier
+
+    with metrics_operations.stage(metrics_operations.MONGO):
+        OaiRecord.bulk_update_headers(list_oai_records)
 
 
 def get_by_id(oai_record_id):
@@ -45,6 +105,21 @@ def get_by_identifier_and_metadata_format(identifier, harvester_metadata_format)
     return OaiRecord.get_by_identifier_and_metadata_format(identifier, harvester_metadata_format)
 
 
+def get_digests_by_identifiers_and_metadata_format(identifiers, harvester_metadata_format):
+    """ Return the stored digests of the OaiRecord with the given identifiers and metadata format.
+
+    Args:
+        identifiers: List of identifiers.
+        harvester_metadata_format: harvester_metadata_format of the OaiRecord.
+
+    Returns:
+        Dict of (id, digest, metadata_digest) by identifier.
+
+    """
+    return OaiRecord.get_digests_by_identifiers_and_metadata_format(identifiers,
+                                                                    harvester_metadata_format)
+
+
 def get_all():
     """ Return all OaiRecord.
 
@@ -4,6 +4,8 @@ OaiRecord model
 from django_mongoengine import fields
 from mongoengine import errors as mongoengine_errors
 from mongoengine.queryset.base import PULL, CASCADE
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from core_main_app.commons import exceptions
 from core_main_app.components.abstract_data.models import AbstractData
@@ -13,6 +15,8 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models i
 from core_oaipmh_harvester_app.components.oai_harvester_set.models import OaiHarvesterSet
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 
+DUPLICATE_KEY_ERROR = 11000
+
 
 class OaiRecord(AbstractData):
     """
@@ -23,6 +27,22 @@ class OaiRecord(AbstractData):
     harvester_sets = fields.ListField(fields.ReferenceField(OaiHarvesterSet, reverse_delete_rule=PULL), blank=True)
     harvester_metadata_format = fields.ReferenceField(OaiHarvesterMetadataFormat, reverse_delete_rule=CASCADE)
     registry = fields.ReferenceField(OaiRegistry, reverse_delete_rule=CASCADE)
+    digest = fields.StringField(blank=True)
+    metadata_digest = fields.StringField(blank=True)
+
+    meta = {
+        'indexes': [
+            # get_by_identifier_and_metadata_format, bulk_upsert. Unique: the chains of a metadata
+            # format are harvested concurrently and may insert the same record.
+            {'fields': ('identifier', 'harvester_metadata_format'), 'unique': True},
+            # get_all_by_registry_id, get_count_by_registry_id, queries on registries
+            ('registry', 'deleted', 'title'),
+            # Queries on metadata formats (templates)
+            ('harvester_metadata_format', 'deleted', 'title'),
+            # Set deletion (PULL)
+            'harvester_sets',
+        ]
+    }
 
     @staticmethod
     def get_by_id(oai_record_id):
@@ -103,6 +123,88 @@ class OaiRecord(AbstractData):
         """
         return OaiRecord.objects(registry=str(registry_id)).count()
 
+    @staticmethod
+    def get_digests_by_identifiers_and_metadata_format(identifiers, harvester_metadata_format):
+        """ Return the stored digests of the OaiRecord with the given identifiers and metadata format.
+
+        Args:
+            identifiers: List of identifiers.
+            harvester_metadata_format: harvester_metadata_format of the OaiRecord.
+
+        Returns:
+            Dict of (id, digest, metadata_digest) by identifier.
+
+        """
+        records = OaiRecord.objects(identifier__in=identifiers,
+                                    harvester_metadata_format=harvester_metadata_format)
+        return {record.identifier: (record.id, record.digest, record.metadata_digest)
+                for record in records.only('id', 'identifier', 'digest', 'metadata_digest')}
+
+    @staticmethod
+    def bulk_upsert(list_oai_records):
+        """ Create or update a list of OaiRecord with a single bulk write. Records are matched on
+        their identifier and harvester_metadata_format.
+
+        Args:
+            list_oai_records: List of OaiRecord to create or update.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        operations = []
+        for oai_record in list_oai_records:
+            record_filter = {'identifier': oai_record.identifier,
+                             'harvester_metadata_format': oai_record.harvester_metadata_format.id}
+            # No xml_content means that the record has no metadata (Deleted). Only update the
+            # header, keep the xml_content already in database.
+            if oai_record.xml_content is None:
+                operations.append(UpdateOne(record_filter, {'$set': _get_header(oai_record)},
+                                            upsert=True))
+            else:
+                oai_record.validate()
+                document = oai_record.to_mongo()
+                document.pop('_id', None)
+                operations.append(ReplaceOne(record_filter, document, upsert=True))
+
+        if len(operations) == 0:
+            return
+
+        try:
+            try:
+                OaiRecord._get_collection().bulk_write(operations)
+            except BulkWriteError as e:
+                if any(error['code'] != DUPLICATE_KEY_ERROR for error in e.details['writeErrors']):
+                    raise
+                # A record was inserted meanwhile by a concurrent chain: the upserts match it now
+                OaiRecord._get_collection().bulk_write(operations)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
+
+    @staticmethod
+    def bulk_update_headers(list_oai_records):
+        """ Update the header (status, datestamp, sets) of a list of existing OaiRecord with a
+        single bulk write. The metadata (xml_content, dict_content) are not rewritten.
+
+        Args:
+            list_oai_records: List of OaiRecord to update.
+
+        Raises:
+            ModelError: Internal error during the process.
+
+        """
+        operations = [UpdateOne({'identifier': oai_record.identifier,
+                                 'harvester_metadata_format': oai_record.harvester_metadata_format.id},
+                                {'$set': _get_header(oai_record)})
+                      for oai_record in list_oai_records]
+        if len(operations) == 0:
+            return
+
+        try:
+            OaiRecord._get_collection().bulk_write(operations)
+        except Exception as e:
+            raise exceptions.ModelError(e.message)
+
     @staticmethod
     def delete_all_by_registry_id(registry_id):
         """ Delete all OaiRecord of a registry.
@@ -154,3 +256,22 @@ class OaiRecord(AbstractData):
 
         """
         return OaiRecord.objects.aggregate(*pipeline)
+
+
+def _get_header(oai_record):
+    """ Return the header fields of an OaiRecord, as stored in database.
+
+    Args:
+        oai_record: OaiRecord.
+
+    Returns:
+        Dict of header fields.
+
+    """
+    return {'title': oai_record.title,
+            'deleted': oai_record.deleted,
+            'last_modification_date': oai_record.last_modification_date,
+            # Sets can be documents or references (DBRef)
+            'harvester_sets': [set_.id for set_ in oai_record.harvester_sets],
+            'registry': oai_record.registry.id,
+            'digest': oai_record.digest}
@@ -3,6 +3,13 @@ OaiRegistry API
 """
 
 import datetime
+import hashlib
+import json
+import threading
+import time
+from Queue import Queue, Full
+from multiprocessing.pool import ThreadPool
+from urlparse import urlparse
 
 from rest_framework.status import HTTP_500_INTERNAL_SERVER_ERROR
 
@@ -12,6 +19,7 @@ from core_oaipmh_common_app.commons.messages import OaiPmhMessage
 from core_oaipmh_common_app.utils import UTCdatetime
 from rest_framework import status
 
+from core_oaipmh_harvester_app.components.oai_harvester_checkpoint import api as oai_harvester_checkpoint_api
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api \
     as oai_harvester_metadata_format_api
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set import api as \
@@ -22,7 +30,15 @@ from core_oaipmh_harvester_app.components.oai_identify import api as oai_identif
 from core_oaipmh_harvester_app.components.oai_record import api as oai_record_api
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
-from core_oaipmh_harvester_app.utils import transform_operations
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_BULK_UPSERT, OAI_HARVESTER_CONVERSION_PROCESSES, \
+    OAI_HARVESTER_SET_REFERENCES, OAI_HARVESTER_PAGE_RETRIES, OAI_HARVESTER_DISCOVERY_CONCURRENCY, \
+    OAI_HARVESTER_INFO_REFRESH_RATE
+from core_oaipmh_harvester_app.utils import conversion_operations, document_operations, event_operations, \
+    metrics_operations, throttle_operations, query_cache_operations, transform_operations
+
+_END_OF_PAGES = object()
+_RETRY_STATUS_CODES = (status.HTTP_429_TOO_MANY_REQUESTS, status.HTTP_502_BAD_GATEWAY,
+                       status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_504_GATEWAY_TIMEOUT)
 
 
 def upsert(oai_registry):
@@ -34,7 +50,15 @@ def upsert(oai_registry):
     Returns: The OaiRegistry instance.
 
     """
-    return oai_registry.save()
+    is_cache_changed = document_operations.is_document_changed(oai_registry, ['is_activated'])
+    is_status_changed = document_operations.is_document_changed(oai_registry,
+                                                                event_operations.REGISTRY_STATUS_FIELDS)
+    oai_registry = oai_registry.save()
+    if is_cache_changed:
+        query_cache_operations.clear_cache()
+    if is_status_changed:
+        event_operations.publish_registry_status(oai_registry)
+    return oai_registry
 
 
 def get_by_id(oai_registry_id):
@@ -107,6 +131,8 @@ def delete(oai_registry):
 
     """
     oai_registry.delete()
+    if oai_registry.is_activated:
+        query_cache_operations.clear_cache()
 
 
 def add_registry_by_url(url, harvest_rate, harvest):
@@ -126,9 +152,7 @@ def add_registry_by_url(url, harvest_rate, harvest):
         raise oai_pmh_exceptions.OAIAPINotUniqueError(message='Unable to create the data provider.'
                                                               ' The data provider already exists.')
 
-    identify_response = _get_identify_as_object(url)
-    sets_response = _get_sets_as_object(url)
-    metadata_formats_response = _get_metadata_formats_as_object(url)
+    identify_response, sets_response, metadata_formats_response = _get_registry_info_as_object(url)
 
     try:
         registry = _init_registry(url, harvest, harvest_rate, identify_response.repository_name,
@@ -137,8 +161,12 @@ def add_registry_by_url(url, harvest_rate, harvest):
         _upsert_identify_for_registry(identify_response, registry)
         for set_ in sets_response:
             _upsert_set_for_registry(set_, registry)
-        for metadata_format in metadata_formats_response:
-            _upsert_metadata_format_for_registry(metadata_format, registry)
+        saved = _upsert_metadata_formats_for_registry(metadata_formats_response, registry)
+        if all(saved):
+            registry.info_fingerprint = _get_info_fingerprint(identify_response, sets_response,
+                                                              metadata_formats_response)
+        registry.last_info_update = datetime.datetime.now()
+        registry = upsert(registry)
 
         return registry
     except Exception as e:
@@ -150,11 +178,13 @@ def add_registry_by_url(url, harvest_rate, harvest):
                                                          status_code=HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def update_registry_info(registry):
+def update_registry_info(registry, only_if_changed=False):
     """ Updates information of a registry in database by its id.
 
         Args:
             registry: OaiRegistry to update.
+            only_if_changed: Do not save the information again if the answers of the Data Provider
+            did not change since the last update.
 
         Returns:
             The OaiRegistry instance.
@@ -162,23 +192,27 @@ def update_registry_info(registry):
         """
     registry.isUpdating = True
     upsert(registry)
-    identify_response = _get_identify_as_object(registry.url)
-    sets_response = _get_sets_as_object(registry.url)
-    metadata_formats_response = _get_metadata_formats_as_object(registry.url)
+    identify_response, sets_response, metadata_formats_response = \
+        _get_registry_info_as_object(registry.url)
+    info_fingerprint = _get_info_fingerprint(identify_response, sets_response,
+                                             metadata_formats_response)
 
     try:
-        _upsert_identify_for_registry(identify_response, registry)
-        registry.name = identify_response.repository_name
-        registry.description = identify_response.description
-        upsert(registry)
-        for set_ in sets_response:
-            _upsert_set_for_registry(set_, registry)
-        for metadata_format in metadata_formats_response:
-            _upsert_metadata_format_for_registry(metadata_format, registry)
-        # Check if we have some deleted set
-        _handle_deleted_set(registry.id, sets_response)
-        # Check if we have some deleted metadata format
-        _handle_deleted_metadata_format(registry.id, metadata_formats_response)
+        if not only_if_changed or info_fingerprint != registry.info_fingerprint:
+            _upsert_identify_for_registry(identify_response, registry)
+            registry.name = identify_response.repository_name
+            registry.description = identify_response.description
+            upsert(registry)
+            for set_ in sets_response:
+                _upsert_set_for_registry(set_, registry)
+            saved = _upsert_metadata_formats_for_registry(metadata_formats_response, registry)
+            # Check if we have some deleted set
+            _handle_deleted_set(registry.id, sets_response)
+            # Check if we have some deleted metadata format
+            _handle_deleted_metadata_format(registry.id, metadata_formats_response)
+            # Retry the metadata formats not saved (schema not available) on the next update
+            registry.info_fingerprint = info_fingerprint if all(saved) else None
+        registry.last_info_update = datetime.datetime.now()
         registry.isUpdating = False
         upsert(registry)
 
@@ -190,6 +224,24 @@ def update_registry_info(registry):
                                                          status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def refresh_registry_info(registry):
+    """ Updates information of a registry before a harvest. The information is refreshed at most
+    every OAI_HARVESTER_INFO_REFRESH_RATE seconds, and only saved again if the answers of the Data
+    Provider changed.
+
+        Args:
+            registry: OaiRegistry to update.
+
+        Returns:
+            The OaiRegistry instance.
+
+        """
+    if registry.last_info_update is not None and datetime.datetime.now() < \
+            registry.last_info_update + datetime.timedelta(seconds=OAI_HARVESTER_INFO_REFRESH_RATE):
+        return registry
+    return update_registry_info(registry, only_if_changed=True)
+
+
 def harvest_registry(registry):
     """ Harvests the registry given in parameter.
     Args:
@@ -211,12 +263,8 @@ def harvest_registry(registry):
         registry_all_sets = oai_harvester_set_api.get_all_by_registry_id(registry.id, "set_name")
         # Get all available  sets
         registry_sets_to_harvest = oai_harvester_set_api.get_all_to_harvest_by_registry_id(registry.id, "set_name")
-        # Check if we have to retrieve all sets or not. If all sets, no need to provide the
-        # set parameter in the harvest request.
-        # Avoid to retrieve same records for nothing (If records are in many sets).
-        search_by_sets = len(registry_all_sets) != len(registry_sets_to_harvest)
         # Search by sets
-        if search_by_sets and len(registry_all_sets) != 0:
+        if _search_by_sets(registry_all_sets, registry_sets_to_harvest):
             all_errors = _harvest_by_metadata_formats_and_sets(registry, metadata_formats,
                                                                registry_sets_to_harvest,
                                                                registry_all_sets)
@@ -237,6 +285,191 @@ def harvest_registry(registry):
                                                          status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def harvest_registries(registries, max_workers, max_per_host):
+    """ Updates and harvests many registries at once in the current process. Registries are
+    mostly waiting on network I/O: up to max_workers registries are harvested at the same time,
+    with at most max_per_host registries of the same Data Provider host.
+    Args:
+        registries: List of registries to harvest.
+        max_workers: Maximum number of registries harvested at the same time.
+        max_per_host: Maximum number of registries of the same host harvested at the same time.
+
+    Returns:
+        List of the errors of each registry, in the order of the registries.
+
+    """
+    if len(registries) == 0:
+        return []
+
+    host_slots = {}
+    for registry in registries:
+        host_slots.setdefault(urlparse(registry.url).netloc, threading.BoundedSemaphore(max_per_host))
+
+    def harvest(registry):
+        with host_slots[urlparse(registry.url).netloc]:
+            return _update_and_harvest_registry(registry)
+
+    pool = ThreadPool(max(1, min(max_workers, len(registries))))
+    try:
+        return pool.map(harvest, registries)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _update_and_harvest_registry(registry):
+    """ Updates the registry information, if changed, then harvests its records.
+    Args:
+        registry: The registry to harvest.
+
+    Returns:
+        List of errors.
+
+    """
+    try:
+        if not registry.is_updating:
+            refresh_registry_info(registry)
+        if not registry.is_harvesting:
+            return harvest_registry(registry)
+        return []
+    except Exception as e:
+        return [{'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'error': e.message}]
+
+
+def get_harvest_chains(registry):
+    """ Returns the independent harvest chains of the registry. Each chain is harvested with its
+    own resumption token chain.
+    Args:
+        registry: The registry to harvest.
+
+    Returns:
+        List of (metadata format, set) tuples. The set is None if the records are not harvested
+        by set.
+
+    """
+    # Get all metadata formats to harvest
+    metadata_formats = oai_harvester_metadata_format_api.get_all_to_harvest_by_registry_id(registry.id)
+    # Get all sets
+    registry_all_sets = oai_harvester_set_api.get_all_by_registry_id(registry.id, "set_name")
+    # Get all available  sets
+    registry_sets_to_harvest = oai_harvester_set_api.get_all_to_harvest_by_registry_id(registry.id, "set_name")
+    if _search_by_sets(registry_all_sets, registry_sets_to_harvest):
+        return [(metadata_format, set_) for metadata_format in metadata_formats
+                for set_ in registry_sets_to_harvest]
+
+    return [(metadata_format, None) for metadata_format in metadata_formats]
+
+
+def start_harvest(registry):
+    """ Flags the registry as being harvested.
+    Args:
+        registry: The registry to harvest.
+
+    Returns:
+        Harvest date, to give to end_harvest once all the chains are harvested.
+
+    """
+    # We are harvesting
+    registry.is_harvesting = True
+    upsert(registry)
+    # Set the last update date
+    return datetime.datetime.now()
+
+
+def harvest_chain(registry, metadata_format, set_=None):
+    """ Harvests one chain of the registry.
+    Args:
+        registry: The registry to harvest.
+        metadata_format: Metadata format to harvest.
+        set_: Set to harvest. None to harvest the metadata format without set.
+
+    Returns:
+        List of errors.
+
+    """
+    registry_all_sets = oai_harvester_set_api.get_all_by_registry_id(registry.id, "set_name")
+    if set_ is None:
+        return _harvest_by_metadata_format(registry, metadata_format, registry_all_sets)
+
+    return _harvest_by_metadata_format_and_set(registry, metadata_format, set_, registry_all_sets)
+
+
+def end_harvest(registry, chains, chains_errors, harvest_date):
+    """ Ends the harvest of the registry once all its chains are harvested.
+    Args:
+        registry: The harvested registry.
+        chains: List of harvested (metadata format, set) tuples.
+        chains_errors: List of the errors of each chain, in the order of the chains.
+        harvest_date: Harvest date returned by start_harvest.
+
+    Returns:
+        all_errors: List of errors.
+
+    """
+    # Chains without set already updated the last update date of their metadata format
+    set_chains = [(chain, errors) for chain, errors in zip(chains, chains_errors)
+                  if chain[1] is not None]
+    _update_metadata_formats_last_update([chain for chain, _ in set_chains],
+                                         [errors for _, errors in set_chains], harvest_date)
+    # Stop harvesting
+    registry.is_harvesting = False
+    # Set the last update date
+    registry.last_update = harvest_date
+    upsert(registry)
+
+    return [errors for errors in chains_errors if len(errors) > 0]
+
+
+def _search_by_sets(registry_all_sets, registry_sets_to_harvest):
+    """ Checks if we have to retrieve all sets or not. If all sets, no need to provide the
+    set parameter in the harvest request.
+    Avoid to retrieve same records for nothing (If records are in many sets).
+    Args:
+        registry_all_sets: List of all sets.
+        registry_sets_to_harvest: List of sets to harvest.
+
+    Returns:
+        True if the records have to be harvested by set.
+
+    """
+    return len(registry_all_sets) != len(registry_sets_to_harvest) and len(registry_all_sets) != 0
+
+
+def _get_registry_info_as_object(url):
+    """ Returns the identify, sets and metadata formats information for the given URL. The three
+    requests are sent at the same time.
+
+    Args:
+        url: URL.
+
+    Returns:
+        identify_response, sets_response, metadata_formats_response.
+
+    """
+    return _map_concurrently(lambda get_info_as_object: get_info_as_object(url),
+                             [_get_identify_as_object, _get_sets_as_object,
+                              _get_metadata_formats_as_object])
+
+
+def _get_info_fingerprint(identify_response, sets_response, metadata_formats_response):
+    """ Returns a fingerprint of the answers of a Data Provider to Identify, ListSets and
+    ListMetadataFormats.
+
+    Args:
+        identify_response: identify response.
+        sets_response: ListSet response.
+        metadata_formats_response: ListMetadataFormat response.
+
+    Returns:
+        Fingerprint (str).
+
+    """
+    info = [identify_response.raw,
+            [set_.raw for set_ in sets_response],
+            [metadata_format.raw for metadata_format in metadata_formats_response]]
+    return hashlib.sha1(json.dumps(info, sort_keys=True, default=str)).hexdigest()
+
+
 def _get_identify_as_object(url):
     """ Returns the identify information for the given URL.
 
@@ -332,6 +565,23 @@ def _upsert_identify_for_registry(identify, registry):
     api_oai_identify.upsert(identify)
 
 
+def _upsert_metadata_formats_for_registry(metadata_formats, registry):
+    """ Adds or updates the OaiHarvesterMetadataFormat objects of a registry. The schemas of the
+    metadata formats are downloaded at the same time.
+
+    Args:
+        metadata_formats: List of OaiHarvesterMetadataFormat instances.
+        registry: OaiRegistry instance.
+
+    Returns:
+        List of booleans, True if the metadata format has been saved.
+
+    """
+    return _map_concurrently(lambda metadata_format:
+                             _upsert_metadata_format_for_registry(metadata_format, registry),
+                             metadata_formats)
+
+
 def _upsert_metadata_format_for_registry(metadata_format, registry):
     """ Adds or updates an OaiHarvesterMetadataFormat object for a registry.
 
@@ -339,6 +589,9 @@ def _upsert_metadata_format_for_registry(metadata_format, registry):
         metadata_format: OaiHarvesterMetadataFormat instance.
         registry: OaiRegistry instance.
 
+    Returns:
+        True if the metadata format has been saved.
+
     """
     try:
         metadata_format_to_save = oai_harvester_metadata_format_api.\
@@ -356,9 +609,10 @@ def _upsert_metadata_format_for_registry(metadata_format, registry):
     try:
         metadata_format_to_save = oai_harvester_metadata_format_api.init_schema_info(metadata_format_to_save)
         oai_harvester_metadata_format_api.upsert(metadata_format_to_save)
+        return True
     except exceptions.ApiError as e:
         # Log exception. Do not save the metadata format.
-        pass
+        return False
 
 
 def _upsert_set_for_registry(set_, registry):
@@ -386,7 +640,8 @@ def _upsert_set_for_registry(set_, registry):
 
 def _harvest_by_metadata_formats_and_sets(registry, metadata_formats, registry_sets_to_harvest,
                                           registry_all_sets):
-    """ Harvests data by metadata formats and sets.
+    """ Harvests data by metadata formats and sets. Each (metadata format, set) pair has its own
+    resumption token chain: up to registry.harvest_concurrency chains are harvested at once.
     Args:
         registry: Registry.
         metadata_formats: List of metadata formats to harvest.
@@ -397,38 +652,74 @@ def _harvest_by_metadata_formats_and_sets(registry, metadata_formats, registry_s
         List of potential errors.
 
     """
-    all_errors = []
+    current_update_mf = datetime.datetime.now()
+    chains = [(metadata_format, set_) for metadata_format in metadata_formats
+              for set_ in registry_sets_to_harvest]
+    chains_errors = _run_harvest_chains(registry, lambda chain: _harvest_by_metadata_format_and_set(
+        registry, chain[0], chain[1], registry_all_sets), chains)
+    _update_metadata_formats_last_update(chains, chains_errors, current_update_mf)
+    return [errors for errors in chains_errors if len(errors) > 0]
+
+
+def _update_metadata_formats_last_update(chains, chains_errors, update_date):
+    """ Sets the last update date of the metadata formats for which all sets were harvested
+    without error.
+    Args:
+        chains: List of harvested (metadata format, set) tuples.
+        chains_errors: List of the errors of each chain, in the order of the chains.
+        update_date: Last update date.
+
+    """
+    metadata_formats = []
+    failed_metadata_format_ids = set()
+    for (metadata_format, _), errors in zip(chains, chains_errors):
+        if metadata_format.id not in [harvested.id for harvested in metadata_formats]:
+            metadata_formats.append(metadata_format)
+        if len(errors) > 0:
+            failed_metadata_format_ids.add(metadata_format.id)
     for metadata_format in metadata_formats:
-        current_update_mf = datetime.datetime.now()
-        errors_during_harvest = False
-        for set_ in registry_sets_to_harvest:
-            current_update_mf_set = datetime.datetime.now()
-            try:
-                # Retrieve the last update for this metadata format and this set
-                last_update = oai_harvester_metadata_format_set_api.\
-                    get_last_update_by_metadata_format_and_set(metadata_format, set_)
-            except:
-                last_update = None
-            errors = _harvest_records(registry, metadata_format, last_update, registry_all_sets,
-                                      set_)
-            # If no exceptions was thrown and no errors occurred, we can update the last_update date
-            if len(errors) == 0:
-                oai_harvester_metadata_format_set_api \
-                    .upsert_last_update_by_metadata_format_and_set(metadata_format, set_,
-                                                                   current_update_mf_set)
-            else:
-                errors_during_harvest = True
-                all_errors.append(errors)
         # Set the last update date if no exceptions was thrown
         # Would be useful if we do a _harvest_by_metadata_formats in the future: won't retrieve everything
-        if not errors_during_harvest:
-            metadata_format.last_update = current_update_mf
+        if metadata_format.id not in failed_metadata_format_ids:
+            metadata_format.last_update = update_date
             oai_harvester_metadata_format_api.upsert(metadata_format)
-    return all_errors
+
+
+def _harvest_by_metadata_format_and_set(registry, metadata_format, set_, registry_all_sets):
+    """ Harvests data by metadata format and set.
+    Args:
+        registry: Registry.
+        metadata_format: Metadata format to harvest.
+        set_: Set to harvest.
+        registry_all_sets: List of all sets.
+
+    Returns:
+        List of potential errors.
+
+    """
+    checkpoint = _get_checkpoint(metadata_format, set_)
+    # A resumed chain keeps the date of its first run: records updated since are harvested again
+    # by the next run.
+    current_update_mf_set = checkpoint.harvest_date if checkpoint is not None else datetime.datetime.now()
+    try:
+        # Retrieve the last update for this metadata format and this set
+        last_update = oai_harvester_metadata_format_set_api.\
+            get_last_update_by_metadata_format_and_set(metadata_format, set_)
+    except:
+        last_update = None
+    errors = _harvest_records(registry, metadata_format, last_update, registry_all_sets, set_,
+                              checkpoint=checkpoint, harvest_date=current_update_mf_set)
+    # If no exceptions was thrown and no errors occurred, we can update the last_update date
+    if len(errors) == 0:
+        oai_harvester_metadata_format_set_api \
+            .upsert_last_update_by_metadata_format_and_set(metadata_format, set_,
+                                                           current_update_mf_set)
+    return errors
 
 
 def _harvest_by_metadata_formats(registry, metadata_formats, registry_all_sets):
-    """ Harvests data by metadata formats.
+    """ Harvests data by metadata formats. Each metadata format has its own resumption token
+    chain: up to registry.harvest_concurrency chains are harvested at once.
     Args:
         registry: Registry.
         metadata_formats: List of metadata formats to harvest.
@@ -438,34 +729,86 @@ def _harvest_by_metadata_formats(registry, metadata_formats, registry_all_sets):
         List of potential errors.
 
     """
-    all_errors = []
-    for metadata_format in metadata_formats:
-        try:
-            # Retrieve the last update for this metadata format
-            last_update = UTCdatetime.datetime_to_utc_datetime_iso8601(metadata_format.last_update)
-        except:
-            last_update = None
-        # Update the new date for the metadataFormat
-        current_update_mf = datetime.datetime.now()
-        errors = _harvest_records(registry, metadata_format, last_update, registry_all_sets)
-        # If no exceptions was thrown and no errors occurred, we can update the last_update date
-        if len(errors) == 0:
-            # Update the update date for all sets
-            # Would be useful if we do a _harvest_by_metadata_formats_and_sets in the future: won't retrieve everything
-            if len(registry_all_sets) != 0:
-                for set_ in registry_all_sets:
-                    oai_harvester_metadata_format_set_api\
-                        .upsert_last_update_by_metadata_format_and_set(metadata_format, set_,
-                                                                       current_update_mf)
-            # Update the update date
-            metadata_format.last_update = current_update_mf
-            oai_harvester_metadata_format_api.upsert(metadata_format)
-        else:
-            all_errors.append(errors)
-    return all_errors
+    chains_errors = _run_harvest_chains(registry, lambda metadata_format: _harvest_by_metadata_format(
+        registry, metadata_format, registry_all_sets), list(metadata_formats))
+    return [errors for errors in chains_errors if len(errors) > 0]
+
+
+def _harvest_by_metadata_format(registry, metadata_format, registry_all_sets):
+    """ Harvests data by metadata format.
+    Args:
+        registry: Registry.
+        metadata_format: Metadata format to harvest.
+        registry_all_sets: List of all sets.
+
+    Returns:
+        List of potential errors.
+
+    """
+    try:
+        # Retrieve the last update for this metadata format
+        last_update = UTCdatetime.datetime_to_utc_datetime_iso8601(metadata_format.last_update)
+    except:
+        last_update = None
+    checkpoint = _get_checkpoint(metadata_format)
+    # Update the new date for the metadataFormat. A resumed chain keeps the date of its first run.
+    current_update_mf = checkpoint.harvest_date if checkpoint is not None else datetime.datetime.now()
+    errors = _harvest_records(registry, metadata_format, last_update, registry_all_sets,
+                              checkpoint=checkpoint, harvest_date=current_update_mf)
+    # If no exceptions was thrown and no errors occurred, we can update the last_update date
+    if len(errors) == 0:
+        # Update the update date for all sets
+        # Would be useful if we do a _harvest_by_metadata_formats_and_sets in the future: won't retrieve everything
+        if len(registry_all_sets) != 0:
+            for set_ in registry_all_sets:
+                oai_harvester_metadata_format_set_api\
+                    .upsert_last_update_by_metadata_format_and_set(metadata_format, set_,
+                                                                   current_update_mf)
+        # Update the update date
+        metadata_format.last_update = current_update_mf
+        oai_harvester_metadata_format_api.upsert(metadata_format)
+    return errors
+
+
+def _run_harvest_chains(registry, harvest_chain, chains):
+    """ Runs independent harvest chains, at most registry.harvest_concurrency at once.
+    Args:
+        registry: Registry.
+        harvest_chain: Function harvesting a chain and returning its list of errors.
+        chains: List of chains.
+
+    Returns:
+        List of the errors of each chain, in the order of the chains.
+
+    """
+    return _map_concurrently(harvest_chain, chains, registry.harvest_concurrency or 1)
 
 
-def _harvest_records(registry, metadata_format, last_update, registry_all_sets, set_=None):
+def _map_concurrently(function, items, max_workers=OAI_HARVESTER_DISCOVERY_CONCURRENCY):
+    """ Applies a function to independent items, at most max_workers at once.
+    Args:
+        function: Function.
+        items: List of items.
+        max_workers: Maximum number of items processed at the same time.
+
+    Returns:
+        List of the results of each item, in the order of the items.
+
+    """
+    concurrency = min(max_workers, len(items))
+    if concurrency <= 1:
+        return [function(item) for item in items]
+
+    pool = ThreadPool(concurrency)
+    try:
+        return pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _harvest_records(registry, metadata_format, last_update, registry_all_sets, set_=None,
+                     checkpoint=None, harvest_date=None):
     """ Harvests records.
     Args:
         registry: Registry to harvest.
@@ -473,68 +816,393 @@ def _harvest_records(registry, metadata_format, last_update, registry_all_sets,
         last_update: Last update date.
         registry_all_sets: List of all sets.
         set_: Set to harvest
+        checkpoint: Checkpoint of an interrupted run of the chain, to resume from.
+        harvest_date: Start date of the chain. The position of the chain is checkpointed after
+        each page when given.
 
     Returns:
         List of potential errors.
 
     """
     errors = []
-    has_data = True
+    set_h = None
+    if set_ is not None:
+        set_h = set_.set_spec
+    # Set spec lookup, built once and used for every page
+    registry_sets_by_spec = _get_registry_sets_by_spec(registry, registry_all_sets)
+    from_date = last_update
     resumption_token = None
+    if checkpoint is not None:
+        # Resume the interrupted chain: same request, from the page following the last one saved
+        from_date = checkpoint.from_date
+        resumption_token = checkpoint.resumption_token
     # Get all records. Use of the resumption token.
-    while has_data:
-        # Get the list of records
-        set_h = None
-        if set_ is not None:
-            set_h = set_.set_spec
-        http_response, resumption_token = oai_verbs_api.list_records(url=registry.url,
-                                                                     metadata_prefix=metadata_format.metadata_prefix,
-                                                                     set_h=set_h, from_date=last_update,
-                                                                     resumption_token=resumption_token)
-        if http_response.status_code == status.HTTP_200_OK:
-            try:
-                list_oai_record = transform_operations.transform_dict_record_to_oai_record(http_response.data,
-                                                                                           registry_all_sets)
-                for oai_record in list_oai_record:
-                    _upsert_record_for_registry(oai_record, metadata_format, registry)
-            except Exception as e:
-                errors.append({'status_code': status.HTTP_400_BAD_REQUEST, 'error': e.message})
-        # Else, we get the status code with the error message provided by the http_response
-        else:
-            error = {'status_code': http_response.status_code,
-                     'error': http_response.data[oai_pmh_exceptions.OaiPmhMessage.label]}
-            errors.append(error)
-        # There is more records if we have a resumption token.
-        has_data = resumption_token is not None and resumption_token != ''
+    pages = _list_records_pages(registry.url, metadata_format.metadata_prefix, set_h, from_date,
+                                registry.harvest_queue_depth, resumption_token)
+    chain_progress = event_operations.ChainProgress(registry, metadata_format, set_)
+    with metrics_operations.ChainMetrics(registry, metadata_format, set_) as chain_metrics:
+        for http_response, next_resumption_token, page in pages:
+            if resumption_token is not None and http_response.status_code == status.HTTP_410_GONE:
+                # The resumption token has expired: restart the chain from the last update
+                oai_harvester_checkpoint_api.delete_by_metadata_format_and_set(metadata_format, set_)
+                pages.close()
+                return _harvest_records(registry, metadata_format, last_update, registry_all_sets,
+                                        set_, harvest_date=harvest_date)
+            resumption_token = None
+            if http_response.status_code == status.HTTP_200_OK:
+                try:
+                    with metrics_operations.stage(metrics_operations.TRANSFORM):
+                        list_oai_record = transform_operations.\
+                            transform_dict_record_to_oai_record(_consume_records(http_response.data),
+                                                                registry_sets_by_spec=registry_sets_by_spec)
+                    with metrics_operations.stage(metrics_operations.MONGO):
+                        list_header_oai_record, list_oai_record = \
+                            _split_changed_records(list_oai_record, metadata_format)
+                    # Only the header changed: update it without rewriting the metadata
+                    _update_records_header_for_registry(list_header_oai_record, metadata_format,
+                                                        registry)
+                    # Convert the whole page in the pool of worker processes
+                    convert_to_dict = OAI_HARVESTER_CONVERSION_PROCESSES == 0
+                    if not convert_to_dict:
+                        with metrics_operations.stage(metrics_operations.CONVERT):
+                            conversion_operations.convert_records_to_dict(list_oai_record)
+                    if OAI_HARVESTER_BULK_UPSERT:
+                        _upsert_records_for_registry(list_oai_record, metadata_format, registry,
+                                                     convert_to_dict)
+                    else:
+                        for oai_record in list_oai_record:
+                            _upsert_record_for_registry(oai_record, metadata_format, registry,
+                                                        convert_to_dict)
+                    # The chain is resumed from the first page not saved: stop moving the checkpoint
+                    # after an error.
+                    if harvest_date is not None and len(errors) == 0 and next_resumption_token:
+                        with metrics_operations.stage(metrics_operations.MONGO):
+                            _save_checkpoint(registry, metadata_format, set_, page,
+                                             next_resumption_token, from_date, harvest_date)
+                except Exception as e:
+                    errors.append({'status_code': status.HTTP_400_BAD_REQUEST, 'error': e.message})
+            # Else, we get the status code with the error message provided by the http_response
+            else:
+                error = {'status_code': http_response.status_code,
+                         'error': http_response.data[oai_pmh_exceptions.OaiPmhMessage.label]}
+                errors.append(error)
+            chain_metrics.end_page(page)
+            chain_progress.end_page(page)
+        chain_progress.flush()
+
+    # The chain is complete, the next run starts from the last update
+    if harvest_date is not None and len(errors) == 0:
+        oai_harvester_checkpoint_api.delete_by_metadata_format_and_set(metadata_format, set_)
 
     return errors
 
 
-def _upsert_record_for_registry(record, metadata_format, registry):
-    """ Adds or updates an OaiRecord object for a registry.
+def _consume_records(records):
+    """ Yields the records of a page in order, removing them from the page: each record is freed
+    once transformed, the page is not kept twice in memory.
 
     Args:
-        record: Record to update or create.
-        metadata_format: OaiHarvesterMetadataFormat instance.
-        registry: OaiRegistry instance.
+        records: List of representations of Oai-Pmh record objects.
+
+    Returns:
+        Representations of Oai-Pmh record objects.
+
+    """
+    records.reverse()
+    while records:
+        yield records.pop()
+
+
+def _get_checkpoint(metadata_format, set_=None):
+    """ Returns the checkpoint of an interrupted run of a chain, if it can be resumed. An expired
+    checkpoint is deleted.
+
+    Args:
+        metadata_format: Metadata Format of the chain.
+        set_: Set of the chain.
+
+    Returns:
+        OaiHarvesterCheckpoint, None if the chain starts from its last update.
 
     """
     try:
-        record_db = oai_record_api.get_by_identifier_and_metadata_format(record.identifier,
-                                                                         metadata_format)
-        # No xml_content means that the record has no metadata (Deleted). Do no change the
-        # xml_content already in database
-        if record.xml_content is None:
-            record.xml_content = record_db.xml_content
-
-        record.id = record_db.id
+        checkpoint = oai_harvester_checkpoint_api.get_by_metadata_format_and_set(metadata_format, set_)
     except exceptions.DoesNotExist:
-        pass
+        return None
+
+    if checkpoint.expiration_date is not None and checkpoint.expiration_date < datetime.datetime.utcnow():
+        oai_harvester_checkpoint_api.delete_by_metadata_format_and_set(metadata_format, set_)
+        return None
+
+    return checkpoint
+
+
+def _save_checkpoint(registry, metadata_format, set_, page, resumption_token, from_date,
+                     harvest_date):
+    """ Saves the position of a chain after a page, with the attributes of its resumption token.
+
+    Args:
+        registry: Registry to harvest.
+        metadata_format: Metadata Format of the chain.
+        set_: Set of the chain.
+        page: ListRecordsPage of the page.
+        resumption_token: Resumption token of the next page.
+        from_date: From Date of the chain requests.
+        harvest_date: Start date of the chain.
+
+    """
+    oai_harvester_checkpoint_api.\
+        upsert_by_metadata_format_and_set(metadata_format, set_, registry, resumption_token,
+                                          from_date, harvest_date, cursor=page.cursor,
+                                          complete_list_size=page.complete_list_size,
+                                          expiration_date=page.expiration_date)
+
+
+def _get_registry_sets_by_spec(registry, registry_all_sets):
+    """ Returns the set spec lookup used to link the harvested records to their sets.
+
+    Args:
+        registry: Registry to harvest.
+        registry_all_sets: List of all sets.
+
+    Returns:
+        Dict of sets, or references to sets (OAI_HARVESTER_SET_REFERENCES), by set spec.
+
+    """
+    if OAI_HARVESTER_SET_REFERENCES:
+        return oai_harvester_set_api.get_references_by_set_spec_and_registry_id(registry.id)
+
+    return transform_operations.get_sets_by_spec(registry_all_sets or [])
 
+
+def _list_records_pages(url, metadata_prefix, set_h, from_date, queue_depth=0, resumption_token=None):
+    """ Yields the ListRecords responses of a resumption token chain, with the resumption token of
+    the next page and the ListRecordsPage.
+    With a queue depth, the pages are fetched by a background thread: page N+1 is requested as
+    soon as the resumption token of page N is parsed, while page N is still being persisted.
+
+    Args:
+        url: URL of the Data Provider.
+        metadata_prefix: Metadata Prefix to harvest.
+        set_h: Set to harvest.
+        from_date: From Date.
+        queue_depth: Maximum number of fetched pages waiting to be persisted. 0 to fetch the
+        pages sequentially.
+        resumption_token: Resumption token of the first page, to resume an interrupted chain.
+
+    Returns:
+        ListRecords responses, resumption tokens of the next pages and ListRecordsPages.
+
+    """
+    if not queue_depth:
+        has_data = True
+        while has_data:
+            http_response, resumption_token, page = _list_records_page(url, metadata_prefix, set_h,
+                                                                       from_date, resumption_token)
+            yield http_response, resumption_token, page
+            # There is more records if we have a resumption token.
+            has_data = resumption_token is not None and resumption_token != ''
+    else:
+        pages = Queue(maxsize=queue_depth)
+        stop = threading.Event()
+        fetcher = threading.Thread(target=_fetch_list_records_pages,
+                                   args=(pages, stop, url, metadata_prefix, set_h, from_date,
+                                         resumption_token))
+        fetcher.daemon = True
+        fetcher.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is _END_OF_PAGES:
+                    break
+                yield page
+        finally:
+            # Stop the fetcher if the consumer stops before the end of the chain
+            stop.set()
+
+
+def _fetch_list_records_pages(pages, stop, url, metadata_prefix, set_h, from_date,
+                              resumption_token=None):
+    """ Fetches all the pages of a resumption token chain and puts them in the queue.
+
+    Args:
+        pages: Queue of ListRecords responses, resumption tokens of the next pages and
+        ListRecordsPages.
+        stop: Event set when the consumer does not need more pages.
+        url: URL of the Data Provider.
+        metadata_prefix: Metadata Prefix to harvest.
+        set_h: Set to harvest.
+        from_date: From Date.
+        resumption_token: Resumption token of the first page.
+
+    """
+    try:
+        has_data = True
+        while has_data and not stop.is_set():
+            http_response, resumption_token, page = _list_records_page(url, metadata_prefix, set_h,
+                                                                       from_date, resumption_token)
+            if not _put_page(pages, (http_response, resumption_token, page), stop):
+                return
+            # There is more records if we have a resumption token.
+            has_data = resumption_token is not None and resumption_token != ''
+    finally:
+        _put_page(pages, _END_OF_PAGES, stop)
+
+
+def _list_records_page(url, metadata_prefix, set_h, from_date, resumption_token):
+    """ Requests a ListRecords page through the rate limiter of the Data Provider host. The page is
+    requested again, from the same resumption token, while the Data Provider is unavailable.
+
+    Args:
+        url: URL of the Data Provider.
+        metadata_prefix: Metadata Prefix to harvest.
+        set_h: Set to harvest.
+        from_date: From Date.
+        resumption_token: Resumption token of the page.
+
+    Returns:
+        ListRecords response.
+        Resumption token of the next page.
+        ListRecordsPage.
+
+    """
+    rate_limiter = throttle_operations.get_rate_limiter(url)
+    attempt = 0
+    while True:
+        rate_limiter.acquire()
+        start = time.time()
+        http_response, next_resumption_token, page = \
+            oai_verbs_api.list_records(url=url, metadata_prefix=metadata_prefix, set_h=set_h,
+                                       from_date=from_date, resumption_token=resumption_token)
+        if http_response.status_code not in _RETRY_STATUS_CODES:
+            if http_response.status_code == status.HTTP_200_OK:
+                rate_limiter.on_success(time.time() - start)
+            return http_response, next_resumption_token, page
+
+        if attempt >= OAI_HARVESTER_PAGE_RETRIES:
+            # No other attempt: slow down without blocking the host for the other chains
+            rate_limiter.on_error(0)
+            return http_response, next_resumption_token, page
+        rate_limiter.on_error(throttle_operations.get_retry_after(http_response, attempt))
+        attempt += 1
+
+
+def _put_page(pages, page, stop):
+    """ Puts a page in the queue. Waits for a free slot unless the consumer has stopped.
+
+    Args:
+        pages: Queue of ListRecords responses, resumption tokens of the next pages and
+        ListRecordsPages.
+        page: Page to put.
+        stop: Event set when the consumer does not need more pages.
+
+    Returns:
+        True if the page has been put in the queue, False otherwise.
+
+    """
+    while not stop.is_set():
+        try:
+            pages.put(page, timeout=1)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _upsert_record_for_registry(record, metadata_format, registry, convert_to_dict=True):
+    """ Adds or updates an OaiRecord object for a registry. The id of an existing record is set by
+    _split_changed_records.
+
+    Args:
+        record: Record to update or create.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+        convert_to_dict: False if the dict_content of the record has already been converted.
+
+    """
     record.harvester_metadata_format = metadata_format
     record.registry = registry
 
-    oai_record_api.upsert(record)
+    oai_record_api.upsert(record, convert_to_dict)
+
+
+def _upsert_records_for_registry(records, metadata_format, registry, convert_to_dict=True):
+    """ Adds or updates a page of OaiRecord objects for a registry with a single bulk write.
+
+    Args:
+        records: List of records to update or create.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+        convert_to_dict: False if the dict_content of the records has already been converted.
+
+    """
+    for record in records:
+        record.harvester_metadata_format = metadata_format
+        record.registry = registry
+
+    oai_record_api.upsert_many(records, convert_to_dict)
+
+
+def _update_records_header_for_registry(records, metadata_format, registry):
+    """ Updates the header of a page of existing OaiRecord objects for a registry with a single bulk
+    write. The metadata already in database are kept.
+
+    Args:
+        records: List of records to update.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+        registry: OaiRegistry instance.
+
+    """
+    if len(records) == 0:
+        return
+
+    for record in records:
+        record.harvester_metadata_format = metadata_format
+        record.registry = registry
+
+    oai_record_api.update_headers(records)
+
+
+def _split_changed_records(records, metadata_format):
+    """ Sorts the changed records of a page. Records that did not change since the last harvest (same
+    digest) are removed: nothing to convert or write for them. Existing records with the same
+    metadata (same metadata digest, or Deleted) only need a header update. The id of the existing
+    records is set.
+
+    Args:
+        records: List of records.
+        metadata_format: OaiHarvesterMetadataFormat instance.
+
+    Returns:
+        List of records with a changed header only, list of new records or records with changed
+        metadata.
+
+    """
+    identifiers = [record.identifier for record in records if record.digest is not None]
+    if len(identifiers) == 0:
+        return [], records
+
+    stored_digests = oai_record_api.get_digests_by_identifiers_and_metadata_format(identifiers,
+                                                                                   metadata_format)
+    header_records = []
+    changed_records = []
+    for record in records:
+        if record.digest is None or record.identifier not in stored_digests:
+            changed_records.append(record)
+            continue
+        record_id, digest, metadata_digest = stored_digests[record.identifier]
+        if record.digest == digest:
+            continue
+        record.id = record_id
+        # No xml_content means that the record has no metadata (Deleted): keep the metadata already
+        # in database.
+        if record.xml_content is None or (record.metadata_digest is not None and
+                                          record.metadata_digest == metadata_digest):
+            header_records.append(record)
+        else:
+            changed_records.append(record)
+
+    return header_records, changed_records
 
 
 def _handle_deleted_set(registry_id, sets_response):
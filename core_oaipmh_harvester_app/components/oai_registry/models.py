@@ -19,6 +19,10 @@ class OaiRegistry(Document):
     is_updating = fields.BooleanField(default=False)
     is_activated = fields.BooleanField(default=True)
     is_queued = fields.BooleanField(default=False)
+    harvest_queue_depth = fields.IntField(blank=True, default=0)
+    harvest_concurrency = fields.IntField(blank=True, default=1)
+    info_fingerprint = fields.StringField(blank=True)
+    last_info_update = fields.DateTimeField(blank=True)
 
     @staticmethod
     def get_by_id(oai_registry_id):
@@ -1,15 +1,46 @@
 """
     Oai-PMH verbs API.
 """
-from core_main_app.utils.requests_utils.requests_utils import send_get_request
-from core_oaipmh_harvester_app.utils import sickle_operations, transform_operations
+import time
+
+from core_oaipmh_harvester_app.utils import sickle_operations, stream_operations, transform_operations
+from core_oaipmh_harvester_app.utils.session_operations import send_get_request
 from rest_framework import status
 from rest_framework.response import Response
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
-from xml_utils.xsd_tree.xsd_tree import XSDTree
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_common_app.utils import UTCdatetime
 import requests
 
+BAD_RESUMPTION_TOKEN = 'badResumptionToken'
+
+
+class ListRecordsPage(object):
+    """ Information about a ListRecords page, other than its records: the attributes of its
+    resumption token, the number of its records, and the timings of its HTTP fetch and XML parse.
+    """
+
+    def __init__(self, resumption_token_attributes=None, fetch_seconds=0.0, parse_seconds=0.0,
+                 content_bytes=0, record_count=0):
+        """ Constructor.
+
+        Args:
+            resumption_token_attributes: Attributes of the resumption token element (dict of str).
+            fetch_seconds: Time spent fetching the page, in seconds.
+            parse_seconds: Time spent parsing the page, in seconds.
+            content_bytes: Size of the page body, in bytes.
+            record_count: Number of records of the page.
+
+        """
+        resumption_token_attributes = resumption_token_attributes or {}
+        self.cursor = _get_int(resumption_token_attributes.get('cursor'))
+        self.complete_list_size = _get_int(resumption_token_attributes.get('completeListSize'))
+        self.expiration_date = _get_datetime(resumption_token_attributes.get('expirationDate'))
+        self.fetch_seconds = fetch_seconds
+        self.parse_seconds = parse_seconds
+        self.content_bytes = content_bytes
+        self.record_count = record_count
+
 
 def identify(url):
     """ Performs an Oai-Pmh identity request.
@@ -135,8 +166,10 @@ def list_records(url, metadata_prefix=None, resumption_token=None, set_h=None, f
     Returns:
         Response.
         Resumption Token.
+        ListRecordsPage.
 
     """
+    retry_after = None
     try:
         params = {'verb': 'ListRecords'}
         if resumption_token is not None:
@@ -146,35 +179,56 @@ def list_records(url, metadata_prefix=None, resumption_token=None, set_h=None, f
             params['set'] = set_h
             params['from'] = from_date
             params['until'] = until_date
-        rtn = []
-        http_response = send_get_request(url, params=params)
-        resumption_token = None
-        if http_response.status_code == status.HTTP_200_OK:
-            xml = http_response.text
-            elements = XSDTree.iterfind(xml, './/{http://www.openarchives.org/OAI/2.0/}record')
-            for elt in elements:
-                record = sickle_operations.get_record_elt(elt, metadata_prefix)
-                rtn.append(record)
-            resumption_token_elt = XSDTree.iterfind(xml, './/{http://www.openarchives.org/OAI/2.0/}resumptionToken')
-            resumption_token = next(iter(resumption_token_elt), None)
-            if resumption_token is not None:
-                resumption_token = resumption_token.text
-        elif http_response.status_code == status.HTTP_404_NOT_FOUND:
-            raise oai_pmh_exceptions.OAIAPILabelledException(message='Impossible to get data from the server. '
-                                                                     'Server not found',
-                                                             status_code=status.HTTP_404_NOT_FOUND)
-        else:
-            raise oai_pmh_exceptions.OAIAPILabelledException(message='An error occurred while trying to get '
-                                                                     'data from the server.',
-                                                             status_code=http_response.status_code)
-
-        return Response(rtn, status=status.HTTP_200_OK), resumption_token
+        start = time.time()
+        http_response = send_get_request(url, params=params, stream=True)
+        try:
+            request_seconds = time.time() - start
+            resumption_token = None
+            if http_response.status_code == status.HTTP_200_OK:
+                # Single pass on the response body: records and resumption token
+                reader = stream_operations.ListRecordsReader(http_response, metadata_prefix)
+                # The resumption token ends the page: its records are kept until the token is read,
+                # and consumed by the caller.
+                records = list(reader)
+                if reader.error_code == BAD_RESUMPTION_TOKEN:
+                    raise oai_pmh_exceptions.OAIAPILabelledException(message='The resumption token is invalid or '
+                                                                             'has expired.',
+                                                                     status_code=status.HTTP_410_GONE)
+                resumption_token = reader.resumption_token
+            elif http_response.status_code == status.HTTP_404_NOT_FOUND:
+                raise oai_pmh_exceptions.OAIAPILabelledException(message='Impossible to get data from the server. '
+                                                                         'Server not found',
+                                                                 status_code=status.HTTP_404_NOT_FOUND)
+            else:
+                if http_response.status_code in (status.HTTP_429_TOO_MANY_REQUESTS,
+                                                 status.HTTP_503_SERVICE_UNAVAILABLE):
+                    retry_after = http_response.headers.get('Retry-After')
+                raise oai_pmh_exceptions.OAIAPILabelledException(message='An error occurred while trying to get '
+                                                                         'data from the server.',
+                                                                 status_code=http_response.status_code)
+
+            page = ListRecordsPage(reader.resumption_token_attributes,
+                                   fetch_seconds=request_seconds + reader.fetch_seconds,
+                                   parse_seconds=reader.parse_seconds, content_bytes=reader.bytes_read,
+                                   record_count=len(records))
+            return Response(records, status=status.HTTP_200_OK), resumption_token, page
+        finally:
+            # Release the connection of the streamed response, also after an error
+            http_response.close()
     except oai_pmh_exceptions.OAIAPIException as e:
-        return e.response(), resumption_token
+        response = e.response()
+        if retry_after is not None:
+            response['Retry-After'] = retry_after
+        return response, resumption_token, ListRecordsPage()
+    except (requests.ConnectionError, requests.Timeout) as e:
+        content = OaiPmhMessage.get_message_labelled('The server is unavailable during the list_records process: %s'
+                                                     % e.message)
+        return Response(content, status=status.HTTP_503_SERVICE_UNAVAILABLE), resumption_token, ListRecordsPage()
     except Exception as e:
         content = OaiPmhMessage.get_message_labelled('An error occurred during the list_records process: %s'
                                                      % e.message)
-        return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR), resumption_token
+        return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR), resumption_token, \
+            ListRecordsPage()
 
 
 def get_data(url):
@@ -216,3 +270,35 @@ def get_data(url):
         content = 'An error occurred when attempting to retrieve data: %s' % e.message
         raise oai_pmh_exceptions.OAIAPILabelledException(message=content,
                                                          status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _get_int(value):
+    """ Get an integer attribute of a resumption token.
+
+    Args:
+        value: Attribute value.
+
+    Returns:
+        Integer, None if the attribute is missing or invalid.
+
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_datetime(value):
+    """ Get a date attribute of a resumption token.
+
+    Args:
+        value: Attribute value (ISO 8601).
+
+    Returns:
+        Datetime, None if the attribute is missing or invalid.
+
+    """
+    try:
+        return UTCdatetime.utc_datetime_iso8601_to_datetime(value) if value else None
+    except Exception:
+        return None
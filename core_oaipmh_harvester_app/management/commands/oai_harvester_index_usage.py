@@ -0,0 +1,30 @@
+""" Report the usage of the indexes of the harvester collections
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core_oaipmh_harvester_app.utils import index_operations
+
+
+class Command(BaseCommand):
+    """ Report the usage of the indexes of the harvester collections
+    """
+    help = 'Report the usage of the indexes of the harvester collections ($indexStats).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--build', action='store_true', dest='build', default=False,
+                            help='Build the declared indexes before reporting.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['build']:
+                index_operations.init_indexes()
+            for document in index_operations.INDEXED_DOCUMENTS:
+                self.stdout.write('{0} ({1})'.format(document.__name__, document._get_collection_name()))
+                for index in index_operations.get_index_usage(document):
+                    line = '    {0}: {1} ops since {2}'.format(index['name'], index['ops'], index['since'])
+                    if index['ops'] == 0:
+                        self.stdout.write(self.style.WARNING(line + ' (unused)'))
+                    else:
+                        self.stdout.write(line)
+        except Exception as e:
+            raise CommandError('Impossible to report the index usage: {0}'.format(e.message))
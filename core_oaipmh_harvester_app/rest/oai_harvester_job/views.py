@@ -0,0 +1,52 @@
+""" OaiHarvesterJob rest api
+"""
+from django.utils.decorators import method_decorator
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core_main_app.commons import exceptions
+from core_main_app.utils.decorators import api_staff_member_required
+from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_harvester_app.components.oai_harvester_job import api as oai_harvester_job_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import HARVEST
+from core_oaipmh_harvester_app.rest import serializers
+from core_oaipmh_harvester_app.utils import event_operations
+
+
+class JobDetail(APIView):
+    @method_decorator(api_staff_member_required())
+    def get(self, request, job_id):
+        """ Get the status of a harvest or update job, queued by the harvest and info endpoints of a
+        registry (Data provider)
+
+        Args:
+
+            request: HTTP request
+            job_id: ObjectId
+
+        Returns:
+
+            - code: 200
+              content: Job (status: pending, running, success or failure, errors), with the
+              progress of each harvest chain (pages, records, ETA) for a harvest
+            - code: 404
+              content: Object was not found
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            job = oai_harvester_job_api.get_by_id(job_id)
+            content = serializers.OaiHarvesterJobSerializer(job).data
+            content['progress'] = []
+            if job.job_type == HARVEST and job.start_date is not None:
+                content['progress'] = event_operations.get_harvest_progress(job.registry,
+                                                                            job.start_date)
+
+            return Response(content, status=status.HTTP_200_OK)
+        except exceptions.DoesNotExist as e:
+            content = OaiPmhMessage.get_message_labelled(e.message)
+            return Response(content, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            content = OaiPmhMessage.get_message_labelled(e.message)
+            return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,40 @@
+""" OaiHarvesterMetrics rest api
+"""
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core_main_app.utils.decorators import api_staff_member_required
+from core_oaipmh_common_app.commons.messages import OaiPmhMessage
+from core_oaipmh_harvester_app.components.oai_harvester_metrics import api as oai_harvester_metrics_api
+from core_oaipmh_harvester_app.utils import metrics_operations
+
+
+class HarvestMetrics(APIView):
+    @method_decorator(api_staff_member_required())
+    def get(self, request):
+        """ Get the harvest metrics of all harvest chains (registry, metadata format and set), in the
+        Prometheus text format
+
+        Args:
+
+            request: HTTP request
+
+        Returns:
+
+            - code: 200
+              content: Pages, records, bytes and time harvested, time spent in each stage
+              (fetch, parse, transform, convert, mongo)
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            content = metrics_operations.get_prometheus_text(oai_harvester_metrics_api.get_all())
+
+            return HttpResponse(content, content_type=metrics_operations.PROMETHEUS_CONTENT_TYPE,
+                                status=status.HTTP_200_OK)
+        except Exception as e:
+            content = OaiPmhMessage.get_message_labelled(e.message)
+            return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
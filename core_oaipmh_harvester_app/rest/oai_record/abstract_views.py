@@ -3,15 +3,13 @@
 import json
 from abc import ABCMeta, abstractmethod
 
-from bson.objectid import ObjectId
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 import core_oaipmh_harvester_app.components.oai_record.api as oai_record_api
-from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as \
-    oai_harvester_metadata_format_api
-from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.utils import query_cache_operations
 from core_oaipmh_harvester_app.utils.query.mongo.query_builder import OaiPmhQueryBuilder
 
 
@@ -76,6 +74,8 @@ class AbstractExecuteQueryView(APIView):
             registries = self.get_registries()
 
             if query is not None:
+                # check the pagination and output parameters
+                self.check_parameters()
                 # prepare query
                 raw_query = self.build_query(query, templates, registries)
                 # execute query
@@ -85,10 +85,22 @@ class AbstractExecuteQueryView(APIView):
             else:
                 content = {'message': 'Query should be passed in parameter.'}
                 return Response(content, status=status.HTTP_400_BAD_REQUEST)
+        except exceptions.PaginationError as pagination_exception:
+            content = {'message': pagination_exception.message}
+            return Response(content, status=status.HTTP_400_BAD_REQUEST)
         except Exception as api_exception:
             content = {'message': api_exception.message}
             return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def check_parameters(self):
+        """ Check the pagination and output parameters of the request. Nothing to check by default.
+
+        Raises:
+
+            PaginationError: Invalid parameter
+        """
+        pass
+
     def build_query(self, query, templates, registries):
         """ Build the raw query.
 
@@ -107,23 +119,19 @@ class AbstractExecuteQueryView(APIView):
         templates = json.loads(templates)
         registries = json.loads(registries)
         # if registries, check if activated
-        list_activated_registry = oai_registry_api.get_all_activated_registry().values_list('id')
+        activated_registry_ids = query_cache_operations.get_activated_registry_ids()
         if len(registries) > 0:
-            activated_registries = [str(id_) for id_ in registries if ObjectId(id_) in
-                                    list_activated_registry]
+            activated_registries = [str(id_) for id_ in registries
+                                    if str(id_) in activated_registry_ids]
         else:
-            activated_registries = list_activated_registry
+            activated_registries = sorted(activated_registry_ids)
 
         if len(templates) > 0:
             # get list of template ids
             list_template_ids = [template['id'] for template in templates]
-            # get all metadata formats used by the registries
-            list_metadata_format = oai_harvester_metadata_format_api. \
-                get_all_by_list_registry_ids(activated_registries)
-            # Filter metadata formats that use the given templates
-            list_metadata_formats_id = [str(x.id) for x in list_metadata_format
-                                        if x.template is not None
-                                        and str(x.template.id) in list_template_ids]
+            # get the metadata formats of the registries that use the given templates
+            list_metadata_formats_id = query_cache_operations.\
+                get_metadata_format_ids(list_template_ids, activated_registries)
             query_builder.add_list_metadata_formats_criteria(list_metadata_formats_id)
         else:
             # Only activated registries
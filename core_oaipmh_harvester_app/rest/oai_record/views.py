@@ -1,13 +1,30 @@
 """ REST views for the data API
 """
+import base64
 import json
 
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from django.http import StreamingHttpResponse
+from mongoengine.queryset.visitor import Q
 from rest_framework.response import Response
 
+import core_oaipmh_harvester_app.components.oai_record.api as oai_record_api
+from core_main_app.commons import exceptions
 from core_main_app.utils.databases.pymongo_database import get_full_text_query
 from core_main_app.utils.pagination.django_paginator.results_paginator import ResultsPaginator
 from core_oaipmh_harvester_app.rest.oai_record.abstract_views import AbstractExecuteQueryView
 from core_oaipmh_harvester_app.rest.serializers import OaiRecordSerializer
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_EXPORT_BATCH_SIZE, \
+    OAI_HARVESTER_QUERY_PAGE_SIZE, OAI_HARVESTER_QUERY_MAX_PAGE_SIZE
+
+PAGE_TOKEN = 'page_token'
+NEXT_PAGE_TOKEN_HEADER = 'X-Next-Page-Token'
+
+EXPORT_JSON = 'json'
+EXPORT_XML = 'xml'
+EXPORT_CONTENT_TYPES = {EXPORT_JSON: 'application/x-ndjson', EXPORT_XML: 'application/xml'}
+NEXT_AFTER_HEADER = 'X-Next-After'
 
 
 class ExecuteQueryView(AbstractExecuteQueryView):
@@ -20,6 +37,41 @@ class ExecuteQueryView(AbstractExecuteQueryView):
         """
         return self.request.data.get('registries', json.dumps(list()))
 
+    def check_parameters(self):
+        """ Check the fields to return, the page size and the page token. The results are
+        paginated with the page token (keyset pagination) if the page_token parameter is given,
+        empty for the first page, with the page number otherwise.
+
+        Raises:
+            PaginationError: Invalid fields, page size or page token.
+
+        """
+        self.fields = _get_fields(self.request.query_params)
+        self.page_size = _get_positive_int(self.request.query_params, 'page_size',
+                                           OAI_HARVESTER_QUERY_PAGE_SIZE)
+        if self.page_size > OAI_HARVESTER_QUERY_MAX_PAGE_SIZE:
+            raise exceptions.PaginationError("page_size should not be greater than {0}."
+                                             .format(OAI_HARVESTER_QUERY_MAX_PAGE_SIZE))
+        page_token = self.request.query_params.get(PAGE_TOKEN, None)
+        self.page_token = _decode_page_token(page_token) if page_token else None
+
+    def execute_raw_query(self, raw_query):
+        """ Execute the raw query in database. Only the serialized fields are loaded, and the
+        references (registry, sets, metadata format) are not dereferenced: only their ids are
+        returned.
+
+        Args:
+            raw_query: Query to execute.
+
+        Returns:
+            Results of the query.
+
+        """
+        data_list = super(ExecuteQueryView, self).execute_raw_query(raw_query)
+        # The title is the sort key of the pages
+        return data_list.only('title', *OaiRecordSerializer.get_projection(self.fields))\
+            .no_dereference()
+
     def build_response(self, data_list):
         """ Build the paginated response.
 
@@ -30,13 +82,45 @@ class ExecuteQueryView(AbstractExecuteQueryView):
             The response.
 
         """
+        if PAGE_TOKEN in self.request.query_params:
+            return self.build_keyset_response(data_list)
+
         # Paginator
         page = self.request.query_params.get('page', 1)
-        results_paginator = ResultsPaginator.get_results(data_list, page, 10)
-        data_serializer = OaiRecordSerializer(results_paginator, many=True)
+        results_paginator = ResultsPaginator.get_results(data_list, page, self.page_size)
+        data_serializer = OaiRecordSerializer(results_paginator, many=True, fields=self.fields)
 
         return Response(data_serializer.data)
 
+    def build_keyset_response(self, data_list):
+        """ Build the response paginated with the page token: the page starts after the (title, id)
+        of the last record of the previous page, without counting or skipping the previous results.
+        The token of the next page is returned in the X-Next-Page-Token header, if there are more
+        results.
+
+        Args:
+            data_list: List of data.
+
+        Returns:
+            The response.
+
+        """
+        data_list = data_list.order_by('title', 'id')
+        if self.page_token is not None:
+            title, id_ = self.page_token
+            data_list = data_list.filter(Q(title__gt=title) | Q(title=title, id__gt=id_))
+        # One more record tells if there is a next page
+        records = list(data_list.limit(self.page_size + 1))
+        data_serializer = OaiRecordSerializer(records[:self.page_size], many=True,
+                                              fields=self.fields)
+
+        response = Response(data_serializer.data)
+        if len(records) > self.page_size:
+            last_record = records[self.page_size - 1]
+            response[NEXT_PAGE_TOKEN_HEADER] = _encode_page_token(last_record.title,
+                                                                  last_record.id)
+        return response
+
 
 class ExecuteKeywordQueryView(ExecuteQueryView):
     def build_query(self, query, templates, options):
@@ -53,3 +137,196 @@ class ExecuteKeywordQueryView(ExecuteQueryView):
         # build query builder
         query = json.dumps(get_full_text_query(query))
         return super(ExecuteKeywordQueryView, self).build_query(str(query), templates, options)
+
+
+class ExportQueryView(ExecuteQueryView):
+    """ Stream all the results of a query, ordered by id, as JSON lines (one record per line) or
+    concatenated XML documents. Results can be fetched in pages with the after (id of the last
+    record received) and limit query parameters.
+    """
+    def check_parameters(self):
+        """ Check the export format, the fields to return, the id to start after and the maximum
+        number of records.
+
+        Raises:
+            PaginationError: Invalid parameter.
+
+        """
+        self.fields = _get_fields(self.request.query_params)
+        self.export_format = self.request.query_params.get('export_format', EXPORT_JSON)
+        if self.export_format not in EXPORT_CONTENT_TYPES:
+            raise exceptions.PaginationError("export_format should be one of: {0}."
+                                             .format(", ".join(sorted(EXPORT_CONTENT_TYPES))))
+        after = self.request.query_params.get('after', None)
+        try:
+            self.after = ObjectId(after) if after is not None else None
+        except (InvalidId, TypeError):
+            raise exceptions.PaginationError("after should be a record id.")
+        self.limit = _get_positive_int(self.request.query_params, 'limit', None)
+
+    def execute_raw_query(self, raw_query):
+        """ Execute the raw query in database, ordered by id, after the given id.
+
+        Args:
+            raw_query: Query to execute.
+
+        Returns:
+            Results of the query.
+
+        """
+        data_list = oai_record_api.execute_query(raw_query).order_by('id')
+        if self.after is not None:
+            data_list = data_list.filter(id__gt=self.after)
+        if self.export_format == EXPORT_XML:
+            return data_list.only('xml_file')
+        return data_list.only(*OaiRecordSerializer.get_projection(self.fields)).no_dereference()
+
+    def build_response(self, data_list):
+        """ Build the streaming response. The records are read from the database cursor as they are
+        sent.
+
+        Args:
+            data_list: List of data.
+
+        Returns:
+            The response.
+
+        """
+        next_after = None
+        if self.limit is not None:
+            # The next page starts after the last record of this one, if there are more records
+            next_ids = list(data_list.clone().skip(self.limit - 1).limit(2).scalar('id'))
+            if len(next_ids) == 2:
+                next_after = next_ids[0]
+            data_list = data_list.limit(self.limit)
+
+        records = data_list.no_cache().batch_size(OAI_HARVESTER_EXPORT_BATCH_SIZE)
+        if self.export_format == EXPORT_XML:
+            content = _iter_xml(records)
+        else:
+            content = _iter_json_lines(records, self.fields)
+        response = StreamingHttpResponse(content,
+                                         content_type=EXPORT_CONTENT_TYPES[self.export_format])
+        if next_after is not None:
+            response[NEXT_AFTER_HEADER] = str(next_after)
+
+        return response
+
+
+def _get_positive_int(query_params, name, default):
+    """ Get a positive integer query parameter.
+
+    Args:
+        query_params: Query parameters.
+        name: Name of the parameter.
+        default: Value if the parameter is not given.
+
+    Returns:
+        Value of the parameter.
+
+    Raises:
+        PaginationError: Not a positive integer.
+
+    """
+    value = query_params.get(name, None)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise exceptions.PaginationError("{0} should be a positive integer.".format(name))
+    return value
+
+
+def _get_fields(query_params):
+    """ Get the fields to serialize from the comma separated fields query parameter.
+
+    Args:
+        query_params: Query parameters.
+
+    Returns:
+        List of fields, None for all fields.
+
+    Raises:
+        PaginationError: Unknown field.
+
+    """
+    fields = query_params.get('fields', None)
+    if fields is None:
+        return None
+    fields = [field_name.strip() for field_name in fields.split(',') if field_name.strip()]
+    unknown_fields = set(fields) - set(OaiRecordSerializer.Meta.fields)
+    if len(unknown_fields) > 0:
+        raise exceptions.PaginationError("Unknown fields: {0}. fields should be among: {1}."
+                                         .format(", ".join(sorted(unknown_fields)),
+                                                 ", ".join(OaiRecordSerializer.Meta.fields)))
+    return fields
+
+
+def _encode_page_token(title, id_):
+    """ Encode the sort key of the last record of a page into an opaque page token.
+
+    Args:
+        title: Title of the record.
+        id_: Id of the record.
+
+    Returns:
+        Page token.
+
+    """
+    return base64.urlsafe_b64encode(json.dumps([title, str(id_)]))
+
+
+def _decode_page_token(page_token):
+    """ Decode a page token into the sort key of the last record of the previous page.
+
+    Args:
+        page_token: Page token.
+
+    Returns:
+        Title, id.
+
+    Raises:
+        PaginationError: Invalid page token.
+
+    """
+    try:
+        title, id_ = json.loads(base64.urlsafe_b64decode(str(page_token)))
+        return title, ObjectId(id_)
+    except (TypeError, ValueError, InvalidId):
+        raise exceptions.PaginationError("Invalid page token.")
+
+
+def _iter_json_lines(records, fields=None):
+    """ Serialize the records, one JSON document per line.
+
+    Args:
+        records: Records.
+        fields: Fields to serialize. All fields if None.
+
+    Returns:
+        Lines generator.
+
+    """
+    for record in records:
+        data = dict(OaiRecordSerializer(record, fields=fields).data)
+        data['id'] = str(record.id)
+        yield json.dumps(data) + '\n'
+
+
+def _iter_xml(records):
+    """ Return the XML content of the records, one document after the other.
+
+    Args:
+        records: Records.
+
+    Returns:
+        XML documents generator.
+
+    """
+    for record in records:
+        xml_content = record.xml_content
+        if xml_content is not None:
+            yield xml_content + '\n'
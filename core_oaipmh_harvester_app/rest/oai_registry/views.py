@@ -13,9 +13,11 @@ from core_oaipmh_common_app.commons.messages import OaiPmhMessage
 from core_oaipmh_harvester_app.commons import rights
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as \
     oai_metadata_format_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import HARVEST, UPDATE
 from core_oaipmh_harvester_app.components.oai_harvester_set import api as oai_set_api
 from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
 from core_oaipmh_harvester_app.rest import serializers
+from core_oaipmh_harvester_app.tasks import queue_registry_job
 
 
 class RegistryList(APIView):
@@ -162,7 +164,9 @@ class RegistryDetail(APIView):
 
             {
                 "harvest_rate" : "value", 
-                "harvest" : "True or False"
+                "harvest" : "True or False",
+                "harvest_queue_depth" : "number (optional)",
+                "harvest_concurrency" : "number (optional)"
             }
 
         Args:
@@ -284,7 +288,8 @@ class DeactivateRegistry(APIView):
 class InfoRegistry(APIView):
     @method_decorator(api_staff_member_required())
     def patch(self, request, registry_id):
-        """ Update oai-pmh information for a given registry (Data provider)
+        """ Update oai-pmh information for a given registry (Data provider). The update runs in
+        the background: follow it with the returned job.
 
         Args:
 
@@ -293,8 +298,8 @@ class InfoRegistry(APIView):
 
         Returns:
 
-            - code: 200
-              content: Success message
+            - code: 202
+              content: Update job
             - code: 404
               content: Object was not found
             - code: 500
@@ -302,17 +307,13 @@ class InfoRegistry(APIView):
         """
         try:
             registry = oai_registry_api.get_by_id(registry_id)
-            registry = oai_registry_api.update_registry_info(registry)
-            content = OaiPmhMessage.\
-                get_message_labelled('Registry {0} information updated with success.'.
-                                                         format(registry.name))
+            job = queue_registry_job(registry, UPDATE)
+            serializer = serializers.OaiHarvesterJobSerializer(job)
 
-            return Response(content, status=status.HTTP_200_OK)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         except exceptions.DoesNotExist as e:
             content = OaiPmhMessage.get_message_labelled(e.message)
             return Response(content, status=status.HTTP_404_NOT_FOUND)
-        except exceptions_oai.OAIAPIException as e:
-            return e.response()
         except Exception as e:
             content = OaiPmhMessage.get_message_labelled(e.message)
             return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -321,7 +322,8 @@ class InfoRegistry(APIView):
 class Harvest(APIView):
     @method_decorator(api_staff_member_required())
     def patch(self, request, registry_id):
-        """ Harvest a given registry (Data provider)
+        """ Harvest a given registry (Data provider). The harvest runs in the background: follow
+        it with the returned job.
 
         Args:
 
@@ -330,8 +332,8 @@ class Harvest(APIView):
 
         Returns:
 
-            - code: 200
-              content: Success message
+            - code: 202
+              content: Harvest job
             - code: 404
               content: Object was not found
             - code: 500
@@ -339,20 +341,13 @@ class Harvest(APIView):
         """
         try:
             registry = oai_registry_api.get_by_id(registry_id)
-            all_errors = oai_registry_api.harvest_registry(registry)
-            if len(all_errors) > 0:
-                raise exceptions_oai.\
-                    OAIAPISerializeLabelledException(errors=all_errors,
-                                                     status_code=status.HTTP_400_BAD_REQUEST)
-            else:
-                content = OaiPmhMessage.get_message_labelled('Registry {0} harvested with success.'.
-                                                             format(registry.name))
-                return Response(content, status=status.HTTP_200_OK)
+            job = queue_registry_job(registry, HARVEST)
+            serializer = serializers.OaiHarvesterJobSerializer(job)
+
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         except exceptions.DoesNotExist as e:
             content = OaiPmhMessage.get_message_labelled(e.message)
             return Response(content, status=status.HTTP_404_NOT_FOUND)
-        except exceptions_oai.OAIAPIException as e:
-            return e.response()
         except Exception as e:
             content = OaiPmhMessage.get_message_labelled(e.message)
             return Response(content, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,6 +1,7 @@
 """
     Serializers used throughout the Rest API
 """
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob
 from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from rest_framework.serializers import CharField, IntegerField, BooleanField, ListField
 from rest_framework_mongoengine.serializers import DocumentSerializer
@@ -9,6 +10,8 @@ from core_main_app.commons.serializers import BasicSerializer
 from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 
+OAI_RECORD_PROJECTION = {'xml_content': 'xml_file'}
+
 
 class RegistrySerializer(DocumentSerializer):
     class Meta:
@@ -16,7 +19,8 @@ class RegistrySerializer(DocumentSerializer):
         fields = "__all__"
 
         read_only_fields = ('id', 'name', 'description', 'last_update', 'is_harvesting',
-                            'is_updating', 'is_activated', 'is_queued')
+                            'is_updating', 'is_activated', 'is_queued', 'harvest_queue_depth',
+                            'harvest_concurrency', 'info_fingerprint', 'last_info_update')
 
     def create(self, validated_data):
         return oai_registry_api.add_registry_by_url(**validated_data)
@@ -26,10 +30,16 @@ class UpdateRegistrySerializer(BasicSerializer):
     def update(self, instance, validated_data):
         instance.harvest_rate = validated_data.get('harvest_rate', instance.harvest_rate)
         instance.harvest = validated_data.get('harvest', instance.harvest)
+        instance.harvest_queue_depth = validated_data.get('harvest_queue_depth',
+                                                          instance.harvest_queue_depth)
+        instance.harvest_concurrency = validated_data.get('harvest_concurrency',
+                                                          instance.harvest_concurrency)
         return oai_registry_api.upsert(instance)
 
     harvest_rate = IntegerField(required=True)
     harvest = BooleanField(required=True)
+    harvest_queue_depth = IntegerField(required=False, min_value=0)
+    harvest_concurrency = IntegerField(required=False, min_value=1)
 
 
 class HarvestSerializer(BasicSerializer):
@@ -37,11 +47,40 @@ class HarvestSerializer(BasicSerializer):
     sets = ListField(child=CharField(), required=False)
 
 
+class OaiHarvesterJobSerializer(DocumentSerializer):
+    class Meta:
+        model = OaiHarvesterJob
+        fields = "__all__"
+
+
 class OaiRecordSerializer(DocumentSerializer):
-    """ OaiRecord serializer
+    """ OaiRecord serializer. The serialized fields can be restricted with the fields argument.
     """
     xml_content = CharField()
 
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super(OaiRecordSerializer, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @staticmethod
+    def get_projection(fields=None):
+        """ Return the OaiRecord fields to load from the database to serialize the given fields.
+
+        Args:
+            fields: List of serialized fields. All fields if None.
+
+        Returns:
+            List of OaiRecord fields.
+
+        """
+        if fields is None:
+            fields = OaiRecordSerializer.Meta.fields
+        # The xml content is read from the xml file
+        return [OAI_RECORD_PROJECTION.get(field_name, field_name) for field_name in fields]
+
     class Meta:
         """ Meta
         """
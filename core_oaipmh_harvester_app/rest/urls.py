@@ -1,6 +1,8 @@
 """Url router for the REST API
 """
 from django.conf.urls import url
+from core_oaipmh_harvester_app.rest.oai_harvester_job import views as oai_harvester_job_views
+from core_oaipmh_harvester_app.rest.oai_harvester_metrics import views as oai_harvester_metrics_views
 from core_oaipmh_harvester_app.rest.oai_registry import views as oai_registry_views
 from core_oaipmh_harvester_app.rest.oai_record import views as oai_record_views
 
@@ -21,6 +23,12 @@ urlpatterns = [
         name='core_oaipmh_harvester_app_rest_registry_list'),
     url(r'^registry/local/query/keyword/$', oai_record_views.ExecuteKeywordQueryView.as_view(),
         name='core_oaipmh_harvester_app_rest_local_query_keyword'),
+    url(r'^registry/local/query/export/$', oai_record_views.ExportQueryView.as_view(),
+        name='core_oaipmh_harvester_app_rest_local_query_export'),
     url(r'^registry/local/query/$', oai_record_views.ExecuteQueryView.as_view(),
         name='core_oaipmh_harvester_app_rest_local_query'),
+    url(r'^job/(?P<job_id>\w+)/$', oai_harvester_job_views.JobDetail.as_view(),
+        name='core_oaipmh_harvester_app_rest_job_detail'),
+    url(r'^metrics/$', oai_harvester_metrics_views.HarvestMetrics.as_view(),
+        name='core_oaipmh_harvester_app_rest_metrics'),
 ]
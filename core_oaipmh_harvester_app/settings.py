@@ -23,3 +23,121 @@ WATCH_REGISTRY_HARVEST_RATE = 60
 """ :py:calss:`int`: Harvesting rate in seconds.
 """
 
+OAI_HARVESTER_HTTP_POOL_MAXSIZE = getattr(settings, 'OAI_HARVESTER_HTTP_POOL_MAXSIZE', 10)
+""" :py:class:`int`: Maximum number of keep-alive connections kept open to each Data Provider host.
+"""
+
+OAI_HARVESTER_BULK_UPSERT = getattr(settings, 'OAI_HARVESTER_BULK_UPSERT', False)
+""" :py:class:`bool`: Write each harvested ListRecords page with a single bulk write of upserts.
+"""
+
+OAI_HARVESTER_FAN_OUT = getattr(settings, 'OAI_HARVESTER_FAN_OUT', False)
+""" :py:class:`bool`: Harvest each (metadata format, set) chain of a registry in its own Celery
+sub-task (chord). Requires a Celery result backend.
+"""
+
+OAI_HARVESTER_ENGINE_WORKERS = getattr(settings, 'OAI_HARVESTER_ENGINE_WORKERS', 0)
+""" :py:class:`int`: Number of registries harvested at the same time by a single
+harvest_registries_task. 0 to queue a separate harvest_task for each registry.
+"""
+
+OAI_HARVESTER_ENGINE_MAX_PER_HOST = getattr(settings, 'OAI_HARVESTER_ENGINE_MAX_PER_HOST', 2)
+""" :py:class:`int`: Maximum number of registries of the same host harvested at the same time by
+harvest_registries_task.
+"""
+
+OAI_HARVESTER_CONVERSION_PROCESSES = getattr(settings, 'OAI_HARVESTER_CONVERSION_PROCESSES', 0)
+""" :py:class:`int`: Number of worker processes converting the xml content of harvested records
+into dictionaries. 0 to convert the records in the harvest thread.
+"""
+
+OAI_HARVESTER_SET_REFERENCES = getattr(settings, 'OAI_HARVESTER_SET_REFERENCES', False)
+""" :py:class:`bool`: Link harvested records to their sets with references (ObjectId) loaded with
+the set spec only, instead of the full OaiHarvesterSet documents.
+"""
+
+OAI_HARVESTER_MAX_REQUESTS_PER_SECOND = getattr(settings, 'OAI_HARVESTER_MAX_REQUESTS_PER_SECOND', 10)
+""" :py:class:`float`: Maximum number of ListRecords requests per second sent to a Data Provider
+host. The rate adapts to the response times and errors of the host. 0 for no limit.
+"""
+
+OAI_HARVESTER_PAGE_RETRIES = getattr(settings, 'OAI_HARVESTER_PAGE_RETRIES', 3)
+""" :py:class:`int`: Number of retries of a ListRecords page, from the same resumption token,
+when the Data Provider is unavailable (429, 502, 503, 504).
+"""
+
+OAI_HARVESTER_METRICS = getattr(settings, 'OAI_HARVESTER_METRICS', True)
+""" :py:class:`bool`: Save the harvest counters and stage timings of each harvest chain after each
+page. They are exposed in the Prometheus text format by the rest/metrics/ url.
+"""
+
+OAI_HARVESTER_EXPORT_BATCH_SIZE = getattr(settings, 'OAI_HARVESTER_EXPORT_BATCH_SIZE', 100)
+""" :py:class:`int`: Number of records fetched from the database cursor at a time by the local query
+export, which streams the records instead of loading them all.
+"""
+
+OAI_HARVESTER_QUERY_PAGE_SIZE = getattr(settings, 'OAI_HARVESTER_QUERY_PAGE_SIZE', 10)
+""" :py:class:`int`: Default number of records per page returned by the local query views.
+"""
+
+OAI_HARVESTER_QUERY_MAX_PAGE_SIZE = getattr(settings, 'OAI_HARVESTER_QUERY_MAX_PAGE_SIZE', 100)
+""" :py:class:`int`: Maximum number of records per page a client can ask to the local query views
+with the page_size parameter.
+"""
+
+OAI_HARVESTER_QUERY_CACHE_TIMEOUT = getattr(
+    settings, 'OAI_HARVESTER_QUERY_CACHE_TIMEOUT',
+    0 if getattr(settings, 'CACHES', {}).get('default', {}).get('BACKEND', '').endswith(
+        ('.LocMemCache', '.DummyCache')) else 300)
+""" :py:class:`int`: Number of seconds the activated registries and the metadata formats of each
+template, used to build the local queries, are kept in the Django cache. The cache is cleared when
+a registry or a metadata format is saved or deleted, in the process that saves it only if the cache
+backend is not shared by all the processes (web server and Celery workers). 0 to disable the cache,
+the default when the default cache backend is local to each process (LocMemCache).
+"""
+
+OAI_HARVESTER_EVENTS = getattr(settings, 'OAI_HARVESTER_EVENTS', True)
+""" :py:class:`bool`: Publish the status changes of the registries and the progress of each harvest
+chain after each page. They are pushed to the admin registries page (Server-Sent Events).
+"""
+
+OAI_HARVESTER_EVENTS_TTL = getattr(settings, 'OAI_HARVESTER_EVENTS_TTL', 3600)
+""" :py:class:`int`: Number of seconds the published events are kept in the database.
+"""
+
+OAI_HARVESTER_EVENTS_STREAM_TIMEOUT = getattr(settings, 'OAI_HARVESTER_EVENTS_STREAM_TIMEOUT', 300)
+""" :py:class:`int`: Number of seconds an event stream stays open. Each open stream holds a server
+thread: the browser reconnects after the timeout, from the last event received.
+"""
+
+OAI_HARVESTER_EVENTS_MAX_STREAMS = getattr(settings, 'OAI_HARVESTER_EVENTS_MAX_STREAMS', 4)
+""" :py:class:`int`: Maximum number of event streams open at the same time in all the server
+processes (counted in the database). Each open stream holds a server worker (thread or process)
+for up to OAI_HARVESTER_EVENTS_STREAM_TIMEOUT seconds, and reads the new events in the database
+every second. Over the limit, the stream is refused (503) and the page falls back on its periodic
+refresh. Keep it well below the number of workers of the server.
+"""
+
+OAI_HARVESTER_JOBS_TTL = getattr(settings, 'OAI_HARVESTER_JOBS_TTL', 604800)
+""" :py:class:`int`: Number of seconds the harvest and update jobs, queued by the REST API and the
+admin views, are kept in the database with their status and errors.
+"""
+
+OAI_HARVESTER_DISCOVERY_CONCURRENCY = getattr(settings, 'OAI_HARVESTER_DISCOVERY_CONCURRENCY', 8)
+""" :py:class:`int`: Maximum number of requests sent at the same time when a registry is added or
+its information updated (Identify, ListSets, ListMetadataFormats, then the schema of each metadata
+format). 1 to send them one after another.
+"""
+
+OAI_HARVESTER_SCHEMA_CACHE_TIMEOUT = getattr(settings, 'OAI_HARVESTER_SCHEMA_CACHE_TIMEOUT', 86400)
+""" :py:class:`int`: Number of seconds the downloaded schemas of the metadata formats, and their
+hash, are kept in the Django cache. A schema used by many registries is downloaded once, then
+revalidated with a conditional request (ETag, Last-Modified) on each update. 0 to disable the cache.
+"""
+
+OAI_HARVESTER_INFO_REFRESH_RATE = getattr(settings, 'OAI_HARVESTER_INFO_REFRESH_RATE', 0)
+""" :py:class:`int`: Minimum number of seconds between two refreshes of the information of a registry
+(Identify, sets, metadata formats) before its scheduled harvests. The sets and metadata formats are
+only saved again if the answers of the Data Provider changed. 0 to refresh before each harvest. The
+updates asked from the admin page or the REST API always refresh everything.
+"""
@@ -16,7 +16,8 @@ harvestRegistry = function(event)
         	id : objectID,
         },
         success: function(data){
-            checkHarvestData();
+            // The job runs in the background: its status is pushed by the registry events,
+            // or refreshed periodically (refresh.js)
         },
         error:function(data){
 
@@ -34,25 +35,28 @@ checkHarvestData = function()
         data : {
         },
         success: function(data){
-            $.map(data, function (item) {
-                if(item.is_harvesting)
-                {
-                    $("#harvest" + item.registry_id).hide(200);
-                    $("#bannerHarvest"+ item.registry_id).show(200);
-                }
-                else
-                {
-                    $("#bannerHarvest"+ item.registry_id).hide(200);
-                    $("#harvest" + item.registry_id).show(200);
-                    $("#name"+ item.registry_id).html(item.name);
-                }
-             });
+            $.map(data, showHarvestStatus);
         },
         error:function(data){
 	    }
     });
 }
 
+showHarvestStatus = function(item)
+{
+    if(item.is_harvesting)
+    {
+        $("#harvest" + item.registry_id).hide(200);
+        $("#bannerHarvest"+ item.registry_id).show(200);
+    }
+    else
+    {
+        $("#bannerHarvest"+ item.registry_id).hide(200);
+        $("#harvest" + item.registry_id).show(200);
+        $("#name"+ item.registry_id).html(item.name);
+    }
+}
+
 harvestAllRegistries = function(event)
 {
     $('.harvest-registry-btn').click();
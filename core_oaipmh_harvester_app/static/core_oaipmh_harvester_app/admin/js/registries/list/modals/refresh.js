@@ -8,7 +8,17 @@ checkInfo = function() {
     });
 }
 
+isRegistryEventsOpen = function() {
+    return typeof registryEventsOpen !== "undefined" && registryEventsOpen;
+}
+
 refreshInfo = function(remaining) {
+    if(remaining === 0 && isRegistryEventsOpen())
+    {
+        // The status is pushed by the registry events (registry_events.js)
+        refreshInfo(refreshTime);
+        return;
+    }
     if(remaining === 0)
     {
         $('#RefreshInfo').hide();
@@ -21,6 +31,6 @@ refreshInfo = function(remaining) {
 }
 
 $(document).ready(function() {
-    //Refresh every refreshTime seconds
+    //Refresh every refreshTime seconds, while no registry events stream is open
     refreshInfo(refreshTime);
 });
\ No newline at end of file
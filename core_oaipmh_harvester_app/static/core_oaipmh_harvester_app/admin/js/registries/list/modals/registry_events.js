@@ -0,0 +1,72 @@
+/**
+ * Listen to the status of the registries and the progress of their harvests (Server-Sent Events)
+ */
+var harvestProgress = {};
+var registryEventsOpen = false;
+
+showHarvestProgress = function(data)
+{
+    if(!(data.registry_id in harvestProgress))
+    {
+        harvestProgress[data.registry_id] = {};
+    }
+    harvestProgress[data.registry_id][data.chain] = data;
+
+    var pages = 0;
+    var records = 0;
+    var eta = null;
+    $.each(harvestProgress[data.registry_id], function(chain, progress) {
+        pages += progress.pages;
+        records += progress.records;
+        if(progress.eta !== null && (eta === null || progress.eta > eta))
+        {
+            eta = progress.eta;
+        }
+    });
+
+    var info = pages + " page(s), " + records + " record(s)";
+    if(eta !== null)
+    {
+        info += ", about " + Math.ceil(eta / 60) + " min. remaining";
+    }
+    $("#progressHarvest" + data.registry_id).html(info);
+}
+
+listenRegistryEvents = function()
+{
+    var source = new EventSource(registryEventsGetUrl);
+
+    source.onopen = function() {
+        registryEventsOpen = true;
+        $("#RefreshInfo").hide();
+    };
+
+    // The browser reconnects by itself: poll the status meanwhile (refresh.js)
+    source.onerror = function() {
+        registryEventsOpen = false;
+        $("#RefreshInfo").show();
+    };
+
+    source.addEventListener("registry", function(event) {
+        var item = JSON.parse(event.data);
+        if(!item.is_harvesting)
+        {
+            delete harvestProgress[item.registry_id];
+            $("#progressHarvest" + item.registry_id).html("");
+        }
+        showUpdateStatus(item);
+        showHarvestStatus(item);
+    });
+
+    source.addEventListener("progress", function(event) {
+        showHarvestProgress(JSON.parse(event.data));
+    });
+}
+
+$(document).ready(function() {
+    // Fall back on the periodic refresh (refresh.js) without Server-Sent Events
+    if(window.EventSource)
+    {
+        listenRegistryEvents();
+    }
+});
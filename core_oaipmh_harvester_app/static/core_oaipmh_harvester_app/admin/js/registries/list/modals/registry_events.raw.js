@@ -0,0 +1 @@
+var registryEventsGetUrl = "{% url 'admin:core_oaipmh_harvester_app_registry_events' %}";
\ No newline at end of file
@@ -19,7 +19,8 @@ updateRegistry = function(event)
         	id : objectID,
         },
         success: function(data){
-            checkUpdateData();
+            // The job runs in the background: its status is pushed by the registry events,
+            // or refreshed periodically (refresh.js)
         },
         error:function(data){
 
@@ -37,26 +38,29 @@ checkUpdateData = function()
         data : {
         },
         success: function(data){
-            $.map(data, function (item) {
-                if(item.is_updating)
-                {
-                    $("#update" + item.registry_id).hide(200);
-                    $("#bannerUpdate"+ item.registry_id).show(200);
-                }
-                else
-                {
-                    $("#bannerUpdate"+ item.registry_id).hide(200);
-                    $("#update" + item.registry_id).show(200);
-                    $("#name"+ item.registry_id).html(item.name);
-                    $("#lastUpdate"+ item.registry_id).html(item.last_update);
-                }
-             });
+            $.map(data, showUpdateStatus);
         },
         error:function(data){
 	    }
     });
 }
 
+showUpdateStatus = function(item)
+{
+    if(item.is_updating)
+    {
+        $("#update" + item.registry_id).hide(200);
+        $("#bannerUpdate"+ item.registry_id).show(200);
+    }
+    else
+    {
+        $("#bannerUpdate"+ item.registry_id).hide(200);
+        $("#update" + item.registry_id).show(200);
+        $("#name"+ item.registry_id).html(item.name);
+        $("#lastUpdate"+ item.registry_id).html(item.last_update);
+    }
+}
+
 updateAllRegistries = function(event)
 {
     $('.update-registry-btn').click();
@@ -1,17 +1,31 @@
 """ OAI-PMH Harvester tasks
 """
+import datetime
 import logging
 from itertools import chain
 
+from celery import chord
 from celery import current_app
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
+from rest_framework import status
 
 from core_main_app.commons.exceptions import DoesNotExist
+from core_oaipmh_harvester_app.components.oai_harvester_job import api as oai_harvester_job_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob, HARVEST, \
+    RUNNING, SUCCESS, FAILURE
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as \
+    oai_harvester_metadata_format_api
+from core_oaipmh_harvester_app.components.oai_harvester_set import api as oai_harvester_set_api
 from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
-from core_oaipmh_harvester_app.settings import WATCH_REGISTRY_HARVEST_RATE
+from core_oaipmh_harvester_app.settings import WATCH_REGISTRY_HARVEST_RATE, OAI_HARVESTER_FAN_OUT, \
+    OAI_HARVESTER_ENGINE_WORKERS, OAI_HARVESTER_ENGINE_MAX_PER_HOST
+from core_oaipmh_harvester_app.utils import conversion_operations
 
 logger = logging.getLogger(__name__)
 
+HARVEST_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
 
 def init_harvest():
     """ Init harvest process.
@@ -36,15 +50,18 @@ def watch_registry_harvest_task():
     try:
         logger.info('START watching registries.')
         registries = oai_registry_api.get_all_activated_registry()
-        # We launch the background task for each registry
-        for registry in registries:
-            # If we need to harvest and a task doesn't already exist for this registry.
-            if registry.harvest and not registry.is_queued:
-                harvest_task.apply_async((str(registry.id),))
-                registry.is_queued = True
-                oai_registry_api.upsert(registry)
-                logger.info('Registry {0} has been queued and will be harvested.'.
-                            format(registry.name.encode("utf-8")))
+        if OAI_HARVESTER_ENGINE_WORKERS > 0:
+            _queue_registries_harvest(registries)
+        else:
+            # We launch the background task for each registry
+            for registry in registries:
+                # If we need to harvest and a task doesn't already exist for this registry.
+                if registry.harvest and not registry.is_queued:
+                    harvest_task.apply_async((str(registry.id),))
+                    registry.is_queued = True
+                    oai_registry_api.upsert(registry)
+                    logger.info('Registry {0} has been queued and will be harvested.'.
+                                format(registry.name.encode("utf-8")))
         logger.info('FINISH watching registries.')
     except Exception as e:
         logger.error('ERROR : Error while watching new registries to harvest: {0}'.format(
@@ -54,6 +71,73 @@ def watch_registry_harvest_task():
         watch_registry_harvest_task.apply_async(countdown=WATCH_REGISTRY_HARVEST_RATE)
 
 
+def _queue_registries_harvest(registries):
+    """ Queue a single harvest_registries_task for all the registries due to be harvested.
+    Args:
+        registries: Activated registries.
+
+    """
+    registries_to_harvest = [registry for registry in registries
+                             if registry.harvest and not registry.is_queued and _is_due(registry)]
+    if len(registries_to_harvest) == 0:
+        return
+
+    for registry in registries_to_harvest:
+        registry.is_queued = True
+        oai_registry_api.upsert(registry)
+    harvest_registries_task.apply_async(([str(registry.id) for registry in registries_to_harvest],))
+    logger.info('{0} registries have been queued and will be harvested.'
+                .format(len(registries_to_harvest)))
+
+
+def _is_due(registry):
+    """ Check if the registry has to be harvested, based on its last harvest and harvest rate.
+    Args:
+        registry: Registry.
+
+    Returns:
+        True if the registry has to be harvested.
+
+    """
+    if registry.last_update is None:
+        return True
+    next_harvest = registry.last_update + datetime.timedelta(seconds=registry.harvest_rate or 0)
+    return next_harvest <= datetime.datetime.now()
+
+
+@shared_task(name='harvest_registries_task')
+def harvest_registries_task(registry_ids):
+    """ Harvest many registries at once in this worker process. The registries are queued again
+    by watch_registry_harvest_task once their harvest rate is elapsed.
+    Args:
+        registry_ids: List of registry ids.
+
+    """
+    registries = []
+    for registry_id in registry_ids:
+        try:
+            registries.append(oai_registry_api.get_by_id(registry_id))
+        except DoesNotExist:
+            logger.error('ERROR: Registry {0} does not exist anymore. '
+                         'Harvesting stopped.'.format(registry_id))
+    try:
+        logger.info('START harvesting {0} registries.'.format(len(registries)))
+        all_errors = oai_registry_api.harvest_registries(registries, OAI_HARVESTER_ENGINE_WORKERS,
+                                                         OAI_HARVESTER_ENGINE_MAX_PER_HOST)
+        for registry, errors in zip(registries, all_errors):
+            if len(errors) > 0:
+                logger.error('ERROR : Errors while harvesting the registry {0}: '
+                             '{1}.'.format(registry.name.encode("utf-8"), errors))
+        logger.info('FINISH harvesting {0} registries.'.format(len(registries)))
+    except Exception as e:
+        logger.error('ERROR : Impossible to harvest the registries: {0}.'.format(e.message))
+    finally:
+        # Let watch_registry_harvest_task queue the registries again.
+        for registry in registries:
+            registry.is_queued = False
+            oai_registry_api.upsert(registry)
+
+
 @shared_task(name='harvest_task')
 def harvest_task(registry_id):
     """ Manage the harvest process of the given registry. Check if the harvest should continue.
@@ -75,26 +159,191 @@ def harvest_task(registry_id):
 
 def _harvest_registry(registry):
     """ Harvest the given registry and schedule the next run based on the registry configuration.
-    1st: Update the registry information (Name, metadata formats, sets ..).
+    1st: Update the registry information (Name, metadata formats, sets ..), if changed.
     2nd: Harvest records.
 
     Args:
         registry: Registry to harvest.
 
     """
+    fanned_out = False
     try:
         logger.info('START harvesting registry: {0}'.format(registry.name.encode("utf-8")))
         if not registry.is_updating:
-            oai_registry_api.update_registry_info(registry)
+            oai_registry_api.refresh_registry_info(registry)
         if not registry.is_harvesting:
-            oai_registry_api.harvest_registry(registry)
-        logger.info('FINISH harvesting registry: {0}'.format(registry.name.encode("utf-8")))
+            if OAI_HARVESTER_FAN_OUT:
+                fanned_out = _fan_out_harvest_registry(registry)
+            else:
+                oai_registry_api.harvest_registry(registry)
+        if not fanned_out:
+            logger.info('FINISH harvesting registry: {0}'.format(registry.name.encode("utf-8")))
     except Exception as e:
         logger.error('ERROR : Impossible to harvest the registry {0}: '
                      '{1}.'.format(registry.name.encode("utf-8"), e.message))
+    finally:
+        # Harvest again in harvest_rate seconds. If the harvest has been fanned out, the chord
+        # callback schedules the next run.
+        if not fanned_out:
+            harvest_task.apply_async((str(registry.id),), countdown=registry.harvest_rate)
+
+
+def _fan_out_harvest_registry(registry):
+    """ Harvest each chain of the given registry in its own sub-task. The registry is ended by
+    the end_harvest_task callback once all the sub-tasks are done.
+
+    Args:
+        registry: Registry to harvest.
+
+    Returns:
+        True if sub-tasks have been launched, False if the registry had nothing to harvest.
+
+    """
+    chains = oai_registry_api.get_harvest_chains(registry)
+    harvest_date = oai_registry_api.start_harvest(registry)
+    if len(chains) == 0:
+        oai_registry_api.end_harvest(registry, [], [], harvest_date)
+        return False
+
+    try:
+        chain_ids = [(str(metadata_format.id), str(set_.id) if set_ is not None else None)
+                     for metadata_format, set_ in chains]
+        chord((harvest_chain_task.s(str(registry.id), metadata_format_id, set_id)
+               for metadata_format_id, set_id in chain_ids),
+              end_harvest_task.s(str(registry.id), chain_ids,
+                                 harvest_date.strftime(HARVEST_DATE_FORMAT))).apply_async()
+        logger.info('Registry {0} has been split into {1} harvest sub-tasks.'
+                    .format(registry.name.encode("utf-8"), len(chain_ids)))
+        return True
+    except Exception:
+        registry.is_harvesting = False
+        oai_registry_api.upsert(registry)
+        raise
+
+
+@shared_task(name='harvest_chain_task')
+def harvest_chain_task(registry_id, metadata_format_id, set_id=None):
+    """ Harvest one (metadata format, set) chain of the given registry. The set chains of a
+    metadata format run on separate workers at the same time: a record in several sets is saved
+    once (unique identifier and metadata format).
+    Args:
+        registry_id: Registry id.
+        metadata_format_id: Metadata format id.
+        set_id: Set id. None to harvest the metadata format without set.
+
+    Returns:
+        List of errors.
+
+    """
+    try:
+        registry = oai_registry_api.get_by_id(registry_id)
+        metadata_format = oai_harvester_metadata_format_api.get_by_id(metadata_format_id)
+        set_ = oai_harvester_set_api.get_by_id(set_id) if set_id is not None else None
+        return oai_registry_api.harvest_chain(registry, metadata_format, set_)
+    except Exception as e:
+        # Never fail: the chord callback has to run to end the harvest of the registry.
+        logger.error('ERROR : Impossible to harvest the metadata format {0} and set {1} of the '
+                     'registry {2}: {3}.'.format(metadata_format_id, set_id, registry_id,
+                                                 e.message))
+        return [{'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'error': e.message}]
+
+
+@shared_task(name='end_harvest_task')
+def end_harvest_task(chains_errors, registry_id, chain_ids, harvest_date):
+    """ End the harvest of the given registry once all its chains are harvested, and schedule
+    the next run based on the registry configuration.
+    Args:
+        chains_errors: List of the errors of each chain, returned by the chord header.
+        registry_id: Registry id.
+        chain_ids: List of (metadata format id, set id) harvested.
+        harvest_date: Harvest date (HARVEST_DATE_FORMAT).
+
+    """
+    try:
+        registry = oai_registry_api.get_by_id(registry_id)
+    except DoesNotExist:
+        logger.error('ERROR: Registry {0} does not exist anymore. '
+                     'Harvesting stopped.'.format(registry_id))
+        return
+
+    try:
+        chains = [(oai_harvester_metadata_format_api.get_by_id(metadata_format_id),
+                   oai_harvester_set_api.get_by_id(set_id) if set_id is not None else None)
+                  for metadata_format_id, set_id in chain_ids]
+        oai_registry_api.end_harvest(registry, chains, chains_errors,
+                                     datetime.datetime.strptime(harvest_date, HARVEST_DATE_FORMAT))
+        logger.info('FINISH harvesting registry: {0}'.format(registry.name.encode("utf-8")))
+    except Exception as e:
+        registry.is_harvesting = False
+        oai_registry_api.upsert(registry)
+        logger.error('ERROR : Impossible to end the harvest of the registry {0}: '
+                     '{1}.'.format(registry.name.encode("utf-8"), e.message))
     finally:
         # Harvest again in harvest_rate seconds.
-        harvest_task.apply_async((str(registry.id),), countdown=registry.harvest_rate)
+        harvest_task.apply_async((registry_id,), countdown=registry.harvest_rate)
+
+
+def queue_registry_job(registry, job_type):
+    """ Queue the harvest or the update of a registry, run in the background by registry_job_task.
+    Args:
+        registry: Registry.
+        job_type: Type of the job (HARVEST or UPDATE).
+
+    Returns:
+        OaiHarvesterJob.
+
+    """
+    job = oai_harvester_job_api.upsert(OaiHarvesterJob(registry=registry, job_type=job_type))
+    try:
+        registry_job_task.apply_async((str(job.id),))
+    except Exception as e:
+        _end_registry_job(job, [{'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 'error': e.message}])
+        raise
+    return job
+
+
+@shared_task(name='registry_job_task')
+def registry_job_task(job_id):
+    """ Run a harvest or update job queued by queue_registry_job.
+    Args:
+        job_id: Job id.
+
+    """
+    try:
+        job = oai_harvester_job_api.get_by_id(job_id)
+    except DoesNotExist:
+        logger.error('ERROR: Job {0} does not exist anymore.'.format(job_id))
+        return
+
+    job.status = RUNNING
+    job.start_date = datetime.datetime.utcnow()
+    oai_harvester_job_api.upsert(job)
+    try:
+        if job.job_type == HARVEST:
+            # One list of errors per harvest chain
+            errors = list(chain.from_iterable(oai_registry_api.harvest_registry(job.registry)))
+        else:
+            oai_registry_api.update_registry_info(job.registry)
+            errors = []
+    except Exception as e:
+        logger.error('ERROR : Impossible to {0} the registry {1}: '
+                     '{2}.'.format(job.job_type, job.registry.name.encode("utf-8"), e.message))
+        errors = [{'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'error': e.message}]
+    _end_registry_job(job, errors)
+
+
+def _end_registry_job(job, errors):
+    """ Save the result of a job.
+    Args:
+        job: Job.
+        errors: List of errors.
+
+    """
+    job.status = FAILURE if len(errors) > 0 else SUCCESS
+    job.errors = errors
+    job.end_date = datetime.datetime.utcnow()
+    oai_harvester_job_api.upsert(job)
 
 
 def _stop_harvest_registry(registry):
@@ -139,4 +388,16 @@ def _get_all_oai_tasks_full_name():
         List of OAI-PMH tasks name.
 
     """
-    return [watch_registry_harvest_task.__name__, harvest_task.__name__]
+    return [watch_registry_harvest_task.__name__, harvest_task.__name__,
+            harvest_chain_task.__name__, end_harvest_task.__name__,
+            harvest_registries_task.__name__]
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_conversion_pool(**kwargs):
+    """ Stop the pool of conversion processes when a Celery worker process shuts down. The pool
+    belongs to the process running the harvest tasks: a child process with the prefork pool, the
+    worker itself otherwise.
+    """
+    conversion_operations.close_pool()
@@ -0,0 +1,77 @@
+""" Conversion operations provide a pool of worker processes converting the xml content of records
+into dictionaries.
+"""
+import os
+import threading
+
+# billiard is the multiprocessing fork used by Celery: its pools can be started from a Celery
+# worker process (daemonic processes are not allowed to have children with multiprocessing).
+from billiard.pool import Pool
+
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_CONVERSION_PROCESSES
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def convert_records_to_dict(list_oai_records):
+    """ Convert the xml content of the records into dictionaries, in the pool of worker processes.
+    Records without xml content (Deleted) are left unchanged.
+
+    Args:
+        list_oai_records: List of OaiRecord.
+
+    """
+    records = [oai_record for oai_record in list_oai_records if oai_record.xml_content is not None]
+    if len(records) == 0:
+        return
+
+    list_dict_content = get_pool().map(xml_content_to_dict,
+                                       [oai_record.xml_content for oai_record in records])
+    for oai_record, dict_content in zip(records, list_dict_content):
+        oai_record.dict_content = dict_content
+
+
+def xml_content_to_dict(xml_content):
+    """ Convert a xml content into a dictionary, the same way as OaiRecord.convert_to_dict.
+
+    Args:
+        xml_content: XML content.
+
+    Returns:
+        Dictionary.
+
+    """
+    oai_record = OaiRecord()
+    oai_record.xml_content = xml_content
+    oai_record.convert_to_dict()
+    return oai_record.dict_content
+
+
+def get_pool():
+    """ Get the pool of worker processes of the current process. The pool is started on first use.
+
+    Returns:
+        Pool.
+
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A pool can't be shared with forked processes (Celery workers)
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = Pool(OAI_HARVESTER_CONVERSION_PROCESSES)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def close_pool():
+    """ Stop the pool of worker processes.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+            _pool.join()
+        _pool = None
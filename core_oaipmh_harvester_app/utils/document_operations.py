@@ -0,0 +1,19 @@
+""" Document operations provide tools on the documents about to be saved.
+"""
+
+
+def is_document_changed(document, field_names):
+    """ Check if saving the document changes one of the given fields: a new document, or a change
+    of one of the fields.
+
+    Args:
+        document: Document about to be saved.
+        field_names: Names of the fields.
+
+    Returns:
+        Yes or No (bool).
+
+    """
+    if document._created or document.pk is None:
+        return True
+    return any(field_name in document._get_changed_fields() for field_name in field_names)
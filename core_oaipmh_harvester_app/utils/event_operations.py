@@ -0,0 +1,285 @@
+""" Event operations publish the status of the registries and the progress of the harvest chains, and
+stream them to the clients as they are published.
+"""
+import datetime
+import logging
+import time
+
+from bson.objectid import ObjectId
+
+from core_oaipmh_harvester_app.components.oai_harvester_event import api as oai_harvester_event_api
+from core_oaipmh_harvester_app.components.oai_harvester_event_stream import api as \
+    oai_harvester_event_stream_api
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_EVENTS, \
+    OAI_HARVESTER_EVENTS_MAX_STREAMS, OAI_HARVESTER_EVENTS_STREAM_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = 'registry'
+PROGRESS = 'progress'
+
+WAIT_SECONDS = 1
+OVERLAP_SECONDS = 5
+STREAM_EXPIRATION_SECONDS = 60
+HEARTBEAT_SECONDS = 15
+PROGRESS_SECONDS = 2
+# Fields of the registry in its status
+REGISTRY_STATUS_FIELDS = ('name', 'is_activated', 'is_updating', 'is_harvesting', 'last_update')
+
+
+class ChainProgress(object):
+    """ Counts the pages and records harvested by a harvest chain and publishes its progress, at most
+    every PROGRESS_SECONDS.
+    """
+
+    def __init__(self, registry, metadata_format, set_=None):
+        """ Constructor.
+
+        Args:
+            registry: Harvested registry.
+            metadata_format: Metadata format of the chain.
+            set_: Set of the chain.
+
+        """
+        self.registry = registry
+        self.metadata_format = metadata_format
+        self.set_ = set_
+        self.pages = 0
+        self.records = 0
+        self.start = time.time()
+        self.last_publish = None
+        self.progress = None
+
+    def end_page(self, page):
+        """ Count a page, and publish the progress of the chain if it has not been published for
+        PROGRESS_SECONDS.
+
+        Args:
+            page: ListRecordsPage of the page.
+
+        """
+        self.pages += 1
+        self.records += page.record_count
+        complete_list_size = page.complete_list_size
+        cursor = page.cursor
+        # The cursor counts the records sent before the page, also before a resumed run
+        done = cursor + page.record_count if cursor is not None else self.records
+        eta = None
+        if complete_list_size is not None and self.records > 0:
+            records_per_second = self.records / max(time.time() - self.start, 0.001)
+            eta = max(0, complete_list_size - done) / records_per_second
+
+        set_spec = self.set_.set_spec if self.set_ is not None else None
+        self.progress = {'registry_id': str(self.registry.id),
+                         'chain': '{0}/{1}'.format(self.metadata_format.metadata_prefix, set_spec or ''),
+                         'metadata_prefix': self.metadata_format.metadata_prefix,
+                         'set_spec': set_spec,
+                         'pages': self.pages,
+                         'records': self.records,
+                         'done': done,
+                         'complete_list_size': complete_list_size,
+                         'eta': eta}
+        if self.last_publish is None or time.time() - self.last_publish >= PROGRESS_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """ Publish the progress of the chain, if it changed since it was last published.
+        """
+        if self.progress is None:
+            return
+        publish(self.registry, PROGRESS, self.progress)
+        self.progress = None
+        self.last_publish = time.time()
+
+
+def publish(registry, event_type, data):
+    """ Publish an event of a registry.
+
+    Args:
+        registry: Registry.
+        event_type: Type of the event.
+        data: Data of the event.
+
+    """
+    if not OAI_HARVESTER_EVENTS:
+        return
+    try:
+        oai_harvester_event_api.publish(registry, event_type, data)
+    except Exception as e:
+        # Events never stop a harvest
+        logger.warning('Impossible to publish the harvest event: {0}'.format(e.message))
+
+
+def publish_registry_status(registry):
+    """ Publish the status of a registry.
+
+    Args:
+        registry: Registry.
+
+    """
+    publish(registry, REGISTRY, get_registry_status(registry))
+
+
+def get_registry_status(registry):
+    """ Get the status of a registry.
+
+    Args:
+        registry: Registry.
+
+    Returns:
+        Dict.
+
+    """
+    return {'registry_id': str(registry.id),
+            'name': registry.name,
+            'is_activated': registry.is_activated,
+            'is_updating': registry.is_updating,
+            'is_harvesting': registry.is_harvesting,
+            'last_update': registry.last_update}
+
+
+def get_harvest_progress(registry, date):
+    """ Get the progress of each harvest chain of a registry since a given date, from the last
+    progress event of each chain.
+
+    Args:
+        registry: Registry.
+        date: Start date of the harvest (UTC).
+
+    Returns:
+        List of the progress of each chain.
+
+    """
+    progress = {}
+    for event in oai_harvester_event_api.get_all_by_registry_and_event_type(registry, PROGRESS,
+                                                                            date):
+        progress[event.data['chain']] = event.data
+    return [progress[chain] for chain in sorted(progress)]
+
+
+def get_last_event_id():
+    """ Get the id of the last published event.
+
+    Returns:
+        Event id, None if there is no event.
+
+    """
+    return oai_harvester_event_api.get_last_id()
+
+
+def open_stream(events):
+    """ Open an event stream, unless OAI_HARVESTER_EVENTS_MAX_STREAMS streams are already open in
+    all the server processes.
+
+    Args:
+        events: Generator of the stream.
+
+    Returns:
+        EventStream, None if too many streams are open.
+
+    """
+    try:
+        # Counted after its creation: streams opened at the same time never exceed the limit
+        stream = oai_harvester_event_stream_api.\
+            create(datetime.datetime.utcnow() +
+                   datetime.timedelta(seconds=OAI_HARVESTER_EVENTS_STREAM_TIMEOUT +
+                                      STREAM_EXPIRATION_SECONDS))
+        if oai_harvester_event_stream_api.get_open_count() > OAI_HARVESTER_EVENTS_MAX_STREAMS:
+            oai_harvester_event_stream_api.delete_by_id(stream.id)
+            return None
+    except Exception as e:
+        logger.warning('Impossible to open the event stream: {0}'.format(e.message))
+        return None
+    return EventStream(events, stream.id)
+
+
+class EventStream(object):
+    """ Open event stream. The stream is counted as open until it is closed, or until it expires
+    if its process is killed.
+    """
+
+    def __init__(self, events, stream_id):
+        """ Constructor.
+
+        Args:
+            events: Generator of the stream.
+            stream_id: Id of the OaiHarvesterEventStream.
+
+        """
+        self.events = events
+        self.stream_id = stream_id
+        self.is_open = True
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        """ Close the stream.
+        """
+        if not self.is_open:
+            return
+        self.is_open = False
+        try:
+            oai_harvester_event_stream_api.delete_by_id(self.stream_id)
+        except Exception as e:
+            logger.warning('Impossible to close the event stream: {0}'.format(e.message))
+        self.events.close()
+
+
+def iter_events(last_event_id=None, timeout=OAI_HARVESTER_EVENTS_STREAM_TIMEOUT):
+    """ Yield the events published after a given event, as they are published, until the timeout.
+    None is yielded when no event was published for HEARTBEAT_SECONDS, for the stream to send a
+    heartbeat.
+
+    Args:
+        last_event_id: Id of the last event received. All the events if None.
+        timeout: Time in seconds.
+
+    Returns:
+        OaiHarvesterEvent generator.
+
+    """
+    end = time.time() + timeout
+    last_yield = time.time()
+    # The ids are generated by the publishing processes: an event can be inserted after an event
+    # with a greater id has been read. The events of the last OVERLAP_SECONDS are read again, and
+    # the ones already yielded are skipped.
+    yielded_ids = set()
+    if last_event_id is not None:
+        yielded_ids = {event.id for event in
+                       oai_harvester_event_api.get_all_after(_get_overlap_id(last_event_id))
+                       if event.id <= last_event_id}
+    while True:
+        # Indexed on the id: only the events of the overlap are read while no event is published
+        for event in oai_harvester_event_api.get_all_after(_get_overlap_id(last_event_id)):
+            if event.id in yielded_ids:
+                continue
+            yielded_ids.add(event.id)
+            last_event_id = max(last_event_id, event.id) if last_event_id is not None else event.id
+            last_yield = time.time()
+            yield event
+        if last_event_id is not None:
+            overlap_id = _get_overlap_id(last_event_id)
+            yielded_ids = {event_id for event_id in yielded_ids if event_id > overlap_id}
+        now = time.time()
+        if now >= end:
+            return
+        if now - last_yield >= HEARTBEAT_SECONDS:
+            last_yield = now
+            yield None
+        time.sleep(WAIT_SECONDS)
+
+
+def _get_overlap_id(event_id):
+    """ Get the id from which the events are read again after the given event.
+
+    Args:
+        event_id: Id of the last event yielded, None if no event was yielded.
+
+    Returns:
+        Event id, None to read all the events.
+
+    """
+    if event_id is None:
+        return None
+    return ObjectId.from_datetime(event_id.generation_time - datetime.timedelta(seconds=OVERLAP_SECONDS))
@@ -0,0 +1,40 @@
+""" Index operations provide tool operation to build and monitor the indexes of the harvester collections.
+"""
+from core_oaipmh_harvester_app.components.oai_harvester_checkpoint.models import OaiHarvesterCheckpoint
+from core_oaipmh_harvester_app.components.oai_harvester_event.models import OaiHarvesterEvent
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import OaiHarvesterMetadataFormat
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set.models import \
+    OaiHarvesterMetadataFormatSet
+from core_oaipmh_harvester_app.components.oai_harvester_metrics.models import OaiHarvesterMetrics
+from core_oaipmh_harvester_app.components.oai_harvester_set.models import OaiHarvesterSet
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+
+INDEXED_DOCUMENTS = [OaiRecord, OaiHarvesterSet, OaiHarvesterMetadataFormat, OaiHarvesterMetadataFormatSet,
+                     OaiHarvesterCheckpoint, OaiHarvesterMetrics, OaiHarvesterEvent, OaiHarvesterJob]
+
+
+def init_indexes():
+    """ Build the indexes declared in the meta of the harvester documents.
+    """
+    for document in INDEXED_DOCUMENTS:
+        document.ensure_indexes()
+
+
+def get_index_usage(document):
+    """ Return the usage of the indexes of a document collection, since the start of the database
+    server.
+
+    Args:
+        document: Document class.
+
+    Returns:
+        List of dict (name, key, ops, since), sorted by number of operations.
+
+    """
+    index_stats = document._get_collection().aggregate([{'$indexStats': {}}])
+    usage = [{'name': stats['name'],
+              'key': stats['key'],
+              'ops': stats['accesses']['ops'],
+              'since': stats['accesses']['since']} for stats in index_stats]
+    return sorted(usage, key=lambda index: index['ops'], reverse=True)
@@ -0,0 +1,186 @@
+""" Metrics operations provide the harvest counters and stage timings of the harvest chains.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from core_oaipmh_harvester_app.components.oai_harvester_metrics import api as oai_harvester_metrics_api
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_METRICS
+
+logger = logging.getLogger(__name__)
+
+FETCH = 'fetch'
+PARSE = 'parse'
+TRANSFORM = 'transform'
+CONVERT = 'convert'
+MONGO = 'mongo'
+STAGES = (FETCH, PARSE, TRANSFORM, CONVERT, MONGO)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROMETHEUS_COUNTERS = [
+    ('oai_harvester_pages_total', 'Number of ListRecords pages harvested.', 'pages'),
+    ('oai_harvester_records_total', 'Number of records harvested.', 'records'),
+    ('oai_harvester_bytes_total', 'Number of bytes of ListRecords responses downloaded.', 'bytes'),
+    ('oai_harvester_seconds_total', 'Time spent harvesting, in seconds.', 'seconds'),
+]
+PROMETHEUS_STAGE_COUNTER = ('oai_harvester_stage_seconds_total',
+                            'Time spent in each harvest stage, in seconds.')
+
+_local = threading.local()
+
+
+class ChainMetrics(object):
+    """ Collects the metrics of a harvest chain and saves them after each page. The chain is the
+    current chain of the thread while the context is entered: the stages timed in this thread are
+    added to its page.
+    """
+
+    def __init__(self, registry, metadata_format, set_=None):
+        """ Constructor.
+
+        Args:
+            registry: Harvested registry.
+            metadata_format: Metadata format of the chain.
+            set_: Set of the chain.
+
+        """
+        self.registry = registry
+        self.metadata_format = metadata_format
+        self.set_ = set_
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.page_start = time.time()
+
+    def __enter__(self):
+        _local.chain_metrics = self
+        self.page_start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.chain_metrics = None
+
+    def add_stage_time(self, stage, seconds):
+        """ Add time to a stage of the current page.
+
+        Args:
+            stage: Stage name.
+            seconds: Time in seconds.
+
+        """
+        self.stage_seconds[stage] += seconds
+
+    def end_page(self, page):
+        """ Save the metrics of a page and start the next one. The fetch and parse timings are read
+        from the ListRecordsPage: pages may be fetched by another thread.
+
+        Args:
+            page: ListRecordsPage of the page.
+
+        """
+        now = time.time()
+        self.add_stage_time(FETCH, page.fetch_seconds)
+        self.add_stage_time(PARSE, page.parse_seconds)
+        if OAI_HARVESTER_METRICS:
+            try:
+                oai_harvester_metrics_api.\
+                    inc_by_metadata_format_and_set(self.metadata_format, self.set_, self.registry,
+                                                   pages=1, records=page.record_count,
+                                                   bytes_=page.content_bytes,
+                                                   seconds=now - self.page_start,
+                                                   stage_seconds=self.stage_seconds)
+            except Exception as e:
+                # Metrics never stop a harvest
+                logger.warning('Impossible to save the harvest metrics: {0}'.format(e.message))
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.page_start = now
+
+
+@contextmanager
+def stage(name):
+    """ Time a stage of the page harvested by the current chain of the thread. Does nothing
+    outside of a chain.
+
+    Args:
+        name: Stage name.
+
+    """
+    chain_metrics = getattr(_local, 'chain_metrics', None)
+    start = time.time()
+    try:
+        yield
+    finally:
+        if chain_metrics is not None:
+            chain_metrics.add_stage_time(name, time.time() - start)
+
+
+def get_prometheus_text(list_metrics):
+    """ Get the Prometheus text exposition of the metrics of the harvest chains. Rates (pages/sec,
+    records/sec) are computed from the counters by the monitoring system.
+
+    Args:
+        list_metrics: List of OaiHarvesterMetrics.
+
+    Returns:
+        Metrics in the Prometheus text format.
+
+    """
+    list_labels = [(metrics, _get_labels(metrics)) for metrics in list_metrics]
+    lines = []
+    for name, description, field in PROMETHEUS_COUNTERS:
+        lines.append('# HELP {0} {1}'.format(name, description))
+        lines.append('# TYPE {0} counter'.format(name))
+        for metrics, labels in list_labels:
+            lines.append('{0}{{{1}}} {2}'.format(name, labels, _format_sample(getattr(metrics, field))))
+    name, description = PROMETHEUS_STAGE_COUNTER
+    lines.append('# HELP {0} {1}'.format(name, description))
+    lines.append('# TYPE {0} counter'.format(name))
+    for metrics, labels in list_labels:
+        for stage_name in STAGES:
+            lines.append('{0}{{{1},stage="{2}"}} {3}'.format(
+                name, labels, stage_name, _format_sample(getattr(metrics, stage_name + '_seconds'))))
+    return u'\n'.join(lines) + u'\n'
+
+
+def _format_sample(value):
+    """ Format a Prometheus sample value. Integers are written without the long suffix of repr.
+
+    Args:
+        value: Counter value, None for 0.
+
+    Returns:
+        Sample value.
+
+    """
+    if isinstance(value, float):
+        return '%r' % value
+    return str(int(value or 0))
+
+
+def _get_labels(metrics):
+    """ Get the Prometheus labels of the metrics of a harvest chain.
+
+    Args:
+        metrics: OaiHarvesterMetrics.
+
+    Returns:
+        Labels.
+
+    """
+    set_spec = metrics.harvester_set.set_spec if metrics.harvester_set is not None else ''
+    return u'registry="{0}",metadata_prefix="{1}",set="{2}"'.format(
+        _escape_label(metrics.registry.name),
+        _escape_label(metrics.harvester_metadata_format.metadata_prefix),
+        _escape_label(set_spec))
+
+
+def _escape_label(value):
+    """ Escape a Prometheus label value.
+
+    Args:
+        value: Label value.
+
+    Returns:
+        Escaped label value.
+
+    """
+    return (value or u'').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
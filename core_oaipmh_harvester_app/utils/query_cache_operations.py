@@ -0,0 +1,76 @@
+""" Query cache operations provide a cache of the registries and metadata formats used to build the
+local queries. The cache is only used when OAI_HARVESTER_QUERY_CACHE_TIMEOUT is not 0.
+"""
+from django.core.cache import cache
+
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import \
+    OaiHarvesterMetadataFormat
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_QUERY_CACHE_TIMEOUT
+
+ACTIVATED_REGISTRY_IDS_KEY = 'core_oaipmh_harvester_app.query.activated_registry_ids'
+METADATA_FORMATS_BY_TEMPLATE_KEY = 'core_oaipmh_harvester_app.query.metadata_formats_by_template'
+
+
+def get_activated_registry_ids():
+    """ Return the ids of the activated registries.
+
+    Returns:
+        Set of registry ids (str).
+
+    """
+    activated_registry_ids = cache.get(ACTIVATED_REGISTRY_IDS_KEY) \
+        if OAI_HARVESTER_QUERY_CACHE_TIMEOUT else None
+    if activated_registry_ids is None:
+        activated_registry_ids = {str(registry_id) for registry_id in
+                                  OaiRegistry.get_all_by_is_activated(is_activated=True).scalar('id')}
+        if OAI_HARVESTER_QUERY_CACHE_TIMEOUT:
+            cache.set(ACTIVATED_REGISTRY_IDS_KEY, activated_registry_ids,
+                      OAI_HARVESTER_QUERY_CACHE_TIMEOUT)
+    return activated_registry_ids
+
+
+def get_metadata_formats_by_template():
+    """ Return the metadata formats linked to each template.
+
+    Returns:
+        Dict of lists of (registry id, metadata format id) by template id (str).
+
+    """
+    metadata_formats_by_template = cache.get(METADATA_FORMATS_BY_TEMPLATE_KEY) \
+        if OAI_HARVESTER_QUERY_CACHE_TIMEOUT else None
+    if metadata_formats_by_template is None:
+        metadata_formats_by_template = {}
+        for metadata_format in OaiHarvesterMetadataFormat.get_all_with_template():
+            metadata_formats_by_template.setdefault(str(metadata_format.template.id), []).\
+                append((str(metadata_format.registry.id), str(metadata_format.id)))
+        if OAI_HARVESTER_QUERY_CACHE_TIMEOUT:
+            cache.set(METADATA_FORMATS_BY_TEMPLATE_KEY, metadata_formats_by_template,
+                      OAI_HARVESTER_QUERY_CACHE_TIMEOUT)
+    return metadata_formats_by_template
+
+
+def get_metadata_format_ids(list_template_ids, list_registry_ids):
+    """ Return the ids of the metadata formats of the given registries linked to the given
+    templates.
+
+    Args:
+        list_template_ids: List of template ids.
+        list_registry_ids: List of registry ids.
+
+    Returns:
+        List of metadata format ids (str).
+
+    """
+    metadata_formats_by_template = get_metadata_formats_by_template()
+    registry_ids = {str(registry_id) for registry_id in list_registry_ids}
+    return [metadata_format_id for template_id in list_template_ids
+            for registry_id, metadata_format_id in
+            metadata_formats_by_template.get(str(template_id), [])
+            if registry_id in registry_ids]
+
+
+def clear_cache():
+    """ Clear the cache, after a change of a registry or a metadata format.
+    """
+    cache.delete_many([ACTIVATED_REGISTRY_IDS_KEY, METADATA_FORMATS_BY_TEMPLATE_KEY])
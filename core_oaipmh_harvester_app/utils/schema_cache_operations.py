@@ -0,0 +1,99 @@
+""" Schema cache operations provide a cache of the schemas of the metadata formats, shared by all the
+registries and revalidated with conditional requests.
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from rest_framework import status
+
+from core_main_app.utils.xml import get_hash
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_SCHEMA_CACHE_TIMEOUT
+from core_oaipmh_harvester_app.utils.session_operations import send_get_request
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_KEY = 'core_oaipmh_harvester_app.schema.{0}'
+
+
+def get_schema(url):
+    """ Return the content and the hash of a schema. The schema is downloaded once, then revalidated
+    with a conditional request (If-None-Match, If-Modified-Since): an unchanged schema is neither
+    downloaded nor hashed again.
+
+    Args:
+        url: URL of the schema.
+
+    Returns:
+        Content and hash of the schema. None if the schema can't be downloaded.
+
+    Raises:
+        XSDError: The schema can't be hashed.
+
+    """
+    key = _get_key(url)
+    schema = cache.get(key)
+    headers = {}
+    if schema is not None:
+        if schema['etag'] is not None:
+            headers['If-None-Match'] = schema['etag']
+        if schema['last_modified'] is not None:
+            headers['If-Modified-Since'] = schema['last_modified']
+
+    http_response = send_get_request(url, headers=headers)
+    if schema is not None and http_response.status_code == status.HTTP_304_NOT_MODIFIED:
+        _set_schema(key, schema)
+        return schema['xml_schema'], schema['hash']
+    if http_response.status_code != status.HTTP_200_OK:
+        return None
+
+    xml_schema = http_response.text
+    # Servers without validators send the whole schema again
+    if schema is not None and schema['xml_schema'] == xml_schema:
+        hash_ = schema['hash']
+    else:
+        hash_ = get_hash(xml_schema)
+    _set_schema(key, {'xml_schema': xml_schema,
+                      'hash': hash_,
+                      'etag': http_response.headers.get('ETag'),
+                      'last_modified': http_response.headers.get('Last-Modified')})
+    return xml_schema, hash_
+
+
+def clear_schema(url):
+    """ Remove a schema from the cache.
+
+    Args:
+        url: URL of the schema.
+
+    """
+    cache.delete(_get_key(url))
+
+
+def _set_schema(key, schema):
+    """ Cache a schema. A schema that can't be cached (too large for the cache backend) is
+    downloaded on each request.
+
+    Args:
+        key: Cache key.
+        schema: Dict (xml_schema, hash, etag, last_modified).
+
+    """
+    try:
+        cache.set(key, schema, OAI_HARVESTER_SCHEMA_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning('Impossible to cache the schema: {0}'.format(e.message))
+
+
+def _get_key(url):
+    """ Return the cache key of a schema. URLs are hashed: cache keys are limited in size and
+    characters.
+
+    Args:
+        url: URL of the schema.
+
+    Returns:
+        Cache key.
+
+    """
+    return SCHEMA_KEY.format(hashlib.sha1(url.encode('utf-8')).hexdigest())
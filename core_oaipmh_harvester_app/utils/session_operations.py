@@ -0,0 +1,81 @@
+""" Session operations provide pooled, keep-alive HTTP sessions shared by all Oai-Pmh requests.
+"""
+import os
+import threading
+from urlparse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core_oaipmh_harvester_app.settings import SSL_CERTIFICATES_DIR, OAI_HARVESTER_HTTP_POOL_MAXSIZE
+
+ACCEPT_ENCODING = 'gzip, deflate'
+
+_sessions = {}
+_sessions_pid = None
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """ Get the HTTP session of the host of the given URL. Sessions keep their connections alive
+    between requests, and are created once per host and per process.
+
+    Args:
+        url: URL.
+
+    Returns:
+        requests.Session.
+
+    """
+    global _sessions_pid
+    parsed_url = urlparse(url)
+    host = (parsed_url.scheme, parsed_url.netloc)
+    with _sessions_lock:
+        # Connections can't be shared with forked processes (Celery workers)
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        if host not in _sessions:
+            _sessions[host] = _init_session()
+        return _sessions[host]
+
+
+def send_get_request(url, params=None, **kwargs):
+    """ Send a GET request using the HTTP session of the host.
+
+    Args:
+        url: URL.
+        params: Query parameters.
+        **kwargs: requests arguments.
+
+    Returns:
+        HTTP response.
+
+    """
+    return get_session(url).get(url, params=params, **kwargs)
+
+
+def close_sessions():
+    """ Close all HTTP sessions and their connections.
+    """
+    with _sessions_lock:
+        for session in _sessions.itervalues():
+            session.close()
+        _sessions.clear()
+
+
+def _init_session():
+    """ Initialize a HTTP session. Allows for proper HTTPS handling, similar to
+    core_main_app request_utils.
+
+    Returns:
+        requests.Session.
+
+    """
+    session = requests.Session()
+    session.verify = SSL_CERTIFICATES_DIR
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OAI_HARVESTER_HTTP_POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
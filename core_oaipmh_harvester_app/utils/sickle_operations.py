@@ -1,19 +1,57 @@
 """ Sickle utils provide tool operation for sickle library.
 """
+import logging
+import time
+
 from rest_framework import status
 from sickle import Sickle
-from sickle.models import Record
 from sickle.oaiexceptions import NoSetHierarchy, NoMetadataFormat
+from sickle.response import OAIResponse
 
 from core_oaipmh_common_app.commons.messages import OaiPmhMessage
-from core_oaipmh_harvester_app.settings import SSL_CERTIFICATES_DIR
-from core_oaipmh_harvester_app.utils import sickle_serializers
-from xml_utils.xsd_tree.xsd_tree import XSDTree
+from core_oaipmh_harvester_app.utils import session_operations, sickle_serializers
+
+logger = logging.getLogger(__name__)
+
+
+class SessionSickle(Sickle):
+    """ Sickle client sending its requests through the pooled HTTP session of the Data Provider
+    host instead of opening a new connection for each request.
+    """
+
+    def harvest(self, **kwargs):
+        """ Make HTTP requests to the OAI server.
+
+        Args:
+            **kwargs: OAI HTTP parameters.
+
+        Returns:
+            sickle.OAIResponse.
+
+        """
+        session = session_operations.get_session(self.endpoint)
+        for _ in range(self.max_retries):
+            if self.http_method == 'GET':
+                http_response = session.get(self.endpoint, params=kwargs, **self.request_args)
+            else:
+                http_response = session.post(self.endpoint, data=kwargs, **self.request_args)
+            if http_response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                try:
+                    retry_after = int(http_response.headers.get('retry-after'))
+                except TypeError:
+                    retry_after = 20
+                logger.info("HTTP 503! Retrying after %d seconds..." % retry_after)
+                time.sleep(retry_after)
+            else:
+                http_response.raise_for_status()
+                if self.encoding:
+                    http_response.encoding = self.encoding
+                return OAIResponse(http_response, params=kwargs)
 
 
 def _sickle_init(url):
-    """ Initialize Sickle object. Allows for proper HTTPS handling, similar to
-    core_main_app request_utils.
+    """ Initialize Sickle object. HTTPS handling and connection pooling are provided by the
+    shared session of the Data Provider host.
 
     Args:
         url: URL of the Data Provider.
@@ -21,7 +59,7 @@ def _sickle_init(url):
     Returns:
         Sickle object
     """
-    return Sickle(url, verify=SSL_CERTIFICATES_DIR)
+    return SessionSickle(url)
 
 
 def sickle_identify(url):
@@ -96,26 +134,3 @@ def sickle_list_metadata_formats(url):
                                                      % e.message)
         return content, status.HTTP_500_INTERNAL_SERVER_ERROR
 
-
-def get_record_elt(xml_elt, metadata_prefix):
-    """ Init a Record sickle object from a representative xml string.
-    Args:
-        xml_elt: XML string to convert toward Record sickle object.
-        metadata_prefix: Metadata Prefix
-
-    Returns:
-        Representation of an Oai-Pmh record object.
-
-    """
-    record = Record(xml_elt)
-    elt_ = {"identifier": record.header.identifier,
-            "datestamp": record.header.datestamp,
-            "deleted": record.deleted,
-            "sets": record.header.setSpecs,
-            "metadataPrefix": metadata_prefix,
-            "metadata": XSDTree.tostring(record.xml.find('.//'
-                                                         + '{http://www.openarchives.org/OAI/2.0/}'
-                                                         + 'metadata/'))
-            if not record.deleted else None,
-            "raw": record.raw}
-    return elt_
@@ -0,0 +1,129 @@
+""" Stream operations provide a single-pass streaming reader for Oai-Pmh ListRecords responses.
+"""
+import time
+
+from lxml import etree
+
+from xml_utils.xsd_tree.xsd_tree import XSDTree
+
+OAI_NAMESPACE = '{http://www.openarchives.org/OAI/2.0/}'
+RECORD_TAG = OAI_NAMESPACE + 'record'
+RESUMPTION_TOKEN_TAG = OAI_NAMESPACE + 'resumptionToken'
+ERROR_TAG = OAI_NAMESPACE + 'error'
+CHUNK_SIZE = 64 * 1024
+
+
+class ListRecordsReader(object):
+    """ Reads a ListRecords HTTP response body chunk by chunk. Yields a record dict as soon as each
+    record element is closed. The resumption token, its attributes (cursor, completeListSize,
+    expirationDate) and the Oai-Pmh error code are read during the same pass and are available once
+    the reader has been consumed, with the time spent waiting for the body and parsing it.
+    """
+
+    def __init__(self, http_response, metadata_prefix, chunk_size=CHUNK_SIZE):
+        """ Constructor.
+
+        Args:
+            http_response: Streamed HTTP response (stream=True).
+            metadata_prefix: Metadata Prefix.
+            chunk_size: Number of bytes read at a time from the response body.
+
+        """
+        self.http_response = http_response
+        self.metadata_prefix = metadata_prefix
+        self.chunk_size = chunk_size
+        self.resumption_token = None
+        self.resumption_token_attributes = {}
+        self.error_code = None
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.bytes_read = 0
+
+    def __iter__(self):
+        """ Parse the response body and yield records.
+
+        Returns:
+            Representation of Oai-Pmh record objects.
+
+        """
+        parser = etree.XMLPullParser(events=('end',), tag=(RECORD_TAG, RESUMPTION_TOKEN_TAG,
+                                                                ERROR_TAG))
+        chunks = iter(self.http_response.iter_content(self.chunk_size))
+        while True:
+            start = time.time()
+            chunk = next(chunks, None)
+            self.fetch_seconds += time.time() - start
+            if chunk is None:
+                break
+            self.bytes_read += len(chunk)
+            for record in self._parse(parser, chunk):
+                yield record
+        for record in self._parse(parser):
+            yield record
+
+    def _parse(self, parser, chunk=None):
+        """ Feed the parser with a chunk, or close it, and read the available events. The records
+        are returned once parsed: the parse time does not include their processing.
+
+        Args:
+            parser: XMLPullParser.
+            chunk: Chunk of the response body. None to close the parser.
+
+        Returns:
+            List of representations of Oai-Pmh record objects.
+
+        """
+        start = time.time()
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        records = list(self._read_events(parser))
+        self.parse_seconds += time.time() - start
+        return records
+
+    def _read_events(self, parser):
+        """ Read the events available in the parser.
+
+        Args:
+            parser: XMLPullParser.
+
+        Returns:
+            Representation of Oai-Pmh record objects.
+
+        """
+        for _, elt in parser.read_events():
+            if elt.tag == RESUMPTION_TOKEN_TAG:
+                self.resumption_token = elt.text
+                self.resumption_token_attributes = dict(elt.attrib)
+            elif elt.tag == ERROR_TAG:
+                self.error_code = elt.get('code')
+            else:
+                yield get_record_dict(elt, self.metadata_prefix)
+            # Free the element and the siblings already processed
+            elt.clear()
+            while elt.getprevious() is not None:
+                del elt.getparent()[0]
+
+
+def get_record_dict(record_elt, metadata_prefix):
+    """ Get the representation of an Oai-Pmh record from its xml element.
+
+    Args:
+        record_elt: record element.
+        metadata_prefix: Metadata Prefix
+
+    Returns:
+        Representation of an Oai-Pmh record object.
+
+    """
+    header = record_elt.find(OAI_NAMESPACE + 'header')
+    deleted = header.get('status') == 'deleted'
+    elt_ = {"identifier": header.findtext(OAI_NAMESPACE + 'identifier'),
+            "datestamp": header.findtext(OAI_NAMESPACE + 'datestamp'),
+            "deleted": deleted,
+            "sets": [set_spec.text for set_spec in header.findall(OAI_NAMESPACE + 'setSpec')],
+            "metadataPrefix": metadata_prefix,
+            "metadata": XSDTree.tostring(record_elt.find('.//' + OAI_NAMESPACE + 'metadata/'))
+            if not deleted else None}
+    return elt_
@@ -0,0 +1,132 @@
+""" Throttle operations provide an adaptive rate limiter for each Data Provider host.
+"""
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+from urlparse import urlparse
+
+from core_oaipmh_harvester_app.settings import OAI_HARVESTER_MAX_REQUESTS_PER_SECOND
+
+MIN_REQUESTS_PER_SECOND = 0.1
+RATE_INCREASE = 0.5
+RATE_DECREASE_FACTOR = 0.5
+SLOW_RESPONSE_FACTOR = 3
+LATENCY_SMOOTHING = 0.2
+MAX_BACKOFF = 600
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """ Token bucket limiting the requests sent to a host. The rate grows slowly while the host
+    answers in time and is halved on errors or slow responses. Errors also block all the requests
+    for the delay asked by the host (Retry-After).
+    """
+
+    def __init__(self, max_rate):
+        """ Constructor.
+
+        Args:
+            max_rate: Maximum number of requests per second. 0 to only honor the backoff delays.
+
+        """
+        self.max_rate = float(max_rate)
+        self.rate = self.max_rate
+        self.tokens = max(1.0, self.max_rate)
+        self.updated = time.time()
+        self.blocked_until = 0
+        self.latency = None
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ Wait until a request can be sent to the host.
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif not self.max_rate:
+                    return
+                else:
+                    self.tokens = min(max(1.0, self.max_rate),
+                                      self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self, latency):
+        """ Adapt the rate to a successful response.
+
+        Args:
+            latency: Response time in seconds.
+
+        """
+        with self.lock:
+            if self.latency is None:
+                self.latency = latency
+            slow = latency > SLOW_RESPONSE_FACTOR * self.latency
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+            if not self.max_rate:
+                return
+            if slow:
+                self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate * RATE_DECREASE_FACTOR)
+            else:
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def on_error(self, retry_after):
+        """ Slow down after an error and block the requests for the given delay.
+
+        Args:
+            retry_after: Delay in seconds.
+
+        """
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+            if self.max_rate:
+                self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate * RATE_DECREASE_FACTOR)
+                self.tokens = 0
+
+
+def get_rate_limiter(url):
+    """ Get the rate limiter of the host of the given URL.
+
+    Args:
+        url: URL.
+
+    Returns:
+        RateLimiter.
+
+    """
+    host = urlparse(url).netloc
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = RateLimiter(OAI_HARVESTER_MAX_REQUESTS_PER_SECOND)
+        return _rate_limiters[host]
+
+
+def get_retry_after(http_response, attempt):
+    """ Get the delay before retrying a request: the Retry-After header of the response (seconds or
+    HTTP date), or an exponential backoff.
+
+    Args:
+        http_response: Response.
+        attempt: Number of the failed attempt, starting at 0.
+
+    Returns:
+        Delay in seconds.
+
+    """
+    retry_after = http_response.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return min(MAX_BACKOFF, max(0, int(retry_after)))
+        except ValueError:
+            retry_date = parsedate_tz(retry_after)
+            if retry_date is not None:
+                return min(MAX_BACKOFF, max(0, mktime_tz(retry_date) - time.time()))
+    return min(MAX_BACKOFF, 2 ** attempt)
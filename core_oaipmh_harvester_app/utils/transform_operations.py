@@ -1,6 +1,9 @@
 """
     Transform operations utils provide tool operation to transform oai-pmh dict representation to object
 """
+import hashlib
+import json
+from collections import OrderedDict
 
 from core_oaipmh_common_app.utils import UTCdatetime
 
@@ -67,17 +70,21 @@ def transform_dict_metadata_format_to_oai_harvester_metadata_format(data):
                                        raw=raw_xml_to_dict(obj['raw'])) for obj in data]
 
 
-def transform_dict_record_to_oai_record(data, registry_all_sets=[]):
+def transform_dict_record_to_oai_record(data, registry_all_sets=[], registry_sets_by_spec=None):
     """ Transforms a dict to a list of OaiRecord object.
 
     Args:
         data: Data to transform.
         registry_all_sets: List of all sets.
+        registry_sets_by_spec: Sets (or references to sets) by set spec. Built from
+        registry_all_sets if not given. Build it once with get_sets_by_spec to transform many pages.
 
     Returns:
         List of OaiRecord instances.
 
     """
+    if registry_sets_by_spec is None:
+        registry_sets_by_spec = get_sets_by_spec(registry_all_sets)
     list_records = []
     for obj in data:
         oai_record = OaiRecord()
@@ -85,9 +92,62 @@ def transform_dict_record_to_oai_record(data, registry_all_sets=[]):
         oai_record.last_modification_date = UTCdatetime.\
             utc_datetime_iso8601_to_datetime(obj['datestamp'])
         oai_record.deleted = obj['deleted']
-        oai_record.harvester_sets = [x for x in registry_all_sets if x.set_spec in obj['sets']]
+        # Without duplicates, in the order of the header
+        oai_record.harvester_sets = [registry_sets_by_spec[set_spec]
+                                     for set_spec in OrderedDict.fromkeys(obj['sets'])
+                                     if set_spec in registry_sets_by_spec]
         oai_record.xml_content = str(obj['metadata']) if obj['metadata'] is not None else None
+        oai_record.digest = get_record_digest(obj)
+        oai_record.metadata_digest = get_metadata_digest(obj)
 
         list_records.append(oai_record)
 
     return list_records
+
+
+def get_sets_by_spec(registry_all_sets):
+    """ Builds the set spec lookup of the sets of a registry.
+
+    Args:
+        registry_all_sets: List of all sets.
+
+    Returns:
+        Dict of OaiHarvesterSet by set spec.
+
+    """
+    return {set_.set_spec: set_ for set_ in registry_all_sets}
+
+
+def get_record_digest(obj):
+    """ Computes the digest of an oai-pmh record dict representation. The digest changes as soon as
+    the datestamp, the status, the sets or the metadata of the record change.
+
+    Args:
+        obj: Record dict representation.
+
+    Returns:
+        Hexadecimal digest.
+
+    """
+    # Canonical encoding: the field boundaries are kept, ['ab', 'c'] and ['a', 'bc'] differ
+    metadata = str(obj['metadata']) if obj['metadata'] is not None else None
+    content = json.dumps([obj['datestamp'], bool(obj['deleted']),
+                          sorted(set_spec or '' for set_spec in obj['sets']), metadata],
+                         sort_keys=True)
+    return hashlib.sha1(content).hexdigest()
+
+
+def get_metadata_digest(obj):
+    """ Computes the digest of the metadata of an oai-pmh record dict representation. Unlike the
+    record digest, it does not change with the header (datestamp, status, sets).
+
+    Args:
+        obj: Record dict representation.
+
+    Returns:
+        Hexadecimal digest, None if the record has no metadata.
+
+    """
+    if obj['metadata'] is None:
+        return None
+    return hashlib.sha1(str(obj['metadata'])).hexdigest()
@@ -4,10 +4,12 @@ import urllib
 from StringIO import StringIO
 from wsgiref.util import FileWrapper
 
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
 from django.contrib import messages
 from django.contrib.staticfiles import finders
 from django.core.urlresolvers import reverse_lazy
-from django.http.response import HttpResponseBadRequest, HttpResponse
+from django.http.response import HttpResponseBadRequest, HttpResponse, StreamingHttpResponse
 from django.template import loader
 from django.utils import formats
 from os.path import join
@@ -22,7 +24,10 @@ import core_oaipmh_harvester_app.components.oai_registry.api as oai_registry_api
 import core_oaipmh_harvester_app.components.oai_verbs.api as oai_verb_api
 from core_main_app.utils.xml import xsl_transform
 from core_main_app.views.common.ajax import EditObjectModalView
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import HARVEST, UPDATE
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.tasks import queue_registry_job
+from core_oaipmh_harvester_app.utils import event_operations
 from core_oaipmh_harvester_app.views.admin.forms import AddRegistryForm, EditRegistryForm, \
     EditHarvestRegistryForm
 from xml_utils.xsd_tree.xsd_tree import XSDTree
@@ -211,7 +216,7 @@ class EditHarvestRegistryView(EditObjectModalView):
 
 
 def update_registry(request):
-    """ Update information of a registry.
+    """ Queue the update of the information of a registry.
     Args:
         request:
 
@@ -220,9 +225,10 @@ def update_registry(request):
     """
     try:
         registry = oai_registry_api.get_by_id(request.GET['id'])
-        oai_registry_api.update_registry_info(registry)
+        job = queue_registry_job(registry, UPDATE)
 
-        return HttpResponse(json.dumps({}), content_type='application/javascript')
+        return HttpResponse(json.dumps({'job_id': str(job.id)}), content_type='application/javascript',
+                            status=status.HTTP_202_ACCEPTED)
     except Exception, e:
         return HttpResponseBadRequest(e.message, content_type='application/javascript')
 
@@ -260,7 +266,7 @@ def check_update_registry(request):
 
 
 def harvest_registry(request):
-    """ Harvest a registry.
+    """ Queue the harvest of a registry.
     Args:
         request:
 
@@ -269,9 +275,10 @@ def harvest_registry(request):
     """
     try:
         registry = oai_registry_api.get_by_id(request.GET['id'])
-        oai_registry_api.harvest_registry(registry)
+        job = queue_registry_job(registry, HARVEST)
 
-        return HttpResponse(json.dumps({}), content_type='application/javascript')
+        return HttpResponse(json.dumps({'job_id': str(job.id)}), content_type='application/javascript',
+                            status=status.HTTP_202_ACCEPTED)
     except Exception, e:
         return HttpResponseBadRequest(e.message, content_type='application/javascript')
 
@@ -297,6 +304,80 @@ def check_harvest_registry(request):
             return HttpResponseBadRequest('An error occurred. Please contact your administrator.')
 
 
+def registry_events(request):
+    """ Stream the status of the registries and the progress of their harvests as they change
+    (Server-Sent Events). A new stream starts with the status of all the registries, a reconnected
+    stream (Last-Event-ID header) with the events published since the last one received. The
+    stream is refused (503) when OAI_HARVESTER_EVENTS_MAX_STREAMS streams are open.
+    Args:
+        request:
+
+    Returns:
+
+    """
+    try:
+        last_event_id = ObjectId(request.META['HTTP_LAST_EVENT_ID'])
+    except (KeyError, TypeError, InvalidId):
+        last_event_id = None
+
+    stream = event_operations.open_stream(_iter_registry_events(last_event_id))
+    if stream is None:
+        return HttpResponse(status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    # The stream is closed with the response
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Do not buffer the stream in a reverse proxy
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _iter_registry_events(last_event_id):
+    """ Yield the Server-Sent Events of the registries.
+    Args:
+        last_event_id: Id of the last event received, None for a new stream.
+
+    Returns:
+
+    """
+    if last_event_id is None:
+        last_event_id = event_operations.get_last_event_id()
+        for registry in oai_registry_api.get_all():
+            yield _format_event(event_operations.REGISTRY,
+                                event_operations.get_registry_status(registry))
+
+    for event in event_operations.iter_events(last_event_id):
+        if event is None:
+            # Keep the connection open
+            yield ': heartbeat\n\n'
+        else:
+            yield _format_event(event.event_type, event.data, event.id)
+
+
+def _format_event(event_type, data, event_id=None):
+    """ Format a Server-Sent Event.
+    Args:
+        event_type:
+        data:
+        event_id:
+
+    Returns:
+
+    """
+    data = dict(data)
+    # Try to format the last update, as the registries list
+    if isinstance(data.get('last_update'), datetime.datetime):
+        try:
+            data['last_update'] = formats.date_format(data['last_update'], "DATETIME_FORMAT")
+        except (TypeError, Exception):
+            data['last_update'] = None
+
+    event = ''
+    if event_id is not None:
+        event += 'id: {0}\n'.format(event_id)
+    return event + 'event: {0}\ndata: {1}\n\n'.format(event_type, json.dumps(data))
+
+
 def all_sets(request):
     """ Returns all the sets of a registry.
     Args:
@@ -37,10 +37,16 @@ class EditRegistryForm(DocumentForm):
                                       widget=forms.NumberInput(attrs={'class': 'form-control'}))
     harvest = forms.BooleanField(label='Enable automatic harvesting', initial=True, required=False,
                                  widget=forms.CheckboxInput())
+    harvest_queue_depth = forms.IntegerField(label='Prefetched pages (0 to fetch pages sequentially)',
+                                             required=False, validators=[MinValueValidator(0)],
+                                             widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    harvest_concurrency = forms.IntegerField(label='Concurrent harvests (metadata formats and sets)',
+                                             required=False, validators=[MinValueValidator(1)],
+                                             widget=forms.NumberInput(attrs={'class': 'form-control'}))
 
     class Meta:
         document = OaiRegistry
-        fields = ['harvest_rate', 'harvest']
+        fields = ['harvest_rate', 'harvest', 'harvest_queue_depth', 'harvest_concurrency']
 
 
 class FormDataModelChoiceFieldMF(forms.ModelMultipleChoiceField):
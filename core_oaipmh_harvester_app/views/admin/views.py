@@ -94,6 +94,14 @@ def registries_view(request):
                 "path": "core_oaipmh_harvester_app/admin/js/registries/list/modals/refresh.js",
                 "is_raw": False
             },
+            {
+                "path": "core_oaipmh_harvester_app/admin/js/registries/list/modals/registry_events.raw.js",
+                "is_raw": True
+            },
+            {
+                "path": "core_oaipmh_harvester_app/admin/js/registries/list/modals/registry_events.js",
+                "is_raw": False
+            },
             EditRegistryView.get_modal_js_path(),
         ],
         "css": [
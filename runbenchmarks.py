@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+""" Run the harvest benchmark against a local Oai-Pmh Data Provider, on mongomock or a local mongod.
+Results are appended to a results file and compared with the last result of the same benchmark.
+"""
+import argparse
+import os
+import sys
+
+import django
+
+DEFAULT_RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results.jsonl')
+BENCHMARK_DATABASE_NAME = 'oai_harvester_benchmark'
+
+
+def parse_args():
+    """ Parse the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the harvest of a local Oai-Pmh Data Provider.')
+    parser.add_argument('--records', type=int, default=1000, help='Number of records.')
+    parser.add_argument('--record-size', type=int, default=1024, help='Size in bytes of the metadata of a record.')
+    parser.add_argument('--page-size', type=int, default=100, help='Number of records of a ListRecords page.')
+    parser.add_argument('--sets', type=int, default=0, help='Number of sets.')
+    parser.add_argument('--latency', type=float, default=0, help='Delay in seconds of each response.')
+    parser.add_argument('--deleted-ratio', type=float, default=0, help='Ratio of deleted records.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Chains of the registry harvested at once.')
+    parser.add_argument('--queue-depth', type=int, default=0, help='ListRecords pages prefetched.')
+    parser.add_argument('--mongo-host', default='mongomock://localhost',
+                        help='Mongo host, e.g. mongodb://localhost:27017. The benchmark database is cleared.')
+    parser.add_argument('--output', default=DEFAULT_RESULTS_FILE, help='Results file.')
+    parser.add_argument('--max-regression', type=float, default=10,
+                        help='Maximum records/sec drop, in percent, from the last result of the same benchmark.')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.test_settings'
+    django.setup()
+
+    from core_main_app.utils.databases.mongoengine_database import Database
+    from tests.benchmarks import harvest_benchmark
+
+    database = Database(args.mongo_host, BENCHMARK_DATABASE_NAME)
+    database.connect()
+    database.clean_database()
+    try:
+        result = harvest_benchmark.run_harvest_benchmark(record_count=args.records,
+                                                         record_size=args.record_size,
+                                                         page_size=args.page_size,
+                                                         set_count=args.sets,
+                                                         latency=args.latency,
+                                                         deleted_ratio=args.deleted_ratio,
+                                                         harvest_concurrency=args.concurrency,
+                                                         harvest_queue_depth=args.queue_depth)
+    finally:
+        database.clean_database()
+        database.disconnect()
+
+    previous_result = harvest_benchmark.get_previous_result(result, args.output)
+    harvest_benchmark.save_result(result, args.output)
+
+    print('Harvested {records} records ({pages} requests, {errors} errors) in {seconds:.2f}s'.format(**result))
+    print('Records/sec: {records_per_second:.1f}, pages/sec: {pages_per_second:.1f}, '
+          'peak RSS: {peak_rss_mb:.1f} MB'.format(**result))
+    print('Mongo ops ({0}): {1}'.format(result['database'], ', '.join(
+        '{0}={1}'.format(op, count) for op, count in sorted(result['mongo_ops'].items()))))
+    regression = harvest_benchmark.get_regression(result, previous_result)
+    if regression is not None:
+        print('Records/sec change since {0} ({1}): {2:+.1f}%'.format(previous_result['date'],
+                                                                     previous_result['revision'], -regression))
+        if regression > args.max_regression:
+            print('REGRESSION: records/sec dropped by more than {0}%'.format(args.max_regression))
+            sys.exit(1)
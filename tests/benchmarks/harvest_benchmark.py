@@ -0,0 +1,234 @@
+""" Harvest benchmark: harvests a local Oai-Pmh Data Provider and measures the throughput of the
+harvester
+"""
+import datetime
+import json
+import os
+import resource
+import subprocess
+import time
+from contextlib import contextmanager
+
+import mongomock
+from mock.mock import patch
+from mongoengine.connection import get_db
+
+from core_oaipmh_harvester_app import settings as harvester_settings
+from core_oaipmh_harvester_app.components.oai_record import api as oai_record_api
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
+from core_oaipmh_harvester_app.utils import session_operations
+from tests.benchmarks.oai_pmh_server import OaiPmhServer
+
+MONGO_OPS = ('insert', 'query', 'update', 'delete', 'getmore', 'command')
+# Harvester settings changing the throughput, saved with the results
+HARVESTER_SETTINGS = ('OAI_HARVESTER_BULK_UPSERT', 'OAI_HARVESTER_CONVERSION_PROCESSES',
+                      'OAI_HARVESTER_SET_REFERENCES', 'OAI_HARVESTER_MAX_REQUESTS_PER_SECOND',
+                      'OAI_HARVESTER_METRICS', 'OAI_HARVESTER_HTTP_POOL_MAXSIZE')
+# mongomock collection methods counted by operation type
+MONGOMOCK_OPS = {'insert': ('insert', 'insert_one', 'insert_many'),
+                 'query': ('find', 'find_one', 'count', 'distinct', 'aggregate'),
+                 'update': ('update', 'update_one', 'update_many', 'replace_one', 'find_one_and_update',
+                            'find_one_and_replace'),
+                 'delete': ('remove', 'delete_one', 'delete_many', 'find_one_and_delete')}
+BULK_WRITE_OPS = {'InsertOne': 'insert', 'UpdateOne': 'update', 'UpdateMany': 'update',
+                  'ReplaceOne': 'update', 'DeleteOne': 'delete', 'DeleteMany': 'delete'}
+
+
+def run_harvest_benchmark(record_count=1000, record_size=1024, page_size=100, set_count=0, latency=0,
+                          deleted_ratio=0, harvest_concurrency=1, harvest_queue_depth=0):
+    """ Harvest a local Oai-Pmh Data Provider in the connected database, and measure the harvest.
+    On mongomock, the xml files of the records are not written (GridFS is not supported).
+
+    Args:
+        record_count: Number of records of the Data Provider.
+        record_size: Size in bytes of the metadata of a record.
+        page_size: Number of records of a ListRecords page.
+        set_count: Number of sets of the Data Provider.
+        latency: Delay in seconds of the Data Provider responses.
+        deleted_ratio: Ratio of deleted records.
+        harvest_concurrency: Number of chains of the registry harvested at once.
+        harvest_queue_depth: Number of ListRecords pages prefetched by the registry harvest.
+
+    Returns:
+        Result (dict): parameters, settings, seconds, records/sec, pages, peak RSS, Mongo op counts.
+
+    """
+    parameters = {'record_count': record_count, 'record_size': record_size, 'page_size': page_size,
+                  'set_count': set_count, 'latency': latency, 'deleted_ratio': deleted_ratio,
+                  'harvest_concurrency': harvest_concurrency, 'harvest_queue_depth': harvest_queue_depth}
+    is_mongomock = isinstance(get_db(), mongomock.Database)
+    with OaiPmhServer(record_count=record_count, record_size=record_size, page_size=page_size,
+                      set_count=set_count, latency=latency, deleted_ratio=deleted_ratio) as server:
+        registry = oai_registry_api.add_registry_by_url(server.url, 60, True)
+        registry.harvest_concurrency = harvest_concurrency
+        registry.harvest_queue_depth = harvest_queue_depth
+        oai_registry_api.upsert(registry)
+        list_records_start = server.request_count
+
+        with _count_mongo_ops(is_mongomock) as mongo_ops, _skip_gridfs(is_mongomock):
+            start = time.time()
+            errors = oai_registry_api.harvest_registry(registry)
+            seconds = time.time() - start
+
+        harvested_records = oai_record_api.get_count_by_registry_id(registry.id)
+        pages = server.request_count - list_records_start
+        # Close the keep-alive connections before stopping the Data Provider
+        session_operations.close_sessions()
+
+    return {'date': datetime.datetime.utcnow().isoformat(),
+            'revision': _get_revision(),
+            'database': 'mongomock' if is_mongomock else 'mongod',
+            'parameters': parameters,
+            'settings': {name: getattr(harvester_settings, name) for name in HARVESTER_SETTINGS},
+            'errors': len(errors),
+            'records': harvested_records,
+            'pages': pages,
+            'seconds': seconds,
+            'records_per_second': harvested_records / seconds if seconds else None,
+            'pages_per_second': pages / seconds if seconds else None,
+            'peak_rss_mb': _get_peak_rss_mb(),
+            'mongo_ops': mongo_ops}
+
+
+def save_result(result, path):
+    """ Append a benchmark result to a results file (one json result per line).
+
+    Args:
+        result: Benchmark result.
+        path: Path of the results file.
+
+    """
+    with open(path, 'a') as results_file:
+        results_file.write(json.dumps(result, sort_keys=True) + '\n')
+
+
+def get_previous_result(result, path):
+    """ Get the last saved result of a benchmark run with the same parameters, settings and database.
+
+    Args:
+        result: Benchmark result.
+        path: Path of the results file.
+
+    Returns:
+        Previous result, None if there is none.
+
+    """
+    if not os.path.exists(path):
+        return None
+
+    previous_result = None
+    with open(path) as results_file:
+        for line in results_file:
+            if not line.strip():
+                continue
+            saved_result = json.loads(line)
+            if all(saved_result.get(key) == result[key] for key in ('parameters', 'settings', 'database')):
+                previous_result = saved_result
+    return previous_result
+
+
+def get_regression(result, previous_result):
+    """ Get the throughput change between two results.
+
+    Args:
+        result: Benchmark result.
+        previous_result: Previous benchmark result.
+
+    Returns:
+        Records/sec drop, in percent (negative for an improvement).
+
+    """
+    if not previous_result or not previous_result.get('records_per_second') or not result['records_per_second']:
+        return None
+    return 100 * (1 - result['records_per_second'] / previous_result['records_per_second'])
+
+
+@contextmanager
+def _count_mongo_ops(is_mongomock):
+    """ Count the Mongo operations by type (insert, query, update, delete...). Uses the opcounters of
+    the server on a mongod (all clients), and counts the collection method calls on mongomock.
+
+    Args:
+        is_mongomock: True on mongomock.
+
+    Returns:
+        Dict of operation counts, filled when the context exits.
+
+    """
+    mongo_ops = dict.fromkeys(MONGO_OPS, 0)
+    if not is_mongomock:
+        start_ops = get_db().command('serverStatus')['opcounters']
+        yield mongo_ops
+        end_ops = get_db().command('serverStatus')['opcounters']
+        for op in MONGO_OPS:
+            mongo_ops[op] = end_ops.get(op, 0) - start_ops.get(op, 0)
+        return
+
+    patches = []
+    for op, method_names in MONGOMOCK_OPS.iteritems():
+        for method_name in method_names:
+            if hasattr(mongomock.Collection, method_name):
+                patches.append(patch.object(mongomock.Collection, method_name,
+                                            _counted(getattr(mongomock.Collection, method_name),
+                                                     mongo_ops, op)))
+    original_bulk_write = mongomock.Collection.bulk_write
+
+    def bulk_write(collection, requests, *args, **kwargs):
+        for request in requests:
+            mongo_ops[BULK_WRITE_OPS.get(type(request).__name__, 'command')] += 1
+        return original_bulk_write(collection, requests, *args, **kwargs)
+
+    patches.append(patch.object(mongomock.Collection, 'bulk_write', bulk_write))
+    for method_patch in patches:
+        method_patch.start()
+    try:
+        yield mongo_ops
+    finally:
+        for method_patch in patches:
+            method_patch.stop()
+
+
+def _counted(method, mongo_ops, op):
+    """ Wrap a collection method to count its calls.
+    """
+    def counted_method(*args, **kwargs):
+        mongo_ops[op] += 1
+        return method(*args, **kwargs)
+    return counted_method
+
+
+@contextmanager
+def _skip_gridfs(is_mongomock):
+    """ Do not write the xml files of the records on mongomock, which does not support GridFS.
+    """
+    if not is_mongomock:
+        yield
+        return
+
+    with patch.object(OaiRecord, 'convert_to_file', lambda oai_record: None):
+        yield
+
+
+def _get_peak_rss_mb():
+    """ Peak resident set size of the process, plus the peak of its largest worker process
+    (conversion pool).
+
+    Returns:
+        Peak RSS in MB.
+
+    """
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + \
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak_rss_kb / 1024.0
+
+
+def _get_revision():
+    """ Git revision of the harvester, None outside of a git repository.
+    """
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
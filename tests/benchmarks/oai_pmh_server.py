@@ -0,0 +1,305 @@
+""" Local, configurable Oai-Pmh Data Provider used by the harvest benchmarks
+"""
+import calendar
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+METADATA_PREFIX = 'oai_bench'
+METADATA_NAMESPACE = 'http://benchmark.oai/bench'
+FIRST_DATESTAMP = 1483228800  # 2017-01-01T00:00:00Z
+DATESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+TOKEN_SEPARATOR = '|'
+
+OAI_PMH_HEADER = '<?xml version="1.0" encoding="UTF-8"?>' \
+                 '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">' \
+                 '<responseDate>{0}</responseDate><request verb="{1}">{2}</request>'
+OAI_PMH_FOOTER = '</OAI-PMH>'
+
+SCHEMA = '<?xml version="1.0" encoding="UTF-8"?>' \
+         '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">' \
+         '<xs:element name="bench"><xs:complexType><xs:sequence>' \
+         '<xs:element name="id" type="xs:integer"/>' \
+         '<xs:element name="text" type="xs:string"/>' \
+         '</xs:sequence></xs:complexType></xs:element>' \
+         '</xs:schema>'
+
+
+class OaiPmhServer(object):
+    """ Oai-Pmh Data Provider serving generated records from a local HTTP server, in a background
+    thread. Records are generated on the fly from their index: the same settings always serve the
+    same records.
+    """
+
+    def __init__(self, record_count=1000, record_size=1024, page_size=100, set_count=0, latency=0,
+                 deleted_ratio=0, port=0):
+        """ Constructor.
+
+        Args:
+            record_count: Number of records.
+            record_size: Size in bytes of the metadata of a record.
+            page_size: Number of records of a ListRecords page.
+            set_count: Number of sets. Records are spread over the sets. 0 for no set hierarchy.
+            latency: Delay in seconds before each response.
+            deleted_ratio: Ratio of deleted records, between 0 and 1.
+            port: Port of the server. 0 for a free port.
+
+        """
+        self.record_count = record_count
+        self.record_size = record_size
+        self.page_size = page_size
+        self.set_count = set_count
+        self.latency = latency
+        self.deleted_ratio = deleted_ratio
+        self.port = port
+        self.request_count = 0
+        self._request_count_lock = threading.Lock()
+        self._http_server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """ Base URL of the Data Provider.
+
+        Returns:
+            URL.
+
+        """
+        return 'http://127.0.0.1:{0}/oai'.format(self._http_server.server_port)
+
+    def start(self):
+        """ Start the server in a background thread.
+        """
+        server = self
+
+        class Handler(OaiPmhRequestHandler):
+            oai_pmh_server = server
+
+        self._http_server = _ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self._thread = threading.Thread(target=self._http_server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the server.
+        """
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def count_request(self):
+        """ Count a request received by the server.
+        """
+        with self._request_count_lock:
+            self.request_count += 1
+
+    def is_deleted(self, index):
+        """ Whether a record is deleted. Deleted records are spread evenly.
+
+        Args:
+            index: Index of the record.
+
+        Returns:
+            True if the record is deleted.
+
+        """
+        return int((index + 1) * self.deleted_ratio) > int(index * self.deleted_ratio)
+
+    def get_set_spec(self, index):
+        """ Get the set spec of a record.
+
+        Args:
+            index: Index of the record.
+
+        Returns:
+            Set spec, None without set hierarchy.
+
+        """
+        if not self.set_count:
+            return None
+        return 'set_{0}'.format(index % self.set_count)
+
+    def get_datestamp(self, index):
+        """ Get the datestamp of a record: one record per second from 2017-01-01.
+
+        Args:
+            index: Index of the record.
+
+        Returns:
+            Datestamp.
+
+        """
+        return time.strftime(DATESTAMP_FORMAT, time.gmtime(FIRST_DATESTAMP + index))
+
+    def get_record_xml(self, index):
+        """ Get the xml of a record.
+
+        Args:
+            index: Index of the record.
+
+        Returns:
+            Record element.
+
+        """
+        set_spec = self.get_set_spec(index)
+        header = '<identifier>oai:benchmark:{0}</identifier><datestamp>{1}</datestamp>{2}'.format(
+            index, self.get_datestamp(index), '<setSpec>{0}</setSpec>'.format(set_spec) if set_spec else '')
+        if self.is_deleted(index):
+            return '<record><header status="deleted">{0}</header></record>'.format(header)
+        text = ('record {0} '.format(index) * (self.record_size // 8 + 1))[:self.record_size]
+        metadata = '<bench xmlns="{0}"><id>{1}</id><text>{2}</text></bench>'.format(METADATA_NAMESPACE,
+                                                                                     index, text)
+        return '<record><header>{0}</header><metadata>{1}</metadata></record>'.format(header, metadata)
+
+    def get_indexes(self, set_spec=None, from_date=None):
+        """ Get the indexes of the records selected by a ListRecords request.
+
+        Args:
+            set_spec: Set spec.
+            from_date: From date.
+
+        Returns:
+            List of record indexes.
+
+        """
+        first = 0
+        if from_date:
+            first = max(0, int(_parse_datestamp(from_date) - FIRST_DATESTAMP))
+        return [index for index in xrange(first, self.record_count)
+                if set_spec is None or self.get_set_spec(index) == set_spec]
+
+
+class OaiPmhRequestHandler(BaseHTTPRequestHandler):
+    """ Handler of the Oai-Pmh requests: Identify, ListSets, ListMetadataFormats and ListRecords.
+    The schema of the metadata format is served at /schema.xsd.
+    """
+    oai_pmh_server = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.oai_pmh_server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        url = urlparse(self.path)
+        if url.path == '/schema.xsd':
+            return self._send_response(SCHEMA)
+
+        params = {key: values[0] for key, values in parse_qs(url.query).iteritems()}
+        verb = params.get('verb')
+        if verb == 'Identify':
+            return self._send_oai_pmh_response(verb, self._identify())
+        elif verb == 'ListSets':
+            if not server.set_count:
+                return self._send_oai_pmh_response(verb, '<error code="noSetHierarchy"/>')
+            return self._send_oai_pmh_response(verb, self._list_sets())
+        elif verb == 'ListMetadataFormats':
+            return self._send_oai_pmh_response(verb, self._list_metadata_formats())
+        elif verb == 'ListRecords':
+            return self._send_oai_pmh_response(verb, self._list_records(params))
+        return self._send_oai_pmh_response(verb, '<error code="badVerb"/>')
+
+    def log_message(self, format_, *args):
+        # Keep the benchmark output readable
+        pass
+
+    def _identify(self):
+        """ Body of an Identify response.
+        """
+        return '<Identify><repositoryName>Benchmark Data Provider</repositoryName>' \
+               '<baseURL>{0}</baseURL><protocolVersion>2.0</protocolVersion>' \
+               '<adminEmail>benchmark@localhost</adminEmail>' \
+               '<earliestDatestamp>{1}</earliestDatestamp>' \
+               '<deletedRecord>persistent</deletedRecord><granularity>YYYY-MM-DDThh:mm:ssZ</granularity>' \
+               '<description><oai-identifier xmlns="http://www.openarchives.org/OAI/2.0/oai-identifier">' \
+               '<scheme>oai</scheme><repositoryIdentifier>benchmark</repositoryIdentifier>' \
+               '<delimiter>:</delimiter><sampleIdentifier>oai:benchmark:0</sampleIdentifier>' \
+               '</oai-identifier></description></Identify>'.format(escape(self.oai_pmh_server.url),
+                                                                   self.oai_pmh_server.get_datestamp(0))
+
+    def _list_sets(self):
+        """ Body of a ListSets response.
+        """
+        sets = ''.join('<set><setSpec>set_{0}</setSpec><setName>Set {0}</setName></set>'.format(index)
+                       for index in range(self.oai_pmh_server.set_count))
+        return '<ListSets>{0}</ListSets>'.format(sets)
+
+    def _list_metadata_formats(self):
+        """ Body of a ListMetadataFormats response.
+        """
+        schema = 'http://127.0.0.1:{0}/schema.xsd'.format(self.server.server_port)
+        return '<ListMetadataFormats><metadataFormat><metadataPrefix>{0}</metadataPrefix>' \
+               '<schema>{1}</schema><metadataNamespace>{2}</metadataNamespace>' \
+               '</metadataFormat></ListMetadataFormats>'.format(METADATA_PREFIX, schema, METADATA_NAMESPACE)
+
+    def _list_records(self, params):
+        """ Body of a ListRecords response. The resumption token holds the offset, the set and the
+        from date of the request.
+        """
+        server = self.oai_pmh_server
+        if 'resumptionToken' in params:
+            offset, set_spec, from_date = params['resumptionToken'].split(TOKEN_SEPARATOR)
+            offset = int(offset)
+        else:
+            if params.get('metadataPrefix') != METADATA_PREFIX:
+                return '<error code="cannotDisseminateFormat"/>'
+            offset, set_spec, from_date = 0, params.get('set', ''), params.get('from', '')
+        indexes = server.get_indexes(set_spec or None, from_date or None)
+        if len(indexes) == 0:
+            return '<error code="noRecordsMatch"/>'
+        page = indexes[offset:offset + server.page_size]
+        records = ''.join(server.get_record_xml(index) for index in page)
+        next_offset = offset + server.page_size
+        resumption_token = ''
+        if next_offset < len(indexes):
+            resumption_token = TOKEN_SEPARATOR.join([str(next_offset), set_spec, from_date])
+        records += '<resumptionToken completeListSize="{0}" cursor="{1}">{2}</resumptionToken>'.format(
+            len(indexes), offset, resumption_token)
+        return '<ListRecords>{0}</ListRecords>'.format(records)
+
+    def _send_oai_pmh_response(self, verb, body):
+        """ Send an Oai-Pmh response.
+        """
+        header = OAI_PMH_HEADER.format(time.strftime(DATESTAMP_FORMAT, time.gmtime()), escape(verb or ''),
+                                       escape(self.oai_pmh_server.url))
+        self._send_response(header + body + OAI_PMH_FOOTER)
+
+    def _send_response(self, content):
+        """ Send a XML response.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """ HTTP server handling each request in a thread.
+    """
+    daemon_threads = True
+
+
+def _parse_datestamp(datestamp):
+    """ Parse an Oai-Pmh UTC datestamp (day or second granularity).
+
+    Args:
+        datestamp: Datestamp.
+
+    Returns:
+        Timestamp.
+
+    """
+    date_format = DATESTAMP_FORMAT if 'T' in datestamp else '%Y-%m-%d'
+    return calendar.timegm(time.strptime(datestamp, date_format))
@@ -0,0 +1,74 @@
+""" Int Test harvest benchmark
+"""
+import os
+import tempfile
+
+import requests
+
+from core_main_app.utils.integration_tests.integration_base_test_case import MongoIntegrationBaseTestCase
+from tests.benchmarks import harvest_benchmark
+from tests.benchmarks.oai_pmh_server import OaiPmhServer
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+
+class TestOaiPmhServer(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def test_list_records_pages_follow_resumption_token(self):
+        # Arrange
+        params = {'verb': 'ListRecords', 'metadataPrefix': 'oai_bench', 'set': 'set_1'}
+
+        # Act
+        with OaiPmhServer(record_count=10, page_size=2, set_count=2) as server:
+            first_page = requests.get(server.url, params=params).text
+            last_page = requests.get(server.url, params={'verb': 'ListRecords',
+                                                         'resumptionToken': '4|set_1|'}).text
+
+        # Assert
+        self.assertIn('<identifier>oai:benchmark:1</identifier>', first_page)
+        self.assertIn('<identifier>oai:benchmark:3</identifier>', first_page)
+        self.assertIn('completeListSize="5" cursor="0">2|set_1|</resumptionToken>', first_page)
+        self.assertIn('<identifier>oai:benchmark:9</identifier>', last_page)
+        self.assertIn('cursor="4"></resumptionToken>', last_page)
+
+    def test_deleted_records_are_spread_evenly(self):
+        # Act
+        server = OaiPmhServer(record_count=100, deleted_ratio=0.25)
+        deleted = [index for index in range(100) if server.is_deleted(index)]
+
+        # Assert
+        self.assertEquals(len(deleted), 25)
+
+
+class TestRunHarvestBenchmark(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def test_run_harvest_benchmark_harvests_all_records(self):
+        # Act
+        result = harvest_benchmark.run_harvest_benchmark(record_count=25, record_size=64, page_size=10,
+                                                         set_count=2)
+
+        # Assert
+        self.assertEquals(result['errors'], 0)
+        self.assertEquals(result['records'], 25)
+        self.assertEquals(result['pages'], 3)
+        self.assertEquals(result['database'], 'mongomock')
+        self.assertTrue(result['mongo_ops']['insert'] > 0)
+        self.assertTrue(result['peak_rss_mb'] > 0)
+
+    def test_get_previous_result_returns_last_result_of_same_benchmark(self):
+        # Arrange
+        result = {'parameters': {'record_count': 10}, 'settings': {}, 'database': 'mongomock',
+                  'records_per_second': 80.0}
+        other_result = dict(result, parameters={'record_count': 20}, records_per_second=10.0)
+        path = os.path.join(tempfile.mkdtemp(), 'results.jsonl')
+        harvest_benchmark.save_result(dict(result, records_per_second=50.0), path)
+        harvest_benchmark.save_result(dict(result, records_per_second=100.0), path)
+        harvest_benchmark.save_result(other_result, path)
+
+        # Act
+        previous_result = harvest_benchmark.get_previous_result(result, path)
+
+        # Assert
+        self.assertEquals(previous_result['records_per_second'], 100.0)
+        self.assertAlmostEquals(harvest_benchmark.get_regression(result, previous_result), 20.0)
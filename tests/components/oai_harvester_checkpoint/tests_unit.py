@@ -0,0 +1,117 @@
+from unittest.case import TestCase
+from bson.objectid import ObjectId
+from mock.mock import Mock, patch
+import core_oaipmh_harvester_app.components.oai_harvester_checkpoint.api as harvester_checkpoint_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_checkpoint.models import OaiHarvesterCheckpoint
+import datetime
+
+
+class TestOaiHarvesterCheckpointGetByMetadataAndSet(TestCase):
+    @patch.object(OaiHarvesterCheckpoint, 'get_by_metadata_format_and_set')
+    def test_get_by_metadata_format_and_set_return_object(self, get_by_metadata_format_and_set):
+        # Arrange
+        mock_oai_harvester_checkpoint = _create_mock_oai_harvester_checkpoint()
+
+        get_by_metadata_format_and_set.return_value = mock_oai_harvester_checkpoint
+
+        # Act
+        result = harvester_checkpoint_api.\
+            get_by_metadata_format_and_set(mock_oai_harvester_checkpoint.harvester_metadata_format,
+                                           mock_oai_harvester_checkpoint.harvester_set)
+
+        # Assert
+        self.assertIsInstance(result, OaiHarvesterCheckpoint)
+
+    @patch.object(OaiHarvesterCheckpoint, 'get_by_metadata_format_and_set')
+    def test_get_by_metadata_format_and_set_raises_exception_if_object_does_not_exist(self,
+                                                                                      get_by_metadata_format_and_set):
+        # Arrange
+        get_by_metadata_format_and_set.side_effect = exceptions.DoesNotExist("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            harvester_checkpoint_api.get_by_metadata_format_and_set(ObjectId(), ObjectId())
+
+    @patch.object(OaiHarvesterCheckpoint, 'get_by_metadata_format_and_set')
+    def test_get_by_metadata_format_and_set_raises_exception_if_internal_error(self, get_by_metadata_format_and_set):
+        # Arrange
+        get_by_metadata_format_and_set.side_effect = exceptions.ModelError("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_checkpoint_api.get_by_metadata_format_and_set(ObjectId(), ObjectId())
+
+
+class TestOaiHarvesterCheckpointUpsert(TestCase):
+    @patch.object(OaiHarvesterCheckpoint, 'upsert_by_metadata_format_and_set')
+    def test_upsert_sets_all_checkpoint_fields(self, mock_upsert):
+        # Arrange
+        metadata_format = ObjectId()
+        registry = ObjectId()
+        harvest_date = datetime.datetime.now()
+
+        # Act
+        harvester_checkpoint_api.upsert_by_metadata_format_and_set(metadata_format, None, registry,
+                                                                   "token", "2017-01-01T00:00:00Z",
+                                                                   harvest_date, cursor=100,
+                                                                   complete_list_size=1000)
+
+        # Assert
+        mock_upsert.assert_called_once_with(metadata_format, None,
+                                            set__registry=registry,
+                                            set__resumption_token="token",
+                                            set__from_date="2017-01-01T00:00:00Z",
+                                            set__harvest_date=harvest_date,
+                                            set__cursor=100,
+                                            set__complete_list_size=1000,
+                                            set__expiration_date=None)
+
+    @patch.object(OaiHarvesterCheckpoint, 'upsert_by_metadata_format_and_set')
+    def test_upsert_raises_exception_if_internal_error(self, mock_upsert):
+        # Arrange
+        mock_upsert.side_effect = exceptions.ModelError("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_checkpoint_api.upsert_by_metadata_format_and_set(ObjectId(), None, ObjectId(),
+                                                                       "token", None,
+                                                                       datetime.datetime.now())
+
+
+class TestOaiHarvesterCheckpointDelete(TestCase):
+    @patch.object(OaiHarvesterCheckpoint, 'delete_by_metadata_format_and_set')
+    def test_delete_by_metadata_format_and_set(self, mock_delete):
+        # Arrange
+        metadata_format = ObjectId()
+        set_ = ObjectId()
+
+        # Act
+        harvester_checkpoint_api.delete_by_metadata_format_and_set(metadata_format, set_)
+
+        # Assert
+        mock_delete.assert_called_once_with(metadata_format, set_)
+
+    @patch.object(OaiHarvesterCheckpoint, 'delete_by_metadata_format_and_set')
+    def test_delete_raises_exception_if_internal_error(self, mock_delete):
+        # Arrange
+        mock_delete.side_effect = exceptions.ModelError("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_checkpoint_api.delete_by_metadata_format_and_set(ObjectId(), None)
+
+
+def _create_mock_oai_harvester_checkpoint():
+    """ Mock an OaiHarvesterCheckpoint.
+
+        Returns:
+            OaiHarvesterCheckpoint mock.
+
+    """
+    mock_oai_harvester_checkpoint = Mock(spec=OaiHarvesterCheckpoint)
+    mock_oai_harvester_checkpoint.harvester_metadata_format = ObjectId()
+    mock_oai_harvester_checkpoint.harvester_set = ObjectId()
+    mock_oai_harvester_checkpoint.resumption_token = "token"
+    mock_oai_harvester_checkpoint.harvest_date = datetime.datetime.now()
+    return mock_oai_harvester_checkpoint
@@ -0,0 +1,56 @@
+from unittest.case import TestCase
+from bson.objectid import ObjectId
+from mock.mock import patch
+import core_oaipmh_harvester_app.components.oai_harvester_event.api as harvester_event_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_event.models import OaiHarvesterEvent
+
+
+class TestOaiHarvesterEventGetAllAfter(TestCase):
+    @patch.object(OaiHarvesterEvent, 'get_all_after')
+    def test_get_all_after_return_collection_of_events(self, mock_get_all_after):
+        # Arrange
+        mock_get_all_after.return_value = [OaiHarvesterEvent(), OaiHarvesterEvent()]
+
+        # Act
+        result = harvester_event_api.get_all_after(ObjectId())
+
+        # Assert
+        self.assertTrue(all(isinstance(item, OaiHarvesterEvent) for item in result))
+
+
+class TestOaiHarvesterEventGetLastId(TestCase):
+    @patch.object(OaiHarvesterEvent, 'get_last_id')
+    def test_get_last_id_return_id(self, mock_get_last_id):
+        # Arrange
+        event_id = ObjectId()
+        mock_get_last_id.return_value = event_id
+
+        # Act
+        result = harvester_event_api.get_last_id()
+
+        # Assert
+        self.assertEquals(result, event_id)
+
+
+class TestOaiHarvesterEventPublish(TestCase):
+    @patch.object(OaiHarvesterEvent, 'save')
+    def test_publish_return_event(self, mock_save):
+        # Arrange
+        event = OaiHarvesterEvent(event_type='registry', data={'is_harvesting': True})
+        mock_save.return_value = event
+
+        # Act
+        result = harvester_event_api.publish(None, 'registry', {'is_harvesting': True})
+
+        # Assert
+        self.assertIsInstance(result, OaiHarvesterEvent)
+
+    @patch.object(OaiHarvesterEvent, 'save')
+    def test_publish_raises_exception_if_internal_error(self, mock_save):
+        # Arrange
+        mock_save.side_effect = Exception("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_event_api.publish(None, 'registry', {})
@@ -0,0 +1,59 @@
+import datetime
+from unittest.case import TestCase
+
+from bson.objectid import ObjectId
+from mock.mock import patch
+
+import core_oaipmh_harvester_app.components.oai_harvester_event_stream.api as harvester_event_stream_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_event_stream.models import \
+    OaiHarvesterEventStream
+
+
+class TestOaiHarvesterEventStreamCreate(TestCase):
+    @patch.object(OaiHarvesterEventStream, 'save')
+    def test_create_return_stream(self, mock_save):
+        # Arrange
+        expiration_date = datetime.datetime.utcnow()
+        mock_save.return_value = OaiHarvesterEventStream(expiration_date=expiration_date)
+
+        # Act
+        result = harvester_event_stream_api.create(expiration_date)
+
+        # Assert
+        self.assertIsInstance(result, OaiHarvesterEventStream)
+
+    @patch.object(OaiHarvesterEventStream, 'save')
+    def test_create_raises_exception_if_internal_error(self, mock_save):
+        # Arrange
+        mock_save.side_effect = Exception("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_event_stream_api.create(datetime.datetime.utcnow())
+
+
+class TestOaiHarvesterEventStreamGetOpenCount(TestCase):
+    @patch.object(OaiHarvesterEventStream, 'get_open_count')
+    def test_get_open_count_return_count(self, mock_get_open_count):
+        # Arrange
+        mock_get_open_count.return_value = 2
+
+        # Act
+        result = harvester_event_stream_api.get_open_count()
+
+        # Assert
+        self.assertEquals(result, 2)
+
+
+class TestOaiHarvesterEventStreamDeleteById(TestCase):
+    @patch.object(OaiHarvesterEventStream, 'delete_by_id')
+    def test_delete_by_id_deletes_stream(self, mock_delete_by_id):
+        # Arrange
+        stream_id = ObjectId()
+
+        # Act
+        harvester_event_stream_api.delete_by_id(stream_id)
+
+        # Assert
+        mock_delete_by_id.assert_called_once_with(stream_id)
@@ -0,0 +1,42 @@
+from unittest.case import TestCase
+from bson.objectid import ObjectId
+from mock.mock import patch
+import core_oaipmh_harvester_app.components.oai_harvester_job.api as harvester_job_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob, PENDING
+
+
+class TestOaiHarvesterJobGetById(TestCase):
+    @patch.object(OaiHarvesterJob, 'get_by_id')
+    def test_get_by_id_return_job(self, mock_get_by_id):
+        # Arrange
+        mock_get_by_id.return_value = OaiHarvesterJob()
+
+        # Act
+        result = harvester_job_api.get_by_id(ObjectId())
+
+        # Assert
+        self.assertIsInstance(result, OaiHarvesterJob)
+
+    @patch.object(OaiHarvesterJob, 'get_by_id')
+    def test_get_by_id_raises_exception_if_object_does_not_exist(self, mock_get_by_id):
+        # Arrange
+        mock_get_by_id.side_effect = exceptions.DoesNotExist("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.DoesNotExist):
+            harvester_job_api.get_by_id(ObjectId())
+
+
+class TestOaiHarvesterJobUpsert(TestCase):
+    @patch.object(OaiHarvesterJob, 'save')
+    def test_upsert_return_pending_job(self, mock_save):
+        # Arrange
+        job = OaiHarvesterJob()
+        mock_save.return_value = job
+
+        # Act
+        result = harvester_job_api.upsert(job)
+
+        # Assert
+        self.assertEquals(result.status, PENDING)
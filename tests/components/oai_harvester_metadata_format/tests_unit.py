@@ -14,6 +14,7 @@ import core_oaipmh_harvester_app.components.oai_harvester_metadata_format.api \
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models \
     import OaiHarvesterMetadataFormat
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.utils import schema_cache_operations
 
 
 class TestOaiHarvesterMetadataFormatGetById(TestCase):
@@ -224,8 +225,14 @@ class TestOaiHarvesterMetadataFormatUpdateForAllByListIds(TestCase):
 
 
 class TestInitSchemaInfo(TestCase):
+    def setUp(self):
+        schema_cache_operations.clear_schema(_create_mock_oai_harvester_metadata_format().schema)
+
+    def tearDown(self):
+        schema_cache_operations.clear_schema(_create_mock_oai_harvester_metadata_format().schema)
+
     @patch.object(api_template, 'get_all_by_hash')
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_init_schema_info_return_object(self, mock_get, mock_get_all_by_hash):
         # Arrange
         mock_oai_harvester_metadata_format = _create_mock_oai_harvester_metadata_format()
@@ -241,7 +248,7 @@ class TestInitSchemaInfo(TestCase):
         self.assertIsInstance(result, OaiHarvesterMetadataFormat)
 
     @patch.object(api_template, 'get_all_by_hash')
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_init_schema_info_return_object_with_xml_schema(self, mock_get, mock_get_all_by_hash):
         # Arrange
         text = '<test>Hello</test>'
@@ -257,9 +264,9 @@ class TestInitSchemaInfo(TestCase):
         # Assert
         self.assertEquals(result.xml_schema, text)
 
-    @patch.object(harvester_metadata_format_api, 'get_hash')
+    @patch.object(schema_cache_operations, 'get_hash')
     @patch.object(api_template, 'get_all_by_hash')
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_init_schema_info_return_object_with_hash(self, mock_get, mock_get_all_by_hash, mock_get_hash):
         # Arrange
         mock_oai_harvester_metadata_format = _create_mock_oai_harvester_metadata_format()
@@ -277,7 +284,7 @@ class TestInitSchemaInfo(TestCase):
         self.assertEquals(result.hash, hash_)
 
     @patch.object(api_template, 'get_all_by_hash')
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_init_schema_info_return_object_with_template(self, mock_get, mock_get_all_by_hash):
         # Arrange
         mock_oai_harvester_metadata_format = _create_mock_oai_harvester_metadata_format()
@@ -293,7 +300,29 @@ class TestInitSchemaInfo(TestCase):
         # Assert
         self.assertEquals(result.template, list_template[0])
 
-    @patch.object(requests, 'get')
+    @patch.object(api_template, 'get_all_by_hash')
+    @patch.object(requests.Session, 'get')
+    def test_init_schema_info_skips_template_search_if_hash_is_unchanged(self, mock_get,
+                                                                         mock_get_all_by_hash):
+        # Arrange
+        template = Template()
+        mock_oai_harvester_metadata_format = _create_mock_oai_harvester_metadata_format()
+        mock_oai_harvester_metadata_format.template = template
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.text = '<test>Hello</test>'
+        mock_get.return_value.headers = {}
+        mock_oai_harvester_metadata_format.hash = harvester_metadata_format_api.\
+            init_schema_info(mock_oai_harvester_metadata_format).hash
+        mock_get_all_by_hash.reset_mock()
+
+        # Act
+        result = harvester_metadata_format_api.init_schema_info(mock_oai_harvester_metadata_format)
+
+        # Assert
+        self.assertEquals(result.template, template)
+        self.assertFalse(mock_get_all_by_hash.called)
+
+    @patch.object(requests.Session, 'get')
     def test_init_schema_info_raises_api_error_if_bad_status_code(self, mock_get):
         # Arrange
         mock_oai_harvester_metadata_format = _create_mock_oai_harvester_metadata_format()
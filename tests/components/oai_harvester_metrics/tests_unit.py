@@ -0,0 +1,53 @@
+from unittest.case import TestCase
+from bson.objectid import ObjectId
+from mock.mock import patch
+import core_oaipmh_harvester_app.components.oai_harvester_metrics.api as harvester_metrics_api
+from core_main_app.commons import exceptions
+from core_oaipmh_harvester_app.components.oai_harvester_metrics.models import OaiHarvesterMetrics
+
+
+class TestOaiHarvesterMetricsGetAll(TestCase):
+    @patch.object(OaiHarvesterMetrics, 'get_all')
+    def test_get_all_return_collection_of_metrics(self, mock_get_all):
+        # Arrange
+        mock_get_all.return_value = [OaiHarvesterMetrics(), OaiHarvesterMetrics()]
+
+        # Act
+        result = harvester_metrics_api.get_all()
+
+        # Assert
+        self.assertTrue(all(isinstance(item, OaiHarvesterMetrics) for item in result))
+
+
+class TestOaiHarvesterMetricsInc(TestCase):
+    @patch.object(OaiHarvesterMetrics, 'inc_by_metadata_format_and_set')
+    def test_inc_increments_counters_and_stage_timings(self, mock_inc):
+        # Arrange
+        metadata_format = ObjectId()
+        registry = ObjectId()
+
+        # Act
+        harvester_metrics_api.inc_by_metadata_format_and_set(metadata_format, None, registry, pages=1,
+                                                             records=10, bytes_=2048, seconds=2.0,
+                                                             stage_seconds={'fetch': 1.5, 'mongo': 0.5})
+
+        # Assert
+        mock_inc.assert_called_once_with(metadata_format, None,
+                                         set__registry=registry,
+                                         inc__pages=1,
+                                         inc__records=10,
+                                         inc__bytes=2048,
+                                         inc__seconds=2.0,
+                                         inc__fetch_seconds=1.5,
+                                         inc__mongo_seconds=0.5)
+
+    @patch.object(OaiHarvesterMetrics, 'inc_by_metadata_format_and_set')
+    def test_inc_raises_exception_if_internal_error(self, mock_inc):
+        # Arrange
+        mock_inc.side_effect = exceptions.ModelError("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            harvester_metrics_api.inc_by_metadata_format_and_set(ObjectId(), None, ObjectId(), pages=1,
+                                                                 records=0, bytes_=0, seconds=0,
+                                                                 stage_seconds={})
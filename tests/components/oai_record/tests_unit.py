@@ -3,6 +3,9 @@ from unittest.case import TestCase
 
 from bson.objectid import ObjectId
 from mock.mock import Mock, patch
+from mongoengine.errors import NotUniqueError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 import core_oaipmh_harvester_app.components.oai_record.api as oai_record_api
 from core_main_app.commons import exceptions
@@ -40,8 +43,150 @@ class TestOaiRecordUpsert(TestCase):
         # Act + Assert
         with self.assertRaises(Exception):
             oai_record_api.upsert(self.oai_record)
+
+    @patch.object(OaiRecord, 'get_by_identifier_and_metadata_format')
+    @patch.object(OaiRecord, 'save')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_updates_record_inserted_by_concurrent_chain(self, mock_convert_file, mock_save,
+                                                                mock_get_by_identifier):
+        # Arrange
+        record_id = ObjectId()
+        mock_save.side_effect = [NotUniqueError("Duplicate."), self.oai_record]
+        mock_get_by_identifier.return_value = Mock(id=record_id)
+
+        # Act
+        oai_record_api.upsert(self.oai_record)
+
+        # Assert
+        self.assertEquals(self.oai_record.id, record_id)
+        self.assertEquals(mock_save.call_count, 2)
             
 
+class TestOaiRecordUpsertMany(TestCase):
+    def setUp(self):
+        self.oai_record = _create_oai_record()
+
+    @patch.object(OaiRecord, 'bulk_upsert')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_many_converts_and_bulk_writes(self, mock_convert_file, mock_bulk_upsert):
+        # Arrange
+        mock_convert_file.return_value = None
+
+        # Act
+        oai_record_api.upsert_many([self.oai_record])
+
+        # Assert
+        self.assertEquals(self.oai_record.title, self.oai_record.identifier)
+        self.assertNotEqual(self.oai_record.dict_content, {})
+        mock_bulk_upsert.assert_called_once_with([self.oai_record])
+
+    @patch.object(OaiRecord, 'bulk_upsert')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_many_does_not_convert_deleted_record(self, mock_convert_file, mock_bulk_upsert):
+        # Arrange
+        self.oai_record.xml_content = None
+        self.oai_record.deleted = True
+
+        # Act
+        oai_record_api.upsert_many([self.oai_record])
+
+        # Assert
+        self.assertFalse(mock_convert_file.called)
+        mock_bulk_upsert.assert_called_once_with([self.oai_record])
+
+    @patch.object(OaiRecord, 'bulk_upsert')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_many_raises_exception_if_bulk_write_failed(self, mock_convert_file,
+                                                               mock_bulk_upsert):
+        # Arrange
+        mock_convert_file.return_value = None
+        mock_bulk_upsert.side_effect = exceptions.ModelError("Error.")
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            oai_record_api.upsert_many([self.oai_record])
+
+
+class TestOaiRecordBulkUpsert(TestCase):
+    @patch.object(OaiRecord, '_get_collection')
+    def test_bulk_upsert_writes_again_after_duplicate_key_error(self, mock_get_collection):
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.title = oai_record.identifier
+        oai_record.xml_content = None
+        mock_get_collection.return_value.bulk_write.side_effect = \
+            [BulkWriteError({'writeErrors': [{'code': 11000}]}), None]
+
+        # Act
+        OaiRecord.bulk_upsert([oai_record])
+
+        # Assert
+        self.assertEquals(mock_get_collection.return_value.bulk_write.call_count, 2)
+
+    @patch.object(OaiRecord, '_get_collection')
+    def test_bulk_upsert_raises_model_error_if_other_write_error(self, mock_get_collection):
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.title = oai_record.identifier
+        oai_record.xml_content = None
+        mock_get_collection.return_value.bulk_write.side_effect = \
+            BulkWriteError({'writeErrors': [{'code': 2}]})
+
+        # Act + Assert
+        with self.assertRaises(exceptions.ModelError):
+            OaiRecord.bulk_upsert([oai_record])
+
+    @patch.object(OaiRecord, '_get_collection')
+    def test_bulk_upsert_only_updates_header_of_deleted_record(self, mock_get_collection):
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.title = oai_record.identifier
+        oai_record.xml_content = None
+        oai_record.deleted = True
+
+        # Act
+        OaiRecord.bulk_upsert([oai_record])
+
+        # Assert
+        operations = mock_get_collection.return_value.bulk_write.call_args[0][0]
+        self.assertEquals(len(operations), 1)
+        self.assertIsInstance(operations[0], UpdateOne)
+        self.assertTrue(operations[0]._upsert)
+
+
+class TestOaiRecordUpdateHeaders(TestCase):
+    @patch.object(OaiRecord, 'bulk_update_headers')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_update_headers_does_not_convert(self, mock_convert_file, mock_bulk_update_headers):
+        # Arrange
+        oai_record = _create_oai_record()
+
+        # Act
+        oai_record_api.update_headers([oai_record])
+
+        # Assert
+        self.assertFalse(mock_convert_file.called)
+        self.assertEquals(oai_record.title, oai_record.identifier)
+        mock_bulk_update_headers.assert_called_once_with([oai_record])
+
+    @patch.object(OaiRecord, '_get_collection')
+    def test_bulk_update_headers_only_sets_header(self, mock_get_collection):
+        # Arrange
+        oai_record = _create_oai_record()
+        oai_record.title = oai_record.identifier
+
+        # Act
+        OaiRecord.bulk_update_headers([oai_record])
+
+        # Assert
+        operations = mock_get_collection.return_value.bulk_write.call_args[0][0]
+        self.assertEquals(len(operations), 1)
+        self.assertIsInstance(operations[0], UpdateOne)
+        self.assertFalse(operations[0]._upsert)
+        self.assertNotIn('xml_content', operations[0]._doc['$set'])
+        self.assertNotIn('dict_content', operations[0]._doc['$set'])
+
+
 class TestOaiRecordGetById(TestCase):
     @patch.object(OaiRecord, 'get_by_id')
     def test_get_by_id_return_object(self, mock_get_by_id):
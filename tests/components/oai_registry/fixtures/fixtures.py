@@ -6,7 +6,7 @@ from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as oai_harvester_metadata_format_api
 from core_oaipmh_harvester_app.components.oai_record import api as oai_record_api
 import json
-from core_oaipmh_harvester_app.utils import transform_operations
+from core_oaipmh_harvester_app.utils import query_cache_operations, transform_operations
 import os
 from tests.test_settings import OAI_HARVESTER_ROOT
 from core_main_app.utils import xml as xml_utils
@@ -46,6 +46,9 @@ class OaiPmhFixtures(FixtureInterface):
         if insert_records:
             self.oai_records = self.insert_oai_records()
 
+        # The registry and its metadata formats are saved without the api
+        query_cache_operations.clear_cache()
+
     """
         OaiIdentify's methods
     """
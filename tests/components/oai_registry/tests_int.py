@@ -1,20 +1,27 @@
 """ Int Test OaiRegistry
 """
+import datetime
+
 import requests
 from bson.objectid import ObjectId
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
-from mock.mock import patch
+from mock.mock import Mock, patch
 from rest_framework import status
 
 from core_main_app.commons import exceptions
 from core_main_app.utils.integration_tests.integration_base_test_case\
     import MongoIntegrationBaseTestCase
+from core_oaipmh_harvester_app.components.oai_harvester_checkpoint import api as \
+    oai_harvester_checkpoint_api
+from core_oaipmh_harvester_app.components.oai_harvester_event import api as \
+    oai_harvester_event_api
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api \
     as oai_harvester_metadata_format_api
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models \
     import OaiHarvesterMetadataFormat
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format_set import api as \
     oai_harvester_metadata_format_set_api
+from core_oaipmh_harvester_app.components.oai_harvester_metrics import api as oai_harvester_metrics_api
 from core_oaipmh_harvester_app.components.oai_harvester_set import api as oai_harvester_set_api
 from core_oaipmh_harvester_app.components.oai_identify import api as oai_identify_api
 from core_oaipmh_harvester_app.components.oai_record import api as oai_record_api
@@ -22,11 +29,17 @@ from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
+from core_oaipmh_harvester_app.utils import transform_operations
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhMock
 
 fixture_data = OaiPmhFixtures()
 
+BAD_RESUMPTION_TOKEN_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <error code="badResumptionToken">The resumption token has expired.</error>
+</OAI-PMH>"""
+
 
 class TestAddRegistry(MongoIntegrationBaseTestCase):
     """
@@ -34,7 +47,7 @@ class TestAddRegistry(MongoIntegrationBaseTestCase):
     """
     fixture = fixture_data
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -99,7 +112,7 @@ class TestAddRegistryNoSetsNoMetadataFormats(MongoIntegrationBaseTestCase):
     """
     fixture = fixture_data
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -137,7 +150,7 @@ class TestAddRegistryIdentify(MongoIntegrationBaseTestCase):
     """
     fixture = fixture_data
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -175,7 +188,7 @@ class TestAddRegistrySets(MongoIntegrationBaseTestCase):
     """
     fixture = fixture_data
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -213,7 +226,7 @@ class TestAddRegistryMetadataFormats(MongoIntegrationBaseTestCase):
     """
     fixture = fixture_data
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -277,7 +290,7 @@ class TestUpdateRegistryInfo(MongoIntegrationBaseTestCase):
         super(TestUpdateRegistryInfo, self).setUp()
         self.fixture.insert_registry()
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
@@ -301,6 +314,70 @@ class TestUpdateRegistryInfo(MongoIntegrationBaseTestCase):
         _assert_metadata_format(self, first_metadata_format, result.id)
         _assert_set(self, first_set, result.id)
 
+    @patch.object(requests.Session, 'get')
+    @patch.object(oai_verbs_api, 'list_sets_as_object')
+    @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
+    @patch.object(oai_verbs_api, 'identify_as_object')
+    def test_update_registry_only_if_changed_skips_unchanged_info(self, mock_identify,
+                                                                  mock_metadata_formats, mock_sets,
+                                                                  mock_get):
+        # Arrange
+        mock_identify.return_value = OaiPmhMock.mock_oai_identify(version=2), status.HTTP_200_OK
+        mock_metadata_formats.return_value = OaiPmhMock.mock_oai_metadata_format(version=2), \
+            status.HTTP_200_OK
+        mock_sets.return_value = OaiPmhMock.mock_oai_set(version=2), status.HTTP_200_OK
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.text = '<test>Hello</test>'
+        oai_registry_api.update_registry_info(self.fixture.registry)
+
+        # Act
+        with patch.object(oai_registry_api, '_upsert_set_for_registry') as mock_upsert_set:
+            result = oai_registry_api.update_registry_info(self.fixture.registry,
+                                                           only_if_changed=True)
+
+        # Assert
+        self.assertFalse(mock_upsert_set.called)
+        self.assertIsNotNone(result.info_fingerprint)
+        self.assertIsNotNone(result.last_info_update)
+
+    @patch.object(requests.Session, 'get')
+    @patch.object(oai_verbs_api, 'list_sets_as_object')
+    @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
+    @patch.object(oai_verbs_api, 'identify_as_object')
+    def test_update_registry_only_if_changed_saves_changed_info(self, mock_identify,
+                                                                mock_metadata_formats, mock_sets,
+                                                                mock_get):
+        # Arrange
+        mock_identify.return_value = OaiPmhMock.mock_oai_identify(version=2), status.HTTP_200_OK
+        mock_metadata_formats.return_value = OaiPmhMock.mock_oai_metadata_format(version=2), \
+            status.HTTP_200_OK
+        mock_sets.return_value = OaiPmhMock.mock_oai_set(version=1), status.HTTP_200_OK
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.text = '<test>Hello</test>'
+        oai_registry_api.update_registry_info(self.fixture.registry)
+        first_set = OaiPmhMock.mock_oai_set(version=2)
+        mock_sets.return_value = first_set, status.HTTP_200_OK
+
+        # Act
+        result = oai_registry_api.update_registry_info(self.fixture.registry,
+                                                       only_if_changed=True)
+
+        # Assert
+        _assert_set(self, first_set, result.id)
+
+    def test_upsert_publishes_registry_status(self):
+        # Arrange
+        self.fixture.registry.is_updating = True
+
+        # Act
+        oai_registry_api.upsert(self.fixture.registry)
+
+        # Assert
+        events = list(oai_harvester_event_api.get_all_after())
+        self.assertEquals(events[-1].event_type, 'registry')
+        self.assertEquals(events[-1].data['registry_id'], str(self.fixture.registry.id))
+        self.assertTrue(events[-1].data['is_updating'])
+
 
 class TestUpsertIdentifyForRegistry(MongoIntegrationBaseTestCase):
     """
@@ -353,7 +430,7 @@ class TestUpsertMetadataFormatForRegistry(MongoIntegrationBaseTestCase):
     def setUp(self):
         super(TestUpsertMetadataFormatForRegistry, self).setUp()
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_upsert_updates_if_does_exist(self, mock_get):
         """ Test upsert update
         Args:
@@ -382,7 +459,7 @@ class TestUpsertMetadataFormatForRegistry(MongoIntegrationBaseTestCase):
                                                    self.fixture.registry.id)
         self.assertEquals(metadata_format_in_database.schema, schema)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_upsert_creates_if_does_not_exist(self, mock_get):
         """ Test upsert create
         Args:
@@ -510,6 +587,126 @@ class TestUpsertRecordForRegistry(MongoIntegrationBaseTestCase):
 
         self.assertEquals(record_in_database, oai_record)
 
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_does_not_duplicate_record_inserted_by_concurrent_chain(self, mock_convert_file):
+        """ Test upsert of a new record already inserted by another chain of the metadata format
+        """
+        self.fixture.insert_registry()
+
+        # Arrange
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        first_record = OaiPmhMock.mock_oai_first_record()
+        second_record = OaiPmhMock.mock_oai_first_record()
+        mock_convert_file.return_value = None
+        oai_registry_api._upsert_record_for_registry(first_record, metadata_format,
+                                                     self.fixture.registry)
+
+        # Act
+        oai_registry_api._upsert_record_for_registry(second_record, metadata_format,
+                                                     self.fixture.registry)
+
+        # Assert
+        self.assertEquals(second_record.id, first_record.id)
+        self.assertEquals(OaiRecord.objects(identifier=first_record.identifier,
+                                            harvester_metadata_format=metadata_format).count(), 1)
+
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_upsert_updates_changed_record_split_from_page(self, mock_convert_file):
+        """ Test upsert updates the existing record found by _split_changed_records
+        """
+        self.fixture.insert_registry()
+
+        # Arrange
+        record_in_database = self.fixture.oai_records[0]
+        record_in_database.digest = "digest"
+        record_in_database.save()
+        metadata_format = record_in_database.harvester_metadata_format
+        oai_record = OaiPmhMock.mock_oai_first_record()
+        oai_record.identifier = record_in_database.identifier
+        oai_record.digest = "new_digest"
+        oai_record.metadata_digest = "new_metadata_digest"
+        mock_convert_file.return_value = None
+        _, changed_records = oai_registry_api._split_changed_records([oai_record], metadata_format)
+
+        # Act
+        oai_registry_api._upsert_record_for_registry(changed_records[0], metadata_format,
+                                                     self.fixture.registry)
+
+        # Assert
+        self.assertEquals(oai_record.id, record_in_database.id)
+        self.assertEquals(oai_record_api.get_by_id(record_in_database.id).digest, "new_digest")
+        self.assertEquals(len(oai_record_api.get_all_by_registry_id(self.fixture.registry.id)),
+                          len(self.fixture.oai_records))
+
+
+    def test_split_changed_records_returns_deleted_record_as_header_change(self):
+        """ Test a deleted record only needs a header update
+        """
+        self.fixture.insert_registry()
+
+        # Arrange
+        record_in_database = self.fixture.oai_records[0]
+        record_in_database.digest = "digest"
+        record_in_database.save()
+        oai_record = OaiRecord(identifier=record_in_database.identifier, digest="new_digest",
+                               deleted=True)
+        new_record = OaiRecord(identifier="oai:new", digest="digest")
+        new_record.xml_content = "<test/>"
+
+        # Act
+        result = oai_registry_api.\
+            _split_changed_records([oai_record, new_record],
+                                   record_in_database.harvester_metadata_format)
+
+        # Assert
+        self.assertEquals(result, ([oai_record], [new_record]))
+
+
+class TestHarvestChain(MongoIntegrationBaseTestCase):
+    """
+    Test class
+    """
+    fixture = fixture_data
+
+    def setUp(self):
+        """ Set up test
+        """
+        super(TestHarvestChain, self).setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    @patch.object(oai_record_api, 'get_digests_by_identifiers_and_metadata_format')
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_set_chains_of_a_metadata_format_do_not_duplicate_records(self, mock_convert_file,
+                                                                      mock_get, mock_get_digests):
+        """ Test the set chains of a metadata format, harvested by concurrent tasks, save each
+        record once
+        Args:
+            mock_convert_file:
+            mock_get:
+            mock_get_digests:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.side_effect = lambda *args, **kwargs: _create_mock_http_response(
+            OaiPmhMock.mock_oai_response_list_records(with_resumption_token=False))
+        mock_convert_file.return_value = None
+        # Each chain looks the records up before the other one inserts them
+        mock_get_digests.return_value = {}
+        metadata_format = self.fixture.oai_metadata_formats[0]
+
+        # Act
+        result = [oai_registry_api.harvest_chain(self.fixture.registry, metadata_format, set_)
+                  for set_ in self.fixture.oai_sets[:2]]
+
+        # Assert
+        self.assertEquals(result, [[], []])
+        records = OaiRecord.objects(harvester_metadata_format=metadata_format)
+        self.assertTrue(records.count() > 0)
+        self.assertEquals(records.count(), len(set(records.scalar('identifier'))))
+
 
 class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
     """
@@ -523,7 +720,7 @@ class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
         super(TestHarvestByMetadataFormats, self).setUp()
         self.fixture.insert_registry(insert_records=False)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_by_metadata_formats_saves_record(self, mock_convert_file, mock_get):
         """ Test harvest by metadata formats save
@@ -535,8 +732,8 @@ class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         metadata_format = [self.fixture.oai_metadata_formats[0]]
         mock_convert_file.return_value = None
 
@@ -550,7 +747,7 @@ class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
         self.assertEquals(result, [])
         self.assertTrue(len(record_in_database) > 0)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_by_metadata_formats_updates_dates(self, mock_convert_file, mock_get):
         """ Test harvest by metadata formats update
@@ -562,8 +759,8 @@ class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         metadata_format = self.fixture.oai_metadata_formats[0]
         set_ = self.fixture.oai_sets[0]
         mock_convert_file.return_value = None
@@ -592,6 +789,36 @@ class TestHarvestByMetadataFormats(MongoIntegrationBaseTestCase):
             get_by_metadata_format_and_set(metadata_format, set_)
         self.assertNotEquals(oai_h_mf_set.last_update, None)
 
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_harvest_by_metadata_formats_saves_metrics(self, mock_convert_file, mock_get):
+        """ Test harvest by metadata formats saves the metrics of the chain
+        Args:
+            mock_get:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        mock_convert_file.return_value = None
+
+        # Act
+        oai_registry_api._harvest_by_metadata_formats(self.fixture.registry, [metadata_format],
+                                                      self.fixture.oai_sets)
+
+        # Assert
+        metrics = oai_harvester_metrics_api.get_all()
+        self.assertEquals(len(metrics), 1)
+        self.assertEquals(metrics[0].harvester_metadata_format, metadata_format)
+        self.assertEquals(metrics[0].pages, 1)
+        self.assertEquals(metrics[0].records, 1)
+        self.assertTrue(metrics[0].bytes > 0)
+        self.assertTrue(metrics[0].mongo_seconds > 0)
+
 
 class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
     """
@@ -605,7 +832,7 @@ class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
         super(TestHarvestByMetadataFormatsAndSets, self).setUp()
         self.fixture.insert_registry(insert_records=False)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_by_metadata_formats_and_sets_saves_record(self, mock_convert_file, mock_get):
         """ Test harvest by metadata formats and sets save
@@ -617,8 +844,8 @@ class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         metadata_format = [self.fixture.oai_metadata_formats[0]]
         set_ = [self.fixture.oai_sets[0]]
         mock_convert_file.return_value = None
@@ -633,7 +860,7 @@ class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
         self.assertEquals(result, [])
         self.assertTrue(len(record_in_database) > 0)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_by_metadata_formats_and_sets_updates_dates(self, mock_convert_file, mock_get):
         """ Test harvest by metadata formats and sets update
@@ -645,8 +872,8 @@ class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         metadata_format = self.fixture.oai_metadata_formats[0]
         set_ = self.fixture.oai_sets[0]
         mock_convert_file.return_value = None
@@ -677,6 +904,130 @@ class TestHarvestByMetadataFormatsAndSets(MongoIntegrationBaseTestCase):
         self.assertNotEquals(oai_h_mf_set.last_update, None)
 
 
+class TestHarvestCheckpoint(MongoIntegrationBaseTestCase):
+    """
+    Test class
+    """
+    fixture = fixture_data
+
+    def setUp(self):
+        """ Set up test
+        """
+        super(TestHarvestCheckpoint, self).setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.metadata_format = self.fixture.oai_metadata_formats[0]
+        self.harvest_date = datetime.datetime(2017, 1, 1)
+
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_interrupted_chain_saves_checkpoint(self, mock_convert_file, mock_get):
+        """ Test the position of an interrupted chain is saved
+        """
+        # Arrange
+        mock_get.side_effect = [_create_mock_http_response(OaiPmhMock.mock_oai_response_list_records()),
+                                _create_mock_http_response("", status.HTTP_500_INTERNAL_SERVER_ERROR)]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(self.fixture.registry,
+                                                               [self.metadata_format],
+                                                               self.fixture.oai_sets)
+
+        # Assert
+        self.assertEquals(len(result), 1)
+        checkpoint = oai_harvester_checkpoint_api.get_by_metadata_format_and_set(self.metadata_format,
+                                                                                 None)
+        self.assertEquals(checkpoint.resumption_token.strip(), "xxx45abttyz")
+        self.assertEquals(checkpoint.cursor, 0)
+        self.assertEquals(checkpoint.complete_list_size, 6)
+        self.assertEquals(checkpoint.expiration_date, datetime.datetime(2002, 6, 1, 23, 20))
+
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_harvest_resumes_from_checkpoint(self, mock_convert_file, mock_get):
+        """ Test the chain is resumed from the saved resumption token
+        """
+        # Arrange
+        self._insert_checkpoint(expiration_date=None)
+        mock_get.return_value = _create_mock_http_response(OaiPmhMock.
+                                                           mock_oai_response_list_records(with_resumption_token=False))
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(self.fixture.registry,
+                                                               [self.metadata_format],
+                                                               self.fixture.oai_sets)
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertEquals(mock_get.call_args[1]['params'], {'verb': 'ListRecords',
+                                                            'resumptionToken': "token"})
+        metadata_format_in_database = oai_harvester_metadata_format_api.get_by_id(self.metadata_format.id)
+        self.assertEquals(metadata_format_in_database.last_update, self.harvest_date)
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_harvester_checkpoint_api.get_by_metadata_format_and_set(self.metadata_format, None)
+
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_harvest_restarts_from_last_update_if_checkpoint_expired(self, mock_convert_file,
+                                                                      mock_get):
+        """ Test an expired checkpoint is not resumed
+        """
+        # Arrange
+        self._insert_checkpoint(expiration_date=datetime.datetime(2002, 6, 1))
+        mock_get.return_value = _create_mock_http_response(OaiPmhMock.
+                                                           mock_oai_response_list_records(with_resumption_token=False))
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(self.fixture.registry,
+                                                               [self.metadata_format],
+                                                               self.fixture.oai_sets)
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertNotIn('resumptionToken', mock_get.call_args[1]['params'])
+        with self.assertRaises(exceptions.DoesNotExist):
+            oai_harvester_checkpoint_api.get_by_metadata_format_and_set(self.metadata_format, None)
+
+    @patch.object(requests.Session, 'get')
+    @patch.object(OaiRecord, 'convert_to_file')
+    def test_harvest_restarts_from_last_update_if_resumption_token_rejected(self, mock_convert_file,
+                                                                             mock_get):
+        """ Test the chain is restarted when the Data Provider rejects the saved resumption token
+        """
+        # Arrange
+        self._insert_checkpoint(expiration_date=None)
+        mock_get.side_effect = [_create_mock_http_response(BAD_RESUMPTION_TOKEN_RESPONSE),
+                                _create_mock_http_response(OaiPmhMock.
+                                                           mock_oai_response_list_records(with_resumption_token=False))]
+        mock_convert_file.return_value = None
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats(self.fixture.registry,
+                                                               [self.metadata_format],
+                                                               self.fixture.oai_sets)
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertEquals(mock_get.call_count, 2)
+        self.assertEquals(mock_get.call_args[1]['params']['metadataPrefix'],
+                          self.metadata_format.metadata_prefix)
+        record_in_database = oai_record_api.get_all_by_registry_id(self.fixture.registry.id)
+        self.assertTrue(len(record_in_database) > 0)
+
+    def _insert_checkpoint(self, expiration_date):
+        """ Insert a checkpoint for the metadata format chain.
+        Args:
+            expiration_date: Expiration date of the resumption token.
+
+        """
+        oai_harvester_checkpoint_api.upsert_by_metadata_format_and_set(self.metadata_format, None,
+                                                                       self.fixture.registry, "token",
+                                                                       None, self.harvest_date,
+                                                                       expiration_date=expiration_date)
+
+
 class TestHarvestRegistry(MongoIntegrationBaseTestCase):
     """
     Test class
@@ -689,7 +1040,7 @@ class TestHarvestRegistry(MongoIntegrationBaseTestCase):
         super(TestHarvestRegistry, self).setUp()
         self.fixture.insert_registry(insert_records=False)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_registry_saves_record(self, mock_convert_file, mock_get):
         """ Test harvest save
@@ -702,8 +1053,8 @@ class TestHarvestRegistry(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         mock_convert_file.return_value = None
 
         # Act
@@ -714,7 +1065,7 @@ class TestHarvestRegistry(MongoIntegrationBaseTestCase):
         self.assertEquals(result, [])
         self.assertTrue(len(record_in_database) > 0)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     @patch.object(OaiRecord, 'convert_to_file')
     def test_harvest_registry_updates_dates(self, mock_convert_file, mock_get):
         """ Test harvest update
@@ -727,8 +1078,8 @@ class TestHarvestRegistry(MongoIntegrationBaseTestCase):
         """
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.\
-            mock_oai_response_list_records(with_resumption_token=False)
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.\
+            mock_oai_response_list_records(with_resumption_token=False)]
         mock_convert_file.return_value = None
 
         # Assert
@@ -744,6 +1095,64 @@ class TestHarvestRegistry(MongoIntegrationBaseTestCase):
         self.assertNotEquals(self.fixture.registry.last_update, None)
 
 
+class TestGetRegistrySetsBySpec(MongoIntegrationBaseTestCase):
+    """
+    Test class
+    """
+    fixture = fixture_data
+
+    def setUp(self):
+        """ Set up test
+        """
+        super(TestGetRegistrySetsBySpec, self).setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    def test_get_registry_sets_by_spec_returns_sets(self):
+        """ Test
+        """
+        # Act
+        result = oai_registry_api._get_registry_sets_by_spec(self.fixture.registry,
+                                                             self.fixture.oai_sets)
+
+        # Assert
+        self.assertEquals(result, {set_.set_spec: set_ for set_ in self.fixture.oai_sets})
+
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_SET_REFERENCES', True)
+    def test_get_registry_sets_by_spec_returns_references(self):
+        """ Test
+        """
+        # Act
+        result = oai_registry_api._get_registry_sets_by_spec(self.fixture.registry, None)
+
+        # Assert
+        self.assertEquals({set_spec: reference.id for set_spec, reference in result.items()},
+                          {set_.set_spec: set_.id for set_ in self.fixture.oai_sets})
+
+    @patch.object(OaiRecord, 'convert_to_file')
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_SET_REFERENCES', True)
+    def test_record_with_set_references_is_saved(self, mock_convert_file):
+        """ Test
+        """
+        # Arrange
+        mock_convert_file.return_value = None
+        registry_sets_by_spec = oai_registry_api._get_registry_sets_by_spec(self.fixture.registry,
+                                                                            None)
+        data = [{'identifier': 'oai:test/id.0001', 'datestamp': '2017-04-24T18:01:08Z',
+                 'deleted': False, 'sets': [self.fixture.oai_sets[0].set_spec],
+                 'metadata': '<test>Hello</test>'}]
+        oai_record = transform_operations.transform_dict_record_to_oai_record(
+            data, registry_sets_by_spec=registry_sets_by_spec)[0]
+
+        # Act
+        oai_registry_api._upsert_record_for_registry(oai_record,
+                                                     self.fixture.oai_metadata_formats[0],
+                                                     self.fixture.registry)
+
+        # Assert
+        record_in_database = oai_record_api.get_by_id(oai_record.id)
+        self.assertEquals(record_in_database.harvester_sets, [self.fixture.oai_sets[0]])
+
+
 class TestHandleDeleteSet(MongoIntegrationBaseTestCase):
     """
     Test class
@@ -874,3 +1283,20 @@ def _assert_metadata_format(self, mock, registry_id):
             self.assertEquals(metadata_format.metadata_namespace,
                               obj_in_database.metadata_namespace)
             self.assertEquals(metadata_format.raw, obj_in_database.raw)
+
+
+def _create_mock_http_response(content, status_code=status.HTTP_200_OK):
+    """ Create a mock of a streamed HTTP response.
+    Args:
+        content: Body of the response.
+        status_code: Status code of the response.
+
+    Returns:
+        Mock HTTP response.
+
+    """
+    http_response = Mock()
+    http_response.status_code = status_code
+    http_response.headers = {}
+    http_response.iter_content.return_value = [content]
+    return http_response
@@ -1,6 +1,8 @@
 """ Unit Test OaiRegistry
 """
 import datetime
+import threading
+import time
 from unittest.case import TestCase
 
 from bson.objectid import ObjectId
@@ -17,11 +19,12 @@ from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import a
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import\
     OaiHarvesterMetadataFormat
 from core_oaipmh_harvester_app.components.oai_harvester_set import api as oai_harvester_set_api
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhMock
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
-from core_oaipmh_harvester_app.utils import transform_operations
+from core_oaipmh_harvester_app.utils import conversion_operations, throttle_operations, transform_operations
 
 
 class TestOaiRegistryGetById(TestCase):
@@ -743,10 +746,12 @@ class TestHarvestRegistry(TestCase):
         resumption_token = None
         content = OaiPmhMessage.get_message_labelled('Error')
         status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        mock_list_records.return_value = Response(content, status=status_code), resumption_token
+        mock_list_records.return_value = Response(content, status=status_code), resumption_token, \
+            oai_verbs_api.ListRecordsPage()
         expected_error = [{'status_code': status_code, 'error': "Error"}]
         registry = Mock(spec=OaiRegistry())
         registry.url = "dummy_url"
+        registry.harvest_queue_depth = 0
         metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
         metadata_format.metadata_prefix = "oai_dummy"
         last_update = registry_all_sets = None
@@ -775,11 +780,13 @@ class TestHarvestRegistry(TestCase):
         resumption_token = None
         content = []
         status_code = status.HTTP_200_OK
-        mock_list_records.return_value = Response(content, status=status_code), resumption_token
+        mock_list_records.return_value = Response(content, status=status_code), resumption_token, \
+            oai_verbs_api.ListRecordsPage()
         error_message = "Error"
         expected_error = [{'status_code': status.HTTP_400_BAD_REQUEST, 'error': error_message}]
         registry = Mock(spec=OaiRegistry())
         registry.url = "dummy_url"
+        registry.harvest_queue_depth = 0
         metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
         metadata_format.metadata_prefix = "oai_dummy"
         last_update = registry_all_sets = None
@@ -792,6 +799,707 @@ class TestHarvestRegistry(TestCase):
         # Assert
         self.assertEquals(result, expected_error)
 
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_BULK_UPSERT', True)
+    @patch.object(oai_registry_api.oai_record_api, 'upsert_many')
+    @patch.object(transform_operations, 'transform_dict_record_to_oai_record')
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_harvest_records_bulk_upserts_each_page(self, mock_list_records,
+                                                    mock_transform_operations, mock_upsert_many):
+        """
+
+        Args:
+            mock_list_records:
+            mock_transform_operations:
+            mock_upsert_many:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_list_records.side_effect = [(Response([], status=status.HTTP_200_OK), "token",
+                                          oai_verbs_api.ListRecordsPage()),
+                                         (Response([], status=status.HTTP_200_OK), None,
+                                          oai_verbs_api.ListRecordsPage())]
+        first_page = [OaiRecord(), OaiRecord()]
+        second_page = [OaiRecord()]
+        mock_transform_operations.side_effect = [first_page, second_page]
+        registry = Mock(spec=OaiRegistry())
+        registry.url = "dummy_url"
+        registry.harvest_queue_depth = 0
+        metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
+        metadata_format.metadata_prefix = "oai_dummy"
+        last_update = registry_all_sets = None
+
+        # Act
+        result = oai_registry_api._harvest_records(registry, metadata_format, last_update,
+                                                   registry_all_sets)
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertEquals(mock_upsert_many.call_count, 2)
+        mock_upsert_many.assert_any_call(first_page, True)
+        mock_upsert_many.assert_any_call(second_page, True)
+        self.assertTrue(all(record.registry == registry for record in first_page + second_page))
+
+
+class TestSplitChangedRecords(TestCase):
+    """
+    Test sorting of the changed records of a page
+    """
+    @patch.object(oai_registry_api.oai_record_api, 'get_digests_by_identifiers_and_metadata_format')
+    def test_split_changed_records_removes_unchanged_records(self, mock_get_digests):
+        """
+
+        Args:
+            mock_get_digests:
+
+        Returns:
+
+        """
+        # Arrange
+        unchanged_record = OaiRecord(identifier="oai:unchanged", digest="digest_1")
+        changed_record = OaiRecord(identifier="oai:changed", digest="digest_2")
+        new_record = OaiRecord(identifier="oai:new", digest="digest_3")
+        for record in [unchanged_record, changed_record, new_record]:
+            record.xml_content = "<test/>"
+        mock_get_digests.return_value = {"oai:unchanged": (ObjectId(), "digest_1", None),
+                                         "oai:changed": (ObjectId(), "old_digest", None)}
+        metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
+
+        # Act
+        result = oai_registry_api._split_changed_records([unchanged_record, changed_record,
+                                                          new_record], metadata_format)
+
+        # Assert
+        self.assertEquals(result, ([], [changed_record, new_record]))
+
+    @patch.object(oai_registry_api.oai_record_api, 'get_digests_by_identifiers_and_metadata_format')
+    def test_split_changed_records_returns_header_only_changes(self, mock_get_digests):
+        """
+
+        Args:
+            mock_get_digests:
+
+        Returns:
+
+        """
+        # Arrange
+        same_metadata_record = OaiRecord(identifier="oai:same", digest="digest_1",
+                                         metadata_digest="metadata_digest_1")
+        same_metadata_record.xml_content = "<test/>"
+        deleted_record = OaiRecord(identifier="oai:deleted", digest="digest_2", deleted=True)
+        changed_metadata_record = OaiRecord(identifier="oai:changed", digest="digest_3",
+                                            metadata_digest="metadata_digest_3")
+        changed_metadata_record.xml_content = "<test/>"
+        changed_metadata_record_id = ObjectId()
+        mock_get_digests.return_value = {"oai:same": (ObjectId(), "old_digest", "metadata_digest_1"),
+                                         "oai:deleted": (ObjectId(), "old_digest", "metadata_digest_2"),
+                                         "oai:changed": (changed_metadata_record_id, "old_digest",
+                                                         "old_metadata_digest")}
+        metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
+
+        # Act
+        result = oai_registry_api._split_changed_records([same_metadata_record, deleted_record,
+                                                          changed_metadata_record],
+                                                         metadata_format)
+
+        # Assert
+        self.assertEquals(result, ([same_metadata_record, deleted_record],
+                                   [changed_metadata_record]))
+        self.assertEquals(changed_metadata_record.id, changed_metadata_record_id)
+
+    @patch.object(oai_registry_api.oai_record_api, 'upsert_many')
+    @patch.object(conversion_operations, 'convert_records_to_dict')
+    @patch.object(transform_operations, 'transform_dict_record_to_oai_record')
+    @patch.object(oai_verbs_api, 'list_records')
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_CONVERSION_PROCESSES', 2)
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_BULK_UPSERT', True)
+    def test_harvest_records_converts_pages_in_worker_processes(self, mock_list_records,
+                                                                mock_transform_operations,
+                                                                mock_convert_records,
+                                                                mock_upsert_many):
+        """
+
+        Args:
+            mock_list_records:
+            mock_transform_operations:
+            mock_convert_records:
+            mock_upsert_many:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_list_records.return_value = (Response([], status=status.HTTP_200_OK), None,
+                                          oai_verbs_api.ListRecordsPage())
+        page = [OaiRecord()]
+        mock_transform_operations.return_value = page
+        registry = Mock(spec=OaiRegistry())
+        registry.url = "dummy_url"
+        registry.harvest_queue_depth = 0
+        metadata_format = Mock(spec=OaiHarvesterMetadataFormat())
+        metadata_format.metadata_prefix = "oai_dummy"
+
+        # Act
+        result = oai_registry_api._harvest_records(registry, metadata_format, None, None)
+
+        # Assert
+        self.assertEquals(result, [])
+        mock_convert_records.assert_called_once_with(page)
+        mock_upsert_many.assert_called_once_with(page, False)
+
+
+class TestListRecordsPages(TestCase):
+    """
+    Test ListRecords pages of a resumption token chain
+    """
+    def setUp(self):
+        self.responses = [(Response([], status=status.HTTP_200_OK), "token_1",
+                           oai_verbs_api.ListRecordsPage()),
+                          (Response([], status=status.HTTP_200_OK), "token_2",
+                           oai_verbs_api.ListRecordsPage()),
+                          (Response([], status=status.HTTP_200_OK), None,
+                           oai_verbs_api.ListRecordsPage())]
+
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_list_records_pages_follows_resumption_token(self, mock_list_records):
+        """
+
+        Args:
+            mock_list_records:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_list_records.side_effect = self.responses
+
+        # Act
+        result = list(oai_registry_api._list_records_pages("dummy_url", "oai_dummy", None, None))
+
+        # Assert
+        self.assertEquals(result, self.responses)
+        mock_list_records.assert_called_with(url="dummy_url", metadata_prefix="oai_dummy",
+                                             set_h=None, from_date=None,
+                                             resumption_token="token_2")
+
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_list_records_pages_retries_unavailable_page_from_same_token(self, mock_list_records):
+        """
+
+        Args:
+            mock_list_records:
+
+        Returns:
+
+        """
+        # Arrange
+        unavailable_response = Response(OaiPmhMessage.get_message_labelled('Error'),
+                                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        unavailable_response['Retry-After'] = '0'
+        mock_list_records.side_effect = [self.responses[0], (unavailable_response, None,
+                                                              oai_verbs_api.ListRecordsPage()),
+                                         self.responses[1], self.responses[2]]
+
+        # Act
+        result = list(oai_registry_api._list_records_pages("http://retry_url.com", "oai_dummy",
+                                                           None, None))
+
+        # Assert
+        self.assertEquals(result, self.responses)
+        self.assertEquals(mock_list_records.call_args_list[1],
+                          mock_list_records.call_args_list[2])
+
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_PAGE_RETRIES', 1)
+    @patch.object(throttle_operations.RateLimiter, 'on_error')
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_list_records_page_does_not_block_host_after_last_attempt(self, mock_list_records,
+                                                                     mock_on_error):
+        """
+
+        Args:
+            mock_list_records:
+            mock_on_error:
+
+        Returns:
+
+        """
+        # Arrange
+        unavailable_response = Response(OaiPmhMessage.get_message_labelled('Error'),
+                                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        unavailable_response['Retry-After'] = '120'
+        mock_list_records.return_value = unavailable_response, None, oai_verbs_api.ListRecordsPage()
+
+        # Act
+        result = oai_registry_api._list_records_page("http://last_attempt_url.com", "oai_dummy",
+                                                     None, None, None)
+
+        # Assert
+        self.assertEquals(result[0].status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEquals(mock_list_records.call_count, 2)
+        self.assertEquals([call[0][0] for call in mock_on_error.call_args_list], [120, 0])
+
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_list_records_pages_with_queue_depth_prefetches_in_order(self, mock_list_records):
+        """
+
+        Args:
+            mock_list_records:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_list_records.side_effect = self.responses
+
+        # Act
+        result = list(oai_registry_api._list_records_pages("dummy_url", "oai_dummy", None, None,
+                                                           queue_depth=1))
+
+        # Assert
+        self.assertEquals(result, self.responses)
+        self.assertEquals(mock_list_records.call_count, 3)
+
+    @patch.object(oai_verbs_api, 'list_records')
+    def test_list_records_pages_with_queue_depth_stops_fetching_when_closed(self, mock_list_records):
+        """
+
+        Args:
+            mock_list_records:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_list_records.return_value = Response([], status=status.HTTP_200_OK), "token", \
+            oai_verbs_api.ListRecordsPage()
+        pages = oai_registry_api._list_records_pages("dummy_url", "oai_dummy", None, None,
+                                                     queue_depth=1)
+
+        # Act
+        next(pages)
+        pages.close()
+
+        # Assert
+        self.assertTrue(mock_list_records.call_count < 5)
+
+
+class TestHarvestByMetadataFormatsAndSets(TestCase):
+    """
+    Test harvest of the (metadata format, set) chains
+    """
+    def setUp(self):
+        self.registry = Mock(spec=OaiRegistry())
+        self.metadata_formats = [Mock(spec=OaiHarvesterMetadataFormat()),
+                                 Mock(spec=OaiHarvesterMetadataFormat())]
+        self.sets = ["set_a", "set_b"]
+
+    @patch.object(oai_registry_api, '_harvest_by_metadata_format_and_set')
+    @patch.object(oai_harvester_metadata_format_api, 'upsert')
+    def test_harvest_chains_sequentially(self, mock_upsert, mock_harvest_chain):
+        """
+
+        Args:
+            mock_upsert:
+            mock_harvest_chain:
+
+        Returns:
+
+        """
+        # Arrange
+        self.registry.harvest_concurrency = 1
+        mock_harvest_chain.return_value = []
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(self.registry,
+                                                                        self.metadata_formats,
+                                                                        self.sets, [])
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertEquals(mock_harvest_chain.call_count, 4)
+        self.assertEquals(mock_upsert.call_count, 2)
+
+    @patch.object(oai_registry_api, '_harvest_by_metadata_format_and_set')
+    @patch.object(oai_harvester_metadata_format_api, 'upsert')
+    def test_harvest_chains_concurrently_keeps_errors_by_metadata_format(self, mock_upsert,
+                                                                         mock_harvest_chain):
+        """
+
+        Args:
+            mock_upsert:
+            mock_harvest_chain:
+
+        Returns:
+
+        """
+        # Arrange
+        self.registry.harvest_concurrency = 3
+        errors = [{'status_code': 500, 'error': 'error'}]
+        failing_metadata_format = self.metadata_formats[1]
+        mock_harvest_chain.side_effect = lambda registry, metadata_format, set_, all_sets: \
+            errors if metadata_format is failing_metadata_format and set_ == "set_b" else []
+
+        # Act
+        result = oai_registry_api._harvest_by_metadata_formats_and_sets(self.registry,
+                                                                        self.metadata_formats,
+                                                                        self.sets, [])
+
+        # Assert
+        self.assertEquals(result, [errors])
+        self.assertEquals(mock_harvest_chain.call_count, 4)
+        mock_upsert.assert_called_once_with(self.metadata_formats[0])
+
+
+class TestHarvestRegistries(TestCase):
+    """
+    Test harvest of many registries at once
+    """
+    @patch.object(oai_registry_api, 'harvest_registry')
+    @patch.object(oai_registry_api, 'update_registry_info')
+    def test_harvest_registries_limits_registries_by_host(self, mock_update_registry_info,
+                                                          mock_harvest_registry):
+        """
+
+        Args:
+            mock_update_registry_info:
+            mock_harvest_registry:
+
+        Returns:
+
+        """
+        # Arrange
+        registries = [_create_mock_oai_registry() for _ in range(4)]
+        for registry, url in zip(registries, ["http://a.com/oai", "http://a.com/oai2",
+                                              "http://a.com/oai3", "http://b.com/oai"]):
+            registry.url = url
+            registry.is_updating = False
+            registry.is_harvesting = False
+        running = {'current': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def harvest_registry(registry):
+            with lock:
+                if registry.url.startswith("http://a.com"):
+                    running['current'] += 1
+                    running['max'] = max(running['max'], running['current'])
+            time.sleep(0.05)
+            with lock:
+                if registry.url.startswith("http://a.com"):
+                    running['current'] -= 1
+            return []
+        mock_harvest_registry.side_effect = harvest_registry
+
+        # Act
+        result = oai_registry_api.harvest_registries(registries, 4, 1)
+
+        # Assert
+        self.assertEquals(result, [[], [], [], []])
+        self.assertEquals(running['max'], 1)
+        self.assertEquals(mock_update_registry_info.call_count, 4)
+
+    @patch.object(oai_registry_api, 'harvest_registry')
+    @patch.object(oai_registry_api, 'update_registry_info')
+    def test_harvest_registries_returns_errors_by_registry(self, mock_update_registry_info,
+                                                           mock_harvest_registry):
+        """
+
+        Args:
+            mock_update_registry_info:
+            mock_harvest_registry:
+
+        Returns:
+
+        """
+        # Arrange
+        registries = [_create_mock_oai_registry(), _create_mock_oai_registry()]
+        for registry in registries:
+            registry.is_updating = False
+            registry.is_harvesting = False
+        registries[1].url = "http://unreachable_url.com"
+
+        def update_registry_info(registry, only_if_changed=False):
+            if registry is registries[1]:
+                raise Exception("Error.")
+        mock_update_registry_info.side_effect = update_registry_info
+        mock_harvest_registry.return_value = []
+
+        # Act
+        result = oai_registry_api.harvest_registries(registries, 2, 2)
+
+        # Assert
+        self.assertEquals(result[0], [])
+        self.assertEquals(result[1][0]['error'], "Error.")
+
+
+class TestGetHarvestChains(TestCase):
+    """
+    Test chains of a fanned out harvest
+    """
+    @patch.object(oai_harvester_set_api, 'get_all_to_harvest_by_registry_id')
+    @patch.object(oai_harvester_set_api, 'get_all_by_registry_id')
+    @patch.object(oai_harvester_metadata_format_api, 'get_all_to_harvest_by_registry_id')
+    def test_get_harvest_chains_by_metadata_formats_and_sets(self, mock_metadata_formats,
+                                                              mock_sets_all, mock_sets_to_harvest):
+        """
+
+        Args:
+            mock_metadata_formats:
+            mock_sets_all:
+            mock_sets_to_harvest:
+
+        Returns:
+
+        """
+        # Arrange
+        metadata_formats = [object(), object()]
+        set_ = object()
+        mock_metadata_formats.return_value = metadata_formats
+        mock_sets_all.return_value = [set_, object()]
+        # Don't harvest all sets.
+        mock_sets_to_harvest.return_value = [set_]
+
+        # Act
+        result = oai_registry_api.get_harvest_chains(_create_mock_oai_registry())
+
+        # Assert
+        self.assertEquals(result, [(metadata_formats[0], set_), (metadata_formats[1], set_)])
+
+    @patch.object(oai_harvester_set_api, 'get_all_to_harvest_by_registry_id')
+    @patch.object(oai_harvester_set_api, 'get_all_by_registry_id')
+    @patch.object(oai_harvester_metadata_format_api, 'get_all_to_harvest_by_registry_id')
+    def test_get_harvest_chains_by_metadata_formats(self, mock_metadata_formats, mock_sets_all,
+                                                    mock_sets_to_harvest):
+        """
+
+        Args:
+            mock_metadata_formats:
+            mock_sets_all:
+            mock_sets_to_harvest:
+
+        Returns:
+
+        """
+        # Arrange
+        metadata_formats = [object(), object()]
+        sets = [object(), object()]
+        mock_metadata_formats.return_value = metadata_formats
+        mock_sets_all.return_value = sets
+        mock_sets_to_harvest.return_value = sets
+
+        # Act
+        result = oai_registry_api.get_harvest_chains(_create_mock_oai_registry())
+
+        # Assert
+        self.assertEquals(result, [(metadata_formats[0], None), (metadata_formats[1], None)])
+
+
+class TestEndHarvest(TestCase):
+    """
+    Test end of a fanned out harvest
+    """
+    @patch.object(oai_harvester_metadata_format_api, 'upsert')
+    @patch.object(oai_registry_api, 'upsert')
+    def test_end_harvest_updates_registry_and_successful_metadata_formats(self, mock_upsert,
+                                                                          mock_metadata_format_upsert):
+        """
+
+        Args:
+            mock_upsert:
+            mock_metadata_format_upsert:
+
+        Returns:
+
+        """
+        # Arrange
+        registry = _create_mock_oai_registry()
+        harvest_date = datetime.datetime.now()
+        metadata_formats = [Mock(spec=OaiHarvesterMetadataFormat()),
+                            Mock(spec=OaiHarvesterMetadataFormat())]
+        chains = [(metadata_formats[0], object()), (metadata_formats[1], object())]
+        errors = [{'status_code': 500, 'error': 'error'}]
+
+        # Act
+        result = oai_registry_api.end_harvest(registry, chains, [[], errors], harvest_date)
+
+        # Assert
+        self.assertEquals(result, [errors])
+        self.assertFalse(registry.is_harvesting)
+        self.assertEquals(registry.last_update, harvest_date)
+        mock_metadata_format_upsert.assert_called_once_with(metadata_formats[0])
+        self.assertEquals(metadata_formats[0].last_update, harvest_date)
+
+
+class TestRefreshRegistryInfo(TestCase):
+    """
+    Test refresh of the registry information before a harvest
+    """
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_INFO_REFRESH_RATE', 3600)
+    @patch.object(oai_registry_api, 'update_registry_info')
+    def test_refresh_registry_info_skips_recently_refreshed_registry(self, mock_update_registry_info):
+        """
+
+        Args:
+            mock_update_registry_info:
+
+        Returns:
+
+        """
+        # Arrange
+        registry = _create_mock_oai_registry()
+        registry.last_info_update = datetime.datetime.now()
+
+        # Act
+        oai_registry_api.refresh_registry_info(registry)
+
+        # Assert
+        self.assertFalse(mock_update_registry_info.called)
+
+    @patch.object(oai_registry_api, 'OAI_HARVESTER_INFO_REFRESH_RATE', 3600)
+    @patch.object(oai_registry_api, 'update_registry_info')
+    def test_refresh_registry_info_updates_changed_info_after_refresh_rate(self,
+                                                                           mock_update_registry_info):
+        """
+
+        Args:
+            mock_update_registry_info:
+
+        Returns:
+
+        """
+        # Arrange
+        registry = _create_mock_oai_registry()
+        registry.last_info_update = datetime.datetime.now() - datetime.timedelta(hours=2)
+
+        # Act
+        oai_registry_api.refresh_registry_info(registry)
+
+        # Assert
+        mock_update_registry_info.assert_called_once_with(registry, only_if_changed=True)
+
+
+class TestGetRegistryInfoAsObject(TestCase):
+    """
+    Test concurrent requests of the registry information
+    """
+    @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
+    @patch.object(oai_verbs_api, 'list_sets_as_object')
+    @patch.object(oai_verbs_api, 'identify_as_object')
+    def test_get_registry_info_sends_requests_at_the_same_time(self, mock_identify, mock_sets,
+                                                               mock_metadata_formats):
+        """
+
+        Args:
+            mock_identify:
+            mock_sets:
+            mock_metadata_formats:
+
+        Returns:
+
+        """
+        # Arrange
+        running = {'current': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def request(response):
+            def send_request(url):
+                with lock:
+                    running['current'] += 1
+                    running['max'] = max(running['max'], running['current'])
+                time.sleep(0.05)
+                with lock:
+                    running['current'] -= 1
+                return response, status.HTTP_200_OK
+            return send_request
+        identify = OaiPmhMock.mock_oai_identify()
+        mock_identify.side_effect = request(identify)
+        mock_sets.side_effect = request([])
+        mock_metadata_formats.side_effect = request([])
+
+        # Act
+        result = oai_registry_api._get_registry_info_as_object("dummy_url")
+
+        # Assert
+        self.assertEquals(result, [identify, [], []])
+        self.assertEquals(running['max'], 3)
+
+    @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
+    @patch.object(oai_verbs_api, 'list_sets_as_object')
+    @patch.object(oai_verbs_api, 'identify_as_object')
+    def test_get_registry_info_raises_exception_if_a_request_fails(self, mock_identify, mock_sets,
+                                                                   mock_metadata_formats):
+        """
+
+        Args:
+            mock_identify:
+            mock_sets:
+            mock_metadata_formats:
+
+        Returns:
+
+        """
+        # Arrange
+        mock_identify.return_value = OaiPmhMock.mock_oai_identify(), status.HTTP_200_OK
+        mock_sets.return_value = OaiPmhMessage.get_message_labelled("Error."), \
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        mock_metadata_formats.return_value = [], status.HTTP_200_OK
+
+        # Act + Assert
+        with self.assertRaises(oai_pmh_exceptions.OAIAPILabelledException):
+            oai_registry_api._get_registry_info_as_object("dummy_url")
+
+
+class TestMapConcurrently(TestCase):
+    """
+    Test bounded concurrent map
+    """
+    def test_map_concurrently_limits_items_processed_at_the_same_time(self):
+        """
+
+        Returns:
+
+        """
+        # Arrange
+        running = {'current': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def function(item):
+            with lock:
+                running['current'] += 1
+                running['max'] = max(running['max'], running['current'])
+            time.sleep(0.02)
+            with lock:
+                running['current'] -= 1
+            return item * 2
+
+        # Act
+        result = oai_registry_api._map_concurrently(function, range(10), 3)
+
+        # Assert
+        self.assertEquals(result, [item * 2 for item in range(10)])
+        self.assertEquals(running['max'], 3)
+
+
+class TestConsumeRecords(TestCase):
+    """
+    Test consumption of the records of a page
+    """
+    def test_consume_records_yields_records_in_order_and_empties_page(self):
+        """
+
+        Returns:
+
+        """
+        # Arrange
+        records = [{'identifier': 'a'}, {'identifier': 'b'}, {'identifier': 'c'}]
+
+        # Act
+        result = list(oai_registry_api._consume_records(records))
+
+        # Assert
+        self.assertEquals(result, [{'identifier': 'a'}, {'identifier': 'b'}, {'identifier': 'c'}])
+        self.assertEquals(records, [])
+
 
 class TestGetIdentifyAsObject(TestCase):
     """
@@ -1023,5 +1731,7 @@ def _set_oai_registry_fields(oai_registry):
     oai_registry.is_updating = False
     oai_registry.is_activated = True
     oai_registry.is_queued = True
+    oai_registry.info_fingerprint = None
+    oai_registry.last_info_update = None
 
     return oai_registry
@@ -1,5 +1,6 @@
 """ Unit Test oai_verbs
 """
+import datetime
 from unittest.case import TestCase
 from mock.mock import patch
 from core_oaipmh_common_app.commons import exceptions as oai_pmh_exceptions
@@ -7,7 +8,6 @@ import core_oaipmh_harvester_app.components.oai_verbs.api as oai_verbs_api
 from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import OaiHarvesterMetadataFormat
 from core_oaipmh_harvester_app.components.oai_identify.models import OaiIdentify
 from core_oaipmh_harvester_app.components.oai_harvester_set.models import OaiHarvesterSet
-from tests.test_settings import SSL_CERTIFICATES_DIR
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhMock
 from rest_framework import status
 import requests
@@ -70,11 +70,11 @@ class TestListRecordsParameter(TestCase):
         self.from_ = "2017-04-24T02:00:00Z"
         self.until = "2018-04-24T02:00:00Z"
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_harvest_params(self, mock_get):
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.mock_oai_response_list_records()]
         expected_params = {'verb': 'ListRecords',
                            'metadataPrefix': self.metadata_prefix,
                            'set': self.set,
@@ -87,13 +87,13 @@ class TestListRecordsParameter(TestCase):
                                    set_h=self.set, from_date=self.from_, until_date=self.until)
 
         # Assert
-        mock_get.assert_called_with(self.url, expected_params, verify=SSL_CERTIFICATES_DIR)
+        mock_get.assert_called_with(self.url, params=expected_params, stream=True)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_harvest_params_with_resumption_token(self, mock_get):
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.mock_oai_response_list_records()]
         resumption_token = "h34fh"
         expected_params = {'verb': 'ListRecords', 'resumptionToken': "h34fh"}
 
@@ -103,9 +103,9 @@ class TestListRecordsParameter(TestCase):
                                    resumption_token=resumption_token)
 
         # Asset
-        mock_get.assert_called_with(self.url, expected_params, verify=SSL_CERTIFICATES_DIR)
+        mock_get.assert_called_with(self.url, params=expected_params, stream=True)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_harvest_params_returns_error_if_not_200_OK(self, mock_get):
         # Arrange
         error = "An error occurred while trying to get data from the server."
@@ -114,13 +114,61 @@ class TestListRecordsParameter(TestCase):
         mock_get.return_value.text = 'Error.'
 
         # Act
-        result, resumption_token = oai_verbs_api.list_records(self.url)
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
 
         # Assert
         self.assertEqual(result.data[oai_pmh_exceptions.OaiPmhMessage.label], error)
         self.assertEqual(result.status_code, status_code)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_closes_response_if_not_200_OK(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        # Act
+        oai_verbs_api.list_records(self.url)
+
+        # Assert
+        self.assertTrue(mock_get.return_value.close.called)
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_closes_response_if_parse_error(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = ['<OAI-PMH><ListRecords>']
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
+
+        # Assert
+        self.assertEqual(result.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertTrue(mock_get.return_value.close.called)
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_returns_retry_after_if_503_service_unavailable(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        mock_get.return_value.headers = {'Retry-After': '120'}
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
+
+        # Assert
+        self.assertEqual(result.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(result['Retry-After'], '120')
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_returns_503_if_connection_error(self, mock_get):
+        # Arrange
+        mock_get.side_effect = requests.ConnectionError("Error.")
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
+
+        # Assert
+        self.assertEqual(result.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @patch.object(requests.Session, 'get')
     def test_harvest_params_returns_error_if_404_not_found(self, mock_get):
         # Arrange
         error = "Impossible to get data from the server. Server not found"
@@ -129,25 +177,74 @@ class TestListRecordsParameter(TestCase):
         mock_get.return_value.text = 'Error.'
 
         # Act
-        result, resumption_token = oai_verbs_api.list_records(self.url)
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
 
         # Assert
         self.assertEqual(result.data[oai_pmh_exceptions.OaiPmhMessage.label], error)
         self.assertEqual(result.status_code, status_code)
 
-    @patch.object(requests, 'get')
+    @patch.object(requests.Session, 'get')
     def test_harvest_params_returns_serialized_data_and_resumption_token(self, mock_get):
         # Arrange
         mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = OaiPmhMock.mock_oai_response_list_records()
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.mock_oai_response_list_records()]
         resumption_token = "h34fh"
 
         # Act
-        result, resumption_token = oai_verbs_api.list_records(url=self.url, metadata_prefix=self.metadata_prefix,
-                                                              set_h=self.set, from_date=self.from_,
-                                                              until_date=self.until, resumption_token=resumption_token)
+        result, resumption_token, page = oai_verbs_api.list_records(url=self.url,
+                                                                    metadata_prefix=self.metadata_prefix,
+                                                                    set_h=self.set, from_date=self.from_,
+                                                                    until_date=self.until,
+                                                                    resumption_token=resumption_token)
 
         # Asset
         self.assertEqual(result.status_code, status.HTTP_200_OK)
         self.assertNotEqual(resumption_token, None)
         self.assertTrue(len(result.data), 1)
+        self.assertTrue(mock_get.return_value.close.called)
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_returns_resumption_token_attributes_in_page(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = [OaiPmhMock.mock_oai_response_list_records()]
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(url=self.url,
+                                                                    metadata_prefix=self.metadata_prefix)
+
+        # Assert
+        self.assertEqual(page.cursor, 0)
+        self.assertEqual(page.complete_list_size, 6)
+        self.assertEqual(page.expiration_date, datetime.datetime(2002, 6, 1, 23, 20))
+        self.assertEqual(page.record_count, len(result.data))
+        self.assertTrue(page.content_bytes > 0)
+        self.assertTrue(page.fetch_seconds >= 0)
+        self.assertTrue(page.parse_seconds >= 0)
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_returns_empty_page_if_error(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(self.url)
+
+        # Assert
+        self.assertIsNone(page.cursor)
+        self.assertIsNone(page.complete_list_size)
+        self.assertIsNone(page.expiration_date)
+
+    @patch.object(requests.Session, 'get')
+    def test_harvest_params_returns_410_if_bad_resumption_token(self, mock_get):
+        # Arrange
+        mock_get.return_value.status_code = status.HTTP_200_OK
+        mock_get.return_value.iter_content.return_value = ['<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+                                                           '<error code="badResumptionToken"/></OAI-PMH>']
+
+        # Act
+        result, resumption_token, page = oai_verbs_api.list_records(self.url, resumption_token="h34fh")
+
+        # Assert
+        self.assertEqual(result.status_code, status.HTTP_410_GONE)
+        self.assertIsNone(resumption_token)
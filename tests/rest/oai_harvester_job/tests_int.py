@@ -0,0 +1,66 @@
+""" Int Test Rest OaiHarvesterJob
+"""
+import datetime
+
+from bson.objectid import ObjectId
+from rest_framework import status
+
+from core_main_app.utils.integration_tests.integration_base_test_case import \
+    MongoIntegrationBaseTestCase
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app.components.oai_harvester_job import api as oai_harvester_job_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob, HARVEST, \
+    RUNNING
+from core_oaipmh_harvester_app.rest.oai_harvester_job import views as rest_oai_harvester_job
+from core_oaipmh_harvester_app.utils import event_operations
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+
+class TestJobDetail(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestJobDetail, self).setUp()
+        self.fixture.insert_registry(insert_records=False)
+        self.job = oai_harvester_job_api.upsert(
+            OaiHarvesterJob(registry=self.fixture.registry, job_type=HARVEST, status=RUNNING,
+                            start_date=datetime.datetime.utcnow() - datetime.timedelta(seconds=1)))
+
+    def test_get_job_returns_status_and_progress_of_each_chain(self):
+        # Arrange
+        for pages in (1, 2):
+            event_operations.publish(self.fixture.registry, event_operations.PROGRESS,
+                                     {'chain': 'oai_dc/', 'pages': pages})
+        user = create_mock_user('1', is_staff=True)
+
+        # Act
+        response = RequestMock.do_request_get(rest_oai_harvester_job.JobDetail.as_view(), user,
+                                              param={'job_id': str(self.job.id)})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], RUNNING)
+        self.assertEqual(response.data['progress'], [{'chain': 'oai_dc/', 'pages': 2}])
+
+    def test_get_job_returns_http_404_if_not_found(self):
+        # Arrange
+        user = create_mock_user('1', is_staff=True)
+
+        # Act
+        response = RequestMock.do_request_get(rest_oai_harvester_job.JobDetail.as_view(), user,
+                                              param={'job_id': str(ObjectId())})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_job_returns_http_403_if_not_staff(self):
+        # Arrange
+        user = create_mock_user('1')
+
+        # Act
+        response = RequestMock.do_request_get(rest_oai_harvester_job.JobDetail.as_view(), user,
+                                              param={'job_id': str(self.job.id)})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
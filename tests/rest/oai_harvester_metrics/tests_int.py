@@ -0,0 +1,47 @@
+""" Int Test Rest OaiHarvesterMetrics
+"""
+from rest_framework import status
+
+from core_main_app.utils.integration_tests.integration_base_test_case import \
+    MongoIntegrationBaseTestCase
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app.components.oai_harvester_metrics import api as oai_harvester_metrics_api
+from core_oaipmh_harvester_app.rest.oai_harvester_metrics import views as rest_oai_harvester_metrics
+from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
+
+
+class TestHarvestMetrics(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestHarvestMetrics, self).setUp()
+        self.fixture.insert_registry(insert_records=False)
+
+    def test_get_metrics_returns_prometheus_text(self):
+        # Arrange
+        metadata_format = self.fixture.oai_metadata_formats[0]
+        oai_harvester_metrics_api.inc_by_metadata_format_and_set(metadata_format, None, self.fixture.registry,
+                                                                 pages=3, records=30, bytes_=4096, seconds=2.0,
+                                                                 stage_seconds={'fetch': 1.5})
+        user = create_mock_user('1', is_staff=True)
+
+        # Act
+        response = RequestMock.do_request_get(rest_oai_harvester_metrics.HarvestMetrics.as_view(), user)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('oai_harvester_pages_total{{registry="{0}",metadata_prefix="{1}",set=""}} 3'.
+                      format(self.fixture.registry.name, metadata_format.metadata_prefix), response.content)
+        self.assertIn('oai_harvester_bytes_total{{registry="{0}",metadata_prefix="{1}",set=""}} 4096\n'.
+                      format(self.fixture.registry.name, metadata_format.metadata_prefix), response.content)
+
+    def test_get_metrics_returns_http_403_if_not_staff(self):
+        # Arrange
+        user = create_mock_user('1')
+
+        # Act
+        response = RequestMock.do_request_get(rest_oai_harvester_metrics.HarvestMetrics.as_view(), user)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
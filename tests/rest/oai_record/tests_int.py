@@ -1,11 +1,17 @@
 """ Int Test Rest OaiRecord
 """
+import json
+
+from mock.mock import patch, PropertyMock
 from rest_framework import status
+from rest_framework.test import APIRequestFactory
 
 from core_main_app.utils.integration_tests.integration_base_test_case import \
     MongoIntegrationBaseTestCase
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app.components.oai_record import api as oai_record_api
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
 from core_oaipmh_harvester_app.rest.oai_record import views as oai_record_rest_views
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures
 
@@ -55,3 +61,221 @@ class TestExecuteQueryView(MongoIntegrationBaseTestCase):
 
         # Assert
         self.assertEqual(len(response.data), 1)
+
+
+class TestExecuteQueryViewFields(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestExecuteQueryViewFields, self).setUp()
+        self.fixture.insert_registry()
+        self.data = {"query": "{}"}
+        self.user = create_mock_user('1')
+
+    def test_post_query_with_fields_returns_only_fields(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                               "fields=identifier,registry")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data[0].keys()), ['identifier', 'registry'])
+
+    def test_post_query_returns_reference_ids(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data)
+
+        # Assert
+        self.assertEqual(response.data[0]['registry'], str(self.fixture.registry.id))
+        self.assertEqual(response.data[0]['harvester_metadata_format'],
+                         str(self.fixture.oai_metadata_formats[0].id))
+
+    def test_post_query_with_unknown_field_returns_http_400(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                               "fields=identifier,dict_content")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_export_with_fields_returns_only_fields(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data,
+                               "fields=identifier")
+
+        # Assert
+        lines = _get_json_lines(response)
+        self.assertEqual(sorted(lines[0].keys()), ['id', 'identifier'])
+
+
+class TestExecuteQueryViewPageToken(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestExecuteQueryViewPageToken, self).setUp()
+        self.fixture.insert_registry()
+        # Records with the same title are ordered by id
+        for identifier in ["oai:second", "oai:third"]:
+            OaiRecord(identifier=identifier, title="oai:same_title", deleted=False,
+                      registry=self.fixture.registry,
+                      harvester_metadata_format=self.fixture.oai_metadata_formats[0]).save()
+        self.data = {"query": "{}"}
+        self.user = create_mock_user('1')
+
+    def test_post_query_with_page_token_returns_all_records_in_order(self):
+        # Arrange
+        identifiers = []
+        query_string = "page_token=&page_size=1"
+
+        # Act
+        while True:
+            response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                                   query_string)
+            self.assertEqual(len(response.data), 1)
+            identifiers.extend(record['identifier'] for record in response.data)
+            if not response.has_header(oai_record_rest_views.NEXT_PAGE_TOKEN_HEADER):
+                break
+            query_string = "page_size=1&page_token={0}".format(
+                response[oai_record_rest_views.NEXT_PAGE_TOKEN_HEADER])
+
+        # Assert
+        expected_records = sorted(oai_record_api.get_all(), key=lambda record: (record.title,
+                                                                                 record.id))
+        self.assertEqual(identifiers, [record.identifier for record in expected_records])
+
+    def test_post_query_with_page_returns_page_size_records(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                               "page=1&page_size=2")
+
+        # Assert
+        self.assertEqual(len(response.data), 2)
+
+    def test_post_query_with_bad_page_token_returns_http_400(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                               "page_token=bad_token")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(oai_record_rest_views, 'OAI_HARVESTER_QUERY_MAX_PAGE_SIZE', 2)
+    def test_post_query_with_page_size_above_maximum_returns_http_400(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExecuteQueryView, self.user, self.data,
+                               "page_size=3")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestExportQueryView(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestExportQueryView, self).setUp()
+        self.fixture.insert_registry()
+        # A second record, to export several pages
+        second_record = OaiRecord(identifier="oai:second", title="oai:second", deleted=False,
+                                  registry=self.fixture.registry,
+                                  harvester_metadata_format=self.fixture.oai_metadata_formats[0])
+        self.records = self.fixture.oai_records + [second_record.save()]
+        self.data = {"query": "{}"}
+        self.user = create_mock_user('1')
+
+    def test_post_export_returns_all_records_as_json_lines(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = _get_json_lines(response)
+        self.assertEqual(sorted(line['id'] for line in lines),
+                         sorted(str(record.id) for record in self.records))
+
+    def test_post_export_with_limit_returns_next_after_header(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data, "limit=1")
+
+        # Assert
+        lines = _get_json_lines(response)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(response[oai_record_rest_views.NEXT_AFTER_HEADER], lines[0]['id'])
+
+    def test_post_export_pages_return_all_records(self):
+        # Arrange
+        ids = []
+        query_string = "limit=1"
+
+        # Act
+        while True:
+            response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data, query_string)
+            ids.extend(line['id'] for line in _get_json_lines(response))
+            if not response.has_header(oai_record_rest_views.NEXT_AFTER_HEADER):
+                break
+            query_string = "limit=1&after={0}".format(
+                response[oai_record_rest_views.NEXT_AFTER_HEADER])
+
+        # Assert
+        self.assertEqual(ids, sorted(str(record.id) for record in self.records))
+
+    @patch.object(OaiRecord, 'xml_content', new_callable=PropertyMock)
+    def test_post_export_xml_returns_xml_contents(self, mock_xml_content):
+        # Arrange
+        mock_xml_content.return_value = "<test/>"
+
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data, "export_format=xml")
+
+        # Assert
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertEqual("".join(response.streaming_content),
+                         "<test/>\n" * len(self.records))
+
+    def test_post_export_bad_after_returns_http_400(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data, "after=bad_id")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_export_bad_format_returns_http_400(self):
+        # Act
+        response = _do_request(oai_record_rest_views.ExportQueryView, self.user, self.data, "export_format=csv")
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def _do_request(view, user, data, query_string=None):
+    """ Send a POST request to a view, with query parameters.
+
+    Args:
+        view: View class.
+        user: User for the request.
+        data: Data.
+        query_string: Query parameters.
+
+    Returns:
+        Response.
+
+    """
+    url = "/dummy_url"
+    if query_string is not None:
+        url += "?" + query_string
+    request = APIRequestFactory().post(url, data=data)
+    request.user = user
+    return view.as_view()(request)
+
+
+def _get_json_lines(response):
+    """ Parse the JSON lines of a streaming response.
+
+    Args:
+        response: Response.
+
+    Returns:
+        List of dict.
+
+    """
+    return [json.loads(line) for line in "".join(response.streaming_content).splitlines()]
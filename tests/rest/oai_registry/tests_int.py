@@ -8,6 +8,10 @@ from core_main_app.utils.integration_tests.integration_base_test_case import \
     MongoIntegrationBaseTestCase
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import RequestMock
+from core_oaipmh_harvester_app import tasks
+from core_oaipmh_harvester_app.components.oai_harvester_job import api as oai_harvester_job_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import PENDING, SUCCESS, FAILURE
+from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
 from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
 from core_oaipmh_harvester_app.rest.oai_registry import views as rest_oai_registry
 from tests.components.oai_registry.fixtures.fixtures import OaiPmhFixtures, OaiPmhMock
@@ -61,11 +65,13 @@ class TestUpdateRegistryInfo(MongoIntegrationBaseTestCase):
         self.fixture.insert_registry()
         self.param = {"registry_id": self.fixture.registry.id}
 
-    @patch.object(requests, 'get')
+    @patch.object(tasks.registry_job_task, 'apply_async')
+    @patch.object(requests.Session, 'get')
     @patch.object(oai_verbs_api, 'list_sets_as_object')
     @patch.object(oai_verbs_api, 'list_metadata_formats_as_object')
     @patch.object(oai_verbs_api, 'identify_as_object')
-    def test_update_registry_info(self, mock_identify, mock_metadata_formats, mock_sets, mock_get):
+    def test_update_registry_info(self, mock_identify, mock_metadata_formats, mock_sets, mock_get,
+                                  mock_apply_async):
         # Arrange
         identify = OaiPmhMock.mock_oai_identify(version=2)
         mock_identify.return_value = identify, status.HTTP_200_OK
@@ -81,9 +87,70 @@ class TestUpdateRegistryInfo(MongoIntegrationBaseTestCase):
         response = RequestMock.do_request_patch(rest_oai_registry.InfoRegistry.as_view(),
                                                 user=create_mock_user('1', is_staff=True),
                                                 param=self.param)
+        # Run the queued job, as a worker
+        tasks.registry_job_task(*mock_apply_async.call_args[0][0])
 
         # Assert
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], PENDING)
+        self.assertEqual(oai_harvester_job_api.get_by_id(response.data['id']).status, SUCCESS)
+
+
+class TestHarvestRegistry(MongoIntegrationBaseTestCase):
+    fixture = OaiPmhFixtures()
+
+    def setUp(self):
+        super(TestHarvestRegistry, self).setUp()
+        self.fixture.insert_registry()
+        self.param = {"registry_id": self.fixture.registry.id}
+
+    @patch.object(oai_registry_api, 'harvest_registry')
+    @patch.object(tasks.registry_job_task, 'apply_async')
+    def test_harvest_registry_returns_job_before_the_harvest(self, mock_apply_async,
+                                                             mock_harvest_registry):
+        # Act
+        response = RequestMock.do_request_patch(rest_oai_registry.Harvest.as_view(),
+                                                user=create_mock_user('1', is_staff=True),
+                                                param=self.param)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], PENDING)
+        mock_apply_async.assert_called_once_with((response.data['id'],))
+        self.assertFalse(mock_harvest_registry.called)
+
+    @patch.object(oai_registry_api, 'harvest_registry')
+    @patch.object(tasks.registry_job_task, 'apply_async')
+    def test_harvest_job_fails_with_harvest_errors(self, mock_apply_async, mock_harvest_registry):
+        # Arrange
+        errors = [{'status_code': status.HTTP_400_BAD_REQUEST, 'error': 'Error.'},
+                  {'status_code': status.HTTP_503_SERVICE_UNAVAILABLE, 'error': 'Unavailable.'}]
+        # One list of errors per harvest chain
+        mock_harvest_registry.return_value = [errors[:1], errors[1:]]
+
+        # Act
+        response = RequestMock.do_request_patch(rest_oai_registry.Harvest.as_view(),
+                                                user=create_mock_user('1', is_staff=True),
+                                                param=self.param)
+        tasks.registry_job_task(*mock_apply_async.call_args[0][0])
+
+        # Assert
+        job = oai_harvester_job_api.get_by_id(response.data['id'])
+        self.assertEqual(job.status, FAILURE)
+        self.assertEqual(job.errors, errors)
+
+    @patch.object(tasks.registry_job_task, 'apply_async')
+    def test_harvest_job_fails_if_not_queued(self, mock_apply_async):
+        # Arrange
+        mock_apply_async.side_effect = Exception('Broker unavailable.')
+
+        # Act
+        response = RequestMock.do_request_patch(rest_oai_registry.Harvest.as_view(),
+                                                user=create_mock_user('1', is_staff=True),
+                                                param=self.param)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class TestUpdateRegistryConf(MongoIntegrationBaseTestCase):
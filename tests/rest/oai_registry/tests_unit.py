@@ -10,10 +10,8 @@ from rest_framework import status
 from core_main_app.commons import exceptions
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from core_main_app.utils.tests_tools.RequestMock import RequestMock
-from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as \
-    oai_harvester_metadata_format_api
-from core_oaipmh_harvester_app.components.oai_harvester_set import api as oai_harvester_set_api
-from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
+from core_oaipmh_harvester_app.components.oai_harvester_job.models import OaiHarvesterJob, HARVEST, \
+    PENDING
 from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
 from core_oaipmh_harvester_app.rest.oai_registry import views as rest_oai_registry
 
@@ -281,21 +279,13 @@ class TestHarvestRegistry(TestCase):
         super(TestHarvestRegistry, self).setUp()
         self.param = {"registry_id": str(ObjectId())}
 
+    @patch.object(rest_oai_registry, 'queue_registry_job')
     @patch.object(OaiRegistry, 'get_by_id')
-    @patch.object(oai_registry_api, '_harvest_by_metadata_formats')
-    @patch.object(oai_harvester_set_api, 'get_all_to_harvest_by_registry_id')
-    @patch.object(oai_harvester_set_api, 'get_all_by_registry_id')
-    @patch.object(oai_harvester_metadata_format_api, 'get_all_to_harvest_by_registry_id')
-    def test_harvest_registry(self, mock_metadata_formats, mock_sets_all, mock_sets_to_harvest,
-                              mock_harvest_by_metadata_formats, mock_get_by_id):
+    def test_harvest_registry_queues_harvest_job(self, mock_get_by_id, mock_queue_registry_job):
         # Arrange
         mock_registry = _create_mock_oai_registry()
         mock_get_by_id.return_value = mock_registry
-        mock_metadata_formats.return_value = []
-        mock_sets_all.return_value = [object(), object()]
-        # Harvest all sets.
-        mock_sets_to_harvest.return_value = mock_sets_all.return_value
-        mock_harvest_by_metadata_formats.return_value = []
+        mock_queue_registry_job.return_value = OaiHarvesterJob(id=ObjectId(), job_type=HARVEST)
 
         # Act
         response = RequestMock.do_request_patch(rest_oai_registry.Harvest.as_view(),
@@ -303,7 +293,9 @@ class TestHarvestRegistry(TestCase):
                                                 param=self.param)
 
         # Assert
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], PENDING)
+        mock_queue_registry_job.assert_called_once_with(mock_registry, HARVEST)
 
     def test_harvest_registry_unauthorized(self):
         # Act
@@ -0,0 +1,67 @@
+"""
+    Conversion operation test class
+"""
+from unittest import TestCase
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from mock.mock import Mock, patch
+
+from core_oaipmh_harvester_app import tasks  # noqa: F401, connects the worker shutdown handlers
+from core_oaipmh_harvester_app.components.oai_record.models import OaiRecord
+from core_oaipmh_harvester_app.utils import conversion_operations
+
+
+class TestConvertRecordsToDict(TestCase):
+    def test_xml_content_to_dict_returns_dict(self):
+        # Act
+        result = conversion_operations.xml_content_to_dict("<test><message>Hello</message></test>")
+
+        # Assert
+        self.assertEquals(result['test']['message'], "Hello")
+
+    @patch.object(conversion_operations, 'get_pool')
+    def test_convert_records_to_dict_sets_dict_content(self, mock_get_pool):
+        # Arrange
+        mock_get_pool.return_value = Mock(map=map)
+        oai_record = OaiRecord()
+        oai_record.xml_content = "<test><message>Hello</message></test>"
+        deleted_oai_record = OaiRecord()
+        deleted_oai_record.xml_content = None
+
+        # Act
+        conversion_operations.convert_records_to_dict([oai_record, deleted_oai_record])
+
+        # Assert
+        self.assertEquals(oai_record.dict_content['test']['message'], "Hello")
+        self.assertEquals(deleted_oai_record.dict_content, {})
+
+
+class TestClosePool(TestCase):
+    @patch.object(conversion_operations, 'Pool')
+    def test_close_pool_stops_pool(self, mock_pool):
+        # Arrange
+        pool = conversion_operations.get_pool()
+
+        # Act
+        conversion_operations.close_pool()
+
+        # Assert
+        self.assertTrue(pool.close.called)
+        self.assertTrue(pool.join.called)
+        self.assertIsNone(conversion_operations._pool)
+
+    @patch.object(conversion_operations, 'close_pool')
+    def test_worker_process_shutdown_closes_pool(self, mock_close_pool):
+        # Act
+        worker_process_shutdown.send(sender=None, pid=0, exitcode=0)
+
+        # Assert
+        self.assertTrue(mock_close_pool.called)
+
+    @patch.object(conversion_operations, 'close_pool')
+    def test_worker_shutdown_closes_pool(self, mock_close_pool):
+        # Act
+        worker_shutdown.send(sender=None)
+
+        # Assert
+        self.assertTrue(mock_close_pool.called)
@@ -0,0 +1,45 @@
+"""
+    Document operation test class
+"""
+from unittest import TestCase
+
+from bson.objectid import ObjectId
+from mock.mock import patch
+
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.utils import document_operations
+
+
+class TestIsDocumentChanged(TestCase):
+    @patch.object(OaiRegistry, '_get_changed_fields')
+    def test_is_document_changed_is_false_if_other_fields_changed(self, mock_get_changed_fields):
+        # Arrange
+        mock_get_changed_fields.return_value = ['harvest_rate']
+        registry = OaiRegistry(id=ObjectId())
+        registry._created = False
+
+        # Act
+        result = document_operations.is_document_changed(registry, ['is_activated', 'is_harvesting'])
+
+        # Assert
+        self.assertFalse(result)
+
+    @patch.object(OaiRegistry, '_get_changed_fields')
+    def test_is_document_changed_is_true_if_given_field_changed(self, mock_get_changed_fields):
+        # Arrange
+        mock_get_changed_fields.return_value = ['is_harvesting']
+        registry = OaiRegistry(id=ObjectId())
+        registry._created = False
+
+        # Act
+        result = document_operations.is_document_changed(registry, ['is_activated', 'is_harvesting'])
+
+        # Assert
+        self.assertTrue(result)
+
+    def test_is_document_changed_is_true_for_new_document(self):
+        # Act
+        result = document_operations.is_document_changed(OaiRegistry(), ['is_activated'])
+
+        # Assert
+        self.assertTrue(result)
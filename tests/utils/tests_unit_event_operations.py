@@ -0,0 +1,241 @@
+"""
+    Event operation test class
+"""
+from unittest import TestCase
+
+from bson.objectid import ObjectId
+from mock.mock import Mock, patch
+
+from core_oaipmh_harvester_app.components.oai_harvester_event import api as oai_harvester_event_api
+from core_oaipmh_harvester_app.components.oai_harvester_event.models import OaiHarvesterEvent
+from core_oaipmh_harvester_app.components.oai_harvester_event_stream import api as \
+    oai_harvester_event_stream_api
+from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
+from core_oaipmh_harvester_app.utils import event_operations
+
+
+class TestChainProgress(TestCase):
+    def setUp(self):
+        self.registry = Mock(id=ObjectId())
+        self.metadata_format = Mock(metadata_prefix='oai_dc')
+
+    @patch.object(event_operations, 'publish')
+    def test_end_page_publishes_progress_of_the_chain(self, mock_publish):
+        # Arrange
+        chain_progress = event_operations.ChainProgress(self.registry, self.metadata_format,
+                                                        Mock(set_spec='physics'))
+
+        # Act
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage({'completeListSize': '10', 'cursor': '4'},
+                                                              record_count=2))
+
+        # Assert
+        registry, event_type, data = mock_publish.call_args[0]
+        self.assertEquals(event_type, event_operations.PROGRESS)
+        self.assertEquals(data['registry_id'], str(self.registry.id))
+        self.assertEquals(data['chain'], 'oai_dc/physics')
+        self.assertEquals(data['pages'], 1)
+        self.assertEquals(data['records'], 2)
+        self.assertEquals(data['done'], 6)
+        self.assertEquals(data['complete_list_size'], 10)
+        self.assertTrue(data['eta'] >= 0)
+
+    @patch.object(event_operations, 'publish')
+    def test_end_page_counts_the_pages_of_the_chain(self, mock_publish):
+        # Arrange
+        chain_progress = event_operations.ChainProgress(self.registry, self.metadata_format)
+
+        # Act
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=2))
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=1))
+        chain_progress.flush()
+
+        # Assert
+        data = mock_publish.call_args[0][2]
+        self.assertEquals(data['chain'], 'oai_dc/')
+        self.assertEquals(data['pages'], 2)
+        self.assertEquals(data['records'], 3)
+        self.assertEquals(data['done'], 3)
+        self.assertIsNone(data['eta'])
+
+    @patch.object(event_operations, 'publish')
+    def test_end_page_publishes_at_most_every_progress_seconds(self, mock_publish):
+        # Arrange
+        chain_progress = event_operations.ChainProgress(self.registry, self.metadata_format)
+
+        # Act
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=1))
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=1))
+
+        # Assert
+        self.assertEquals(mock_publish.call_count, 1)
+
+    @patch.object(event_operations, 'publish')
+    def test_flush_publishes_the_last_progress(self, mock_publish):
+        # Arrange
+        chain_progress = event_operations.ChainProgress(self.registry, self.metadata_format)
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=1))
+        chain_progress.end_page(oai_verbs_api.ListRecordsPage(record_count=1))
+
+        # Act
+        chain_progress.flush()
+        chain_progress.flush()
+
+        # Assert
+        self.assertEquals(mock_publish.call_count, 2)
+        self.assertEquals(mock_publish.call_args[0][2]['pages'], 2)
+
+
+class TestPublish(TestCase):
+    @patch.object(oai_harvester_event_api, 'publish')
+    def test_publish_ignores_errors(self, mock_publish):
+        # Arrange
+        mock_publish.side_effect = Exception("Error.")
+
+        # Act
+        event_operations.publish(Mock(), event_operations.REGISTRY, {})
+
+        # Assert
+        self.assertEquals(mock_publish.call_count, 1)
+
+    @patch.object(oai_harvester_event_api, 'publish')
+    def test_publish_registry_status_publishes_registry_event(self, mock_publish):
+        # Arrange
+        registry = Mock(id=ObjectId(), is_harvesting=True)
+
+        # Act
+        event_operations.publish_registry_status(registry)
+
+        # Assert
+        _, event_type, data = mock_publish.call_args[0]
+        self.assertEquals(event_type, event_operations.REGISTRY)
+        self.assertEquals(data['registry_id'], str(registry.id))
+        self.assertTrue(data['is_harvesting'])
+
+
+class TestOpenStream(TestCase):
+    @patch.object(oai_harvester_event_stream_api, 'delete_by_id')
+    @patch.object(oai_harvester_event_stream_api, 'get_open_count')
+    @patch.object(oai_harvester_event_stream_api, 'create')
+    @patch.object(event_operations, 'OAI_HARVESTER_EVENTS_MAX_STREAMS', 1)
+    def test_open_stream_returns_none_over_the_limit(self, mock_create, mock_get_open_count,
+                                                     mock_delete_by_id):
+        # Arrange
+        stream_id = ObjectId()
+        mock_create.return_value = Mock(id=stream_id)
+        mock_get_open_count.return_value = 2
+
+        # Act
+        result = event_operations.open_stream(_iter_events())
+
+        # Assert
+        self.assertIsNone(result)
+        mock_delete_by_id.assert_called_once_with(stream_id)
+
+    @patch.object(oai_harvester_event_stream_api, 'delete_by_id')
+    @patch.object(oai_harvester_event_stream_api, 'get_open_count')
+    @patch.object(oai_harvester_event_stream_api, 'create')
+    @patch.object(event_operations, 'OAI_HARVESTER_EVENTS_MAX_STREAMS', 1)
+    def test_open_stream_returns_stream_closed_once(self, mock_create, mock_get_open_count,
+                                                    mock_delete_by_id):
+        # Arrange
+        stream_id = ObjectId()
+        mock_create.return_value = Mock(id=stream_id)
+        mock_get_open_count.return_value = 1
+
+        # Act
+        result = event_operations.open_stream(_iter_events())
+        events = list(result)
+        result.close()
+        result.close()
+
+        # Assert
+        self.assertEquals(events, ['event'])
+        mock_delete_by_id.assert_called_once_with(stream_id)
+
+    @patch.object(oai_harvester_event_stream_api, 'create')
+    def test_open_stream_returns_none_if_count_failed(self, mock_create):
+        # Arrange
+        mock_create.side_effect = Exception("Error.")
+
+        # Act
+        result = event_operations.open_stream(_iter_events())
+
+        # Assert
+        self.assertIsNone(result)
+
+
+class TestIterEvents(TestCase):
+    @patch.object(event_operations.time, 'sleep')
+    @patch.object(oai_harvester_event_api, 'get_all_after')
+    def test_iter_events_yields_event_inserted_after_a_greater_id(self, mock_get_all_after,
+                                                                  mock_sleep):
+        # Arrange
+        late_event = OaiHarvesterEvent(id=ObjectId())
+        first_event = OaiHarvesterEvent(id=ObjectId())
+        mock_get_all_after.side_effect = [[first_event], [late_event, first_event]]
+
+        # Act
+        events = event_operations.iter_events(None, timeout=60)
+        result = [next(events), next(events)]
+
+        # Assert
+        self.assertEquals(result, [first_event, late_event])
+        self.assertTrue(mock_get_all_after.call_args_list[1][0][0] < late_event.id)
+
+    @patch.object(event_operations.time, 'sleep')
+    @patch.object(oai_harvester_event_api, 'get_all_after')
+    def test_iter_events_skips_events_received_before_the_last_one(self, mock_get_all_after,
+                                                                   mock_sleep):
+        # Arrange
+        received_event = OaiHarvesterEvent(id=ObjectId())
+        last_event_id = ObjectId()
+        new_event = OaiHarvesterEvent(id=ObjectId())
+        mock_get_all_after.side_effect = [[received_event], [received_event, new_event]]
+
+        # Act
+        result = next(event_operations.iter_events(last_event_id, timeout=60))
+
+        # Assert
+        self.assertEquals(result, new_event)
+
+    @patch.object(oai_harvester_event_api, 'get_all_after')
+    def test_iter_events_yields_events_after_the_last_one(self, mock_get_all_after):
+        # Arrange
+        last_event_id = ObjectId()
+        events = [OaiHarvesterEvent(id=ObjectId()), OaiHarvesterEvent(id=ObjectId())]
+        mock_get_all_after.return_value = events
+
+        # Act
+        result = list(event_operations.iter_events(last_event_id, timeout=0))
+
+        # Assert
+        self.assertEquals(result, events)
+        mock_get_all_after.assert_called_with(event_operations._get_overlap_id(last_event_id))
+
+    @patch.object(event_operations.time, 'sleep')
+    @patch.object(oai_harvester_event_api, 'get_all_after')
+    def test_iter_events_continues_after_the_last_event_yielded(self, mock_get_all_after,
+                                                                 mock_sleep):
+        # Arrange
+        first_event = OaiHarvesterEvent(id=ObjectId())
+        second_event = OaiHarvesterEvent(id=ObjectId())
+        mock_get_all_after.side_effect = [[first_event], [second_event]]
+
+        # Act
+        events = event_operations.iter_events(None, timeout=60)
+        result = [next(events), next(events)]
+
+        # Assert
+        self.assertEquals(result, [first_event, second_event])
+        self.assertEquals(mock_get_all_after.call_args_list[1][0][0],
+                          event_operations._get_overlap_id(first_event.id))
+
+
+def _iter_events():
+    """ Get the generator of a stream.
+
+    Returns:
+
+    """
+    yield 'event'
@@ -0,0 +1,38 @@
+"""
+    Index operation test class
+"""
+from unittest import TestCase
+
+from mock.mock import Mock, patch
+
+from core_oaipmh_harvester_app.utils import index_operations
+
+
+class TestInitIndexes(TestCase):
+    @patch.object(index_operations, 'INDEXED_DOCUMENTS')
+    def test_init_indexes_builds_indexes_of_each_document(self, mock_documents):
+        # Arrange
+        documents = [Mock(), Mock()]
+        mock_documents.__iter__.return_value = iter(documents)
+
+        # Act
+        index_operations.init_indexes()
+
+        # Assert
+        self.assertTrue(all(document.ensure_indexes.called for document in documents))
+
+
+class TestGetIndexUsage(TestCase):
+    def test_get_index_usage_sorts_by_operations(self):
+        # Arrange
+        document = Mock()
+        document._get_collection.return_value.aggregate.return_value = [
+            {'name': '_id_', 'key': {'_id': 1}, 'accesses': {'ops': 2, 'since': None}},
+            {'name': 'registry_1', 'key': {'registry': 1}, 'accesses': {'ops': 10, 'since': None}}]
+
+        # Act
+        result = index_operations.get_index_usage(document)
+
+        # Assert
+        self.assertEquals([index['name'] for index in result], ['registry_1', '_id_'])
+        document._get_collection.return_value.aggregate.assert_called_with([{'$indexStats': {}}])
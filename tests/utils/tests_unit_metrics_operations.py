@@ -0,0 +1,133 @@
+"""
+    Metrics operation test class
+"""
+from unittest import TestCase
+
+from mock.mock import Mock, patch
+
+from core_oaipmh_harvester_app.components.oai_harvester_metrics.models import OaiHarvesterMetrics
+from core_oaipmh_harvester_app.components.oai_verbs import api as oai_verbs_api
+from core_oaipmh_harvester_app.utils import metrics_operations
+
+
+class TestChainMetrics(TestCase):
+    def setUp(self):
+        self.registry = Mock()
+        self.metadata_format = Mock()
+
+    @patch.object(metrics_operations.oai_harvester_metrics_api, 'inc_by_metadata_format_and_set')
+    def test_end_page_saves_page_metrics(self, mock_inc):
+        # Arrange
+        page = oai_verbs_api.ListRecordsPage(fetch_seconds=1.5, parse_seconds=0.5, content_bytes=2048,
+                                             record_count=2)
+
+        # Act
+        with metrics_operations.ChainMetrics(self.registry, self.metadata_format) as chain_metrics:
+            chain_metrics.end_page(page)
+
+        # Assert
+        args, kwargs = mock_inc.call_args
+        self.assertEquals(args, (self.metadata_format, None, self.registry))
+        self.assertEquals(kwargs['pages'], 1)
+        self.assertEquals(kwargs['records'], 2)
+        self.assertEquals(kwargs['bytes_'], 2048)
+        self.assertEquals(kwargs['stage_seconds'][metrics_operations.FETCH], 1.5)
+        self.assertEquals(kwargs['stage_seconds'][metrics_operations.PARSE], 0.5)
+
+    @patch.object(metrics_operations.oai_harvester_metrics_api, 'inc_by_metadata_format_and_set')
+    def test_stage_adds_time_to_current_page(self, mock_inc):
+        # Act
+        with metrics_operations.ChainMetrics(self.registry, self.metadata_format) as chain_metrics:
+            with metrics_operations.stage(metrics_operations.MONGO):
+                pass
+            chain_metrics.end_page(oai_verbs_api.ListRecordsPage())
+            with metrics_operations.stage(metrics_operations.MONGO):
+                pass
+
+        # Assert
+        self.assertTrue(mock_inc.call_args[1]['stage_seconds'][metrics_operations.MONGO] > 0)
+        # The stages of the next page are not saved yet
+        self.assertTrue(chain_metrics.stage_seconds[metrics_operations.MONGO] > 0)
+        self.assertEquals(mock_inc.call_count, 1)
+
+    def test_stage_does_nothing_outside_of_a_chain(self):
+        # Act
+        with metrics_operations.stage(metrics_operations.MONGO):
+            result = True
+
+        # Assert
+        self.assertTrue(result)
+
+    @patch.object(metrics_operations.oai_harvester_metrics_api, 'inc_by_metadata_format_and_set')
+    def test_end_page_does_not_raise_if_save_failed(self, mock_inc):
+        # Arrange
+        mock_inc.side_effect = Exception("Error.")
+        chain_metrics = metrics_operations.ChainMetrics(self.registry, self.metadata_format)
+
+        # Act
+        chain_metrics.end_page(oai_verbs_api.ListRecordsPage())
+
+        # Assert
+        self.assertEquals(chain_metrics.stage_seconds[metrics_operations.FETCH], 0)
+
+    @patch.object(metrics_operations, 'OAI_HARVESTER_METRICS', False)
+    @patch.object(metrics_operations.oai_harvester_metrics_api, 'inc_by_metadata_format_and_set')
+    def test_end_page_does_not_save_if_metrics_disabled(self, mock_inc):
+        # Arrange
+        chain_metrics = metrics_operations.ChainMetrics(self.registry, self.metadata_format)
+
+        # Act
+        chain_metrics.end_page(oai_verbs_api.ListRecordsPage())
+
+        # Assert
+        self.assertFalse(mock_inc.called)
+
+
+class TestGetPrometheusText(TestCase):
+    def test_get_prometheus_text_writes_long_counters_without_suffix(self):
+        # Arrange
+        metrics = Mock(spec=OaiHarvesterMetrics)
+        metrics.registry.name = 'Registry'
+        metrics.harvester_metadata_format.metadata_prefix = "oai_dc"
+        metrics.harvester_set = None
+        metrics.pages = 2
+        metrics.records = None
+        metrics.bytes = long(2 ** 40)
+        metrics.seconds = 3.0
+        for stage in metrics_operations.STAGES:
+            setattr(metrics, stage + '_seconds', None)
+
+        # Act
+        result = metrics_operations.get_prometheus_text([metrics])
+
+        # Assert
+        labels = 'registry="Registry",metadata_prefix="oai_dc",set=""'
+        self.assertIn('oai_harvester_bytes_total{%s} 1099511627776\n' % labels, result)
+        self.assertIn('oai_harvester_records_total{%s} 0\n' % labels, result)
+        self.assertIn('oai_harvester_stage_seconds_total{%s,stage="fetch"} 0\n' % labels, result)
+
+    def test_get_prometheus_text_returns_counters_by_chain(self):
+        # Arrange
+        metrics = Mock(spec=OaiHarvesterMetrics)
+        metrics.registry.name = 'Registry "A"'
+        metrics.harvester_metadata_format.metadata_prefix = "oai_dc"
+        metrics.harvester_set.set_spec = "set_a"
+        metrics.pages = 2
+        metrics.records = 20
+        metrics.bytes = 4096
+        metrics.seconds = 3.0
+        for stage in metrics_operations.STAGES:
+            setattr(metrics, stage + '_seconds', 0.5)
+
+        # Act
+        result = metrics_operations.get_prometheus_text([metrics])
+
+        # Assert
+        labels = 'registry="Registry \\"A\\"",metadata_prefix="oai_dc",set="set_a"'
+        self.assertIn('# TYPE oai_harvester_pages_total counter', result)
+        self.assertIn('oai_harvester_pages_total{%s} 2' % labels, result)
+        self.assertIn('oai_harvester_records_total{%s} 20' % labels, result)
+        self.assertIn('oai_harvester_bytes_total{%s} 4096\n' % labels, result)
+        self.assertIn('oai_harvester_seconds_total{%s} 3.0\n' % labels, result)
+        self.assertIn('oai_harvester_stage_seconds_total{%s,stage="fetch"} 0.5' % labels, result)
+        self.assertIn('oai_harvester_stage_seconds_total{%s,stage="mongo"} 0.5' % labels, result)
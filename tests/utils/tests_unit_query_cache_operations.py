@@ -0,0 +1,171 @@
+"""
+    Query cache operation test class
+"""
+from unittest import TestCase
+
+from bson.objectid import ObjectId
+from mock.mock import Mock, patch
+
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format import api as \
+    oai_harvester_metadata_format_api
+from core_oaipmh_harvester_app.components.oai_harvester_metadata_format.models import \
+    OaiHarvesterMetadataFormat
+from core_oaipmh_harvester_app.components.oai_registry import api as oai_registry_api
+from core_oaipmh_harvester_app.components.oai_registry.models import OaiRegistry
+from core_oaipmh_harvester_app.utils import query_cache_operations
+
+
+@patch.object(query_cache_operations, 'OAI_HARVESTER_QUERY_CACHE_TIMEOUT', 300)
+class TestGetActivatedRegistryIds(TestCase):
+    def setUp(self):
+        query_cache_operations.clear_cache()
+
+    def tearDown(self):
+        query_cache_operations.clear_cache()
+
+    @patch.object(OaiRegistry, 'get_all_by_is_activated')
+    def test_get_activated_registry_ids_queries_once(self, mock_get_all_by_is_activated):
+        # Arrange
+        registry_id = ObjectId()
+        mock_get_all_by_is_activated.return_value.scalar.return_value = [registry_id]
+
+        # Act
+        query_cache_operations.get_activated_registry_ids()
+        result = query_cache_operations.get_activated_registry_ids()
+
+        # Assert
+        self.assertEquals(result, {str(registry_id)})
+        self.assertEquals(mock_get_all_by_is_activated.call_count, 1)
+
+    @patch.object(OaiRegistry, 'save')
+    @patch.object(OaiRegistry, 'get_all_by_is_activated')
+    def test_registry_upsert_clears_cache(self, mock_get_all_by_is_activated, mock_save):
+        # Arrange
+        mock_get_all_by_is_activated.return_value.scalar.return_value = []
+        query_cache_operations.get_activated_registry_ids()
+
+        # Act
+        oai_registry_api.upsert(OaiRegistry())
+        query_cache_operations.get_activated_registry_ids()
+
+        # Assert
+        self.assertEquals(mock_get_all_by_is_activated.call_count, 2)
+
+
+    @patch.object(OaiRegistry, '_get_changed_fields')
+    @patch.object(OaiRegistry, 'save')
+    @patch.object(OaiRegistry, 'get_all_by_is_activated')
+    def test_registry_upsert_without_activation_change_keeps_cache(self, mock_get_all_by_is_activated,
+                                                                   mock_save, mock_get_changed_fields):
+        # Arrange
+        mock_get_all_by_is_activated.return_value.scalar.return_value = []
+        mock_get_changed_fields.return_value = ['last_update']
+        query_cache_operations.get_activated_registry_ids()
+        registry = OaiRegistry(id=ObjectId())
+        registry._created = False
+
+        # Act
+        oai_registry_api.upsert(registry)
+        query_cache_operations.get_activated_registry_ids()
+
+        # Assert
+        self.assertEquals(mock_get_all_by_is_activated.call_count, 1)
+
+    @patch.object(OaiRegistry, '_get_changed_fields')
+    @patch.object(OaiRegistry, 'save')
+    @patch.object(OaiRegistry, 'get_all_by_is_activated')
+    def test_registry_upsert_with_activation_change_clears_cache(self, mock_get_all_by_is_activated,
+                                                                 mock_save, mock_get_changed_fields):
+        # Arrange
+        mock_get_all_by_is_activated.return_value.scalar.return_value = []
+        mock_get_changed_fields.return_value = ['is_activated']
+        query_cache_operations.get_activated_registry_ids()
+        registry = OaiRegistry(id=ObjectId())
+        registry._created = False
+
+        # Act
+        oai_registry_api.upsert(registry)
+        query_cache_operations.get_activated_registry_ids()
+
+        # Assert
+        self.assertEquals(mock_get_all_by_is_activated.call_count, 2)
+
+
+@patch.object(query_cache_operations, 'OAI_HARVESTER_QUERY_CACHE_TIMEOUT', 300)
+class TestGetMetadataFormatIds(TestCase):
+    def setUp(self):
+        query_cache_operations.clear_cache()
+        self.template_id = ObjectId()
+        self.registry_id = ObjectId()
+        self.metadata_format = Mock(id=ObjectId(), template=Mock(id=self.template_id),
+                                    registry=Mock(id=self.registry_id))
+
+    def tearDown(self):
+        query_cache_operations.clear_cache()
+
+    @patch.object(OaiHarvesterMetadataFormat, 'get_all_with_template')
+    def test_get_metadata_format_ids_returns_metadata_formats_of_registries(self,
+                                                                           mock_get_all_with_template):
+        # Arrange
+        mock_get_all_with_template.return_value = [self.metadata_format]
+
+        # Act
+        result = query_cache_operations.get_metadata_format_ids([str(self.template_id)],
+                                                                [str(self.registry_id)])
+        other_registry_result = query_cache_operations.\
+            get_metadata_format_ids([str(self.template_id)], [str(ObjectId())])
+
+        # Assert
+        self.assertEquals(result, [str(self.metadata_format.id)])
+        self.assertEquals(other_registry_result, [])
+        self.assertEquals(mock_get_all_with_template.call_count, 1)
+
+    @patch.object(OaiHarvesterMetadataFormat, 'save')
+    @patch.object(OaiHarvesterMetadataFormat, 'get_all_with_template')
+    def test_metadata_format_upsert_clears_cache(self, mock_get_all_with_template, mock_save):
+        # Arrange
+        mock_get_all_with_template.return_value = []
+        query_cache_operations.get_metadata_formats_by_template()
+        mock_get_all_with_template.return_value = [self.metadata_format]
+
+        # Act
+        oai_harvester_metadata_format_api.upsert(OaiHarvesterMetadataFormat())
+        result = query_cache_operations.get_metadata_format_ids([str(self.template_id)],
+                                                                [str(self.registry_id)])
+
+        # Assert
+        self.assertEquals(result, [str(self.metadata_format.id)])
+
+    @patch.object(OaiHarvesterMetadataFormat, '_get_changed_fields')
+    @patch.object(OaiHarvesterMetadataFormat, 'save')
+    @patch.object(OaiHarvesterMetadataFormat, 'get_all_with_template')
+    def test_metadata_format_upsert_without_template_change_keeps_cache(self, mock_get_all_with_template,
+                                                                        mock_save, mock_get_changed_fields):
+        # Arrange
+        mock_get_all_with_template.return_value = []
+        mock_get_changed_fields.return_value = ['last_update']
+        query_cache_operations.get_metadata_formats_by_template()
+        metadata_format = OaiHarvesterMetadataFormat(id=ObjectId())
+        metadata_format._created = False
+
+        # Act
+        oai_harvester_metadata_format_api.upsert(metadata_format)
+        query_cache_operations.get_metadata_formats_by_template()
+
+        # Assert
+        self.assertEquals(mock_get_all_with_template.call_count, 1)
+
+
+class TestGetActivatedRegistryIdsWithoutCache(TestCase):
+    @patch.object(query_cache_operations, 'OAI_HARVESTER_QUERY_CACHE_TIMEOUT', 0)
+    @patch.object(OaiRegistry, 'get_all_by_is_activated')
+    def test_get_activated_registry_ids_queries_each_time(self, mock_get_all_by_is_activated):
+        # Arrange
+        mock_get_all_by_is_activated.return_value.scalar.return_value = []
+
+        # Act
+        query_cache_operations.get_activated_registry_ids()
+        query_cache_operations.get_activated_registry_ids()
+
+        # Assert
+        self.assertEquals(mock_get_all_by_is_activated.call_count, 2)
@@ -0,0 +1,111 @@
+"""
+    Schema cache operation test class
+"""
+from unittest import TestCase
+
+import requests
+from mock.mock import Mock, patch
+from rest_framework import status
+
+from core_oaipmh_harvester_app.utils import schema_cache_operations
+
+SCHEMA_URL = 'http://test.com/schema.xsd'
+XML_SCHEMA = '<test>Hello</test>'
+
+
+class TestGetSchema(TestCase):
+    def setUp(self):
+        schema_cache_operations.clear_schema(SCHEMA_URL)
+
+    def tearDown(self):
+        schema_cache_operations.clear_schema(SCHEMA_URL)
+
+    @patch.object(schema_cache_operations, 'get_hash')
+    @patch.object(requests.Session, 'get')
+    def test_get_schema_returns_content_and_hash(self, mock_get, mock_get_hash):
+        # Arrange
+        mock_get.return_value = _get_http_response(status.HTTP_200_OK, XML_SCHEMA)
+        mock_get_hash.return_value = 'hash'
+
+        # Act
+        result = schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Assert
+        self.assertEquals(result, (XML_SCHEMA, 'hash'))
+
+    @patch.object(schema_cache_operations, 'get_hash')
+    @patch.object(requests.Session, 'get')
+    def test_get_schema_revalidates_cached_schema(self, mock_get, mock_get_hash):
+        # Arrange
+        mock_get.return_value = _get_http_response(status.HTTP_200_OK, XML_SCHEMA,
+                                                   {'ETag': '"v1"', 'Last-Modified': 'date'})
+        mock_get_hash.return_value = 'hash'
+        schema_cache_operations.get_schema(SCHEMA_URL)
+        mock_get.return_value = _get_http_response(status.HTTP_304_NOT_MODIFIED)
+
+        # Act
+        result = schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Assert
+        self.assertEquals(result, (XML_SCHEMA, 'hash'))
+        self.assertEquals(mock_get.call_args[1]['headers'], {'If-None-Match': '"v1"',
+                                                             'If-Modified-Since': 'date'})
+        self.assertEquals(mock_get_hash.call_count, 1)
+
+    @patch.object(schema_cache_operations, 'get_hash')
+    @patch.object(requests.Session, 'get')
+    def test_get_schema_does_not_hash_unchanged_schema_again(self, mock_get, mock_get_hash):
+        # Arrange
+        mock_get.return_value = _get_http_response(status.HTTP_200_OK, XML_SCHEMA)
+        mock_get_hash.return_value = 'hash'
+        schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Act
+        result = schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Assert
+        self.assertEquals(result, (XML_SCHEMA, 'hash'))
+        self.assertEquals(mock_get.call_args[1]['headers'], {})
+        self.assertEquals(mock_get_hash.call_count, 1)
+
+    @patch.object(schema_cache_operations, 'get_hash')
+    @patch.object(requests.Session, 'get')
+    def test_get_schema_hashes_changed_schema(self, mock_get, mock_get_hash):
+        # Arrange
+        mock_get.return_value = _get_http_response(status.HTTP_200_OK, XML_SCHEMA, {'ETag': '"v1"'})
+        mock_get_hash.return_value = 'hash'
+        schema_cache_operations.get_schema(SCHEMA_URL)
+        mock_get.return_value = _get_http_response(status.HTTP_200_OK, '<test>Bye</test>',
+                                                   {'ETag': '"v2"'})
+        mock_get_hash.return_value = 'new_hash'
+
+        # Act
+        result = schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Assert
+        self.assertEquals(result, ('<test>Bye</test>', 'new_hash'))
+
+    @patch.object(requests.Session, 'get')
+    def test_get_schema_returns_none_if_not_available(self, mock_get):
+        # Arrange
+        mock_get.return_value = _get_http_response(status.HTTP_404_NOT_FOUND)
+
+        # Act
+        result = schema_cache_operations.get_schema(SCHEMA_URL)
+
+        # Assert
+        self.assertIsNone(result)
+
+
+def _get_http_response(status_code, text='', headers=None):
+    """ Get a schema response.
+
+    Args:
+        status_code:
+        text:
+        headers:
+
+    Returns:
+
+    """
+    return Mock(status_code=status_code, text=text, headers=headers or {})
@@ -0,0 +1,38 @@
+"""
+    Session operation test class
+"""
+from unittest import TestCase
+
+from core_oaipmh_harvester_app.utils import session_operations
+from tests.test_settings import SSL_CERTIFICATES_DIR
+
+
+class TestGetSession(TestCase):
+    def setUp(self):
+        session_operations.close_sessions()
+
+    def tearDown(self):
+        session_operations.close_sessions()
+
+    def test_get_session_returns_same_session_for_same_host(self):
+        # Act
+        session = session_operations.get_session("http://dummy_url.com/oai/pmh")
+
+        # Assert
+        self.assertIs(session_operations.get_session("http://dummy_url.com/other"), session)
+
+    def test_get_session_returns_new_session_for_other_host(self):
+        # Act
+        session = session_operations.get_session("http://dummy_url.com/oai/pmh")
+
+        # Assert
+        self.assertIsNot(session_operations.get_session("https://dummy_url.com/oai/pmh"), session)
+        self.assertIsNot(session_operations.get_session("http://other_url.com/oai/pmh"), session)
+
+    def test_get_session_accepts_compressed_responses(self):
+        # Act
+        session = session_operations.get_session("http://dummy_url.com/oai/pmh")
+
+        # Assert
+        self.assertEquals(session.headers['Accept-Encoding'], session_operations.ACCEPT_ENCODING)
+        self.assertEquals(session.verify, SSL_CERTIFICATES_DIR)
@@ -0,0 +1,142 @@
+"""
+    Stream operation test class
+"""
+from unittest import TestCase
+
+import os
+from mock.mock import Mock
+
+from core_oaipmh_harvester_app.utils import stream_operations
+
+DUMP_OAI_PMH_TEST_PATH = os.path.join(os.path.dirname(__file__), 'data')
+
+LIST_RECORDS_WITH_DELETED_RECORD = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <ListRecords>
+    <record>
+      <header>
+        <identifier>oai:test/id.0001</identifier>
+        <datestamp>2017-04-24T18:01:08Z</datestamp>
+        <setSpec>set_a</setSpec>
+        <setSpec>set_b</setSpec>
+      </header>
+      <metadata><test><message>Hello</message></test></metadata>
+    </record>
+    <record>
+      <header status="deleted">
+        <identifier>oai:test/id.0002</identifier>
+        <datestamp>2017-04-25T18:01:08Z</datestamp>
+      </header>
+    </record>
+  </ListRecords>
+</OAI-PMH>"""
+
+BAD_RESUMPTION_TOKEN_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <error code="badResumptionToken">The resumption token has expired.</error>
+</OAI-PMH>"""
+
+
+class TestListRecordsReader(TestCase):
+    def setUp(self):
+        with open(os.path.join(DUMP_OAI_PMH_TEST_PATH, 'response_list_records_oai_demo.xml')) as f:
+            self.data = f.read()
+
+    def test_reader_returns_records_and_resumption_token(self):
+        # Arrange
+        http_response = _create_mock_http_response(self.data, 64)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_demo")
+
+        # Act
+        result = list(reader)
+
+        # Assert
+        self.assertEquals(len(result), 1)
+        self.assertEquals(result[0]['identifier'], "oai:server-x:id/58fe3d644697f682ff5b7f24")
+        self.assertEquals(result[0]['sets'], ["demo"])
+        self.assertEquals(result[0]['metadataPrefix'], "oai_demo")
+        self.assertIsNotNone(result[0]['metadata'])
+        self.assertNotIn('raw', result[0])
+        self.assertIsNotNone(reader.resumption_token)
+
+    def test_reader_returns_deleted_records_without_metadata(self):
+        # Arrange
+        http_response = _create_mock_http_response(LIST_RECORDS_WITH_DELETED_RECORD, 16)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_test")
+
+        # Act
+        result = list(reader)
+
+        # Assert
+        self.assertEquals(len(result), 2)
+        self.assertFalse(result[0]['deleted'])
+        self.assertEquals(result[0]['sets'], ["set_a", "set_b"])
+        self.assertIn("<message>Hello</message>", result[0]['metadata'])
+        self.assertTrue(result[1]['deleted'])
+        self.assertIsNone(result[1]['metadata'])
+        self.assertIsNone(reader.resumption_token)
+
+    def test_reader_returns_resumption_token_attributes(self):
+        # Arrange
+        http_response = _create_mock_http_response(self.data, 64)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_demo")
+
+        # Act
+        list(reader)
+
+        # Assert
+        self.assertEquals(reader.resumption_token_attributes, {'expirationDate': "2002-06-01T23:20:00Z",
+                                                               'completeListSize': "6",
+                                                               'cursor': "0"})
+
+    def test_reader_returns_timings_and_bytes_read(self):
+        # Arrange
+        http_response = _create_mock_http_response(self.data, 64)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_demo")
+
+        # Act
+        list(reader)
+
+        # Assert
+        self.assertEquals(reader.bytes_read, len(self.data))
+        self.assertTrue(reader.fetch_seconds >= 0)
+        self.assertTrue(reader.parse_seconds > 0)
+
+    def test_reader_returns_error_code(self):
+        # Arrange
+        http_response = _create_mock_http_response(BAD_RESUMPTION_TOKEN_RESPONSE, 16)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_demo")
+
+        # Act
+        result = list(reader)
+
+        # Assert
+        self.assertEquals(result, [])
+        self.assertEquals(reader.error_code, "badResumptionToken")
+
+    def test_reader_raises_if_malformed_xml(self):
+        # Arrange
+        http_response = _create_mock_http_response(self.data[:-50], 64)
+        reader = stream_operations.ListRecordsReader(http_response, "oai_demo")
+
+        # Act + Assert
+        with self.assertRaises(Exception):
+            list(reader)
+
+
+def _create_mock_http_response(data, chunk_size):
+    """ Mock a streamed HTTP response.
+
+        Args:
+            data: Response body.
+            chunk_size: Size of the chunks returned by iter_content.
+
+        Returns:
+            HTTP response mock.
+
+    """
+    http_response = Mock()
+    http_response.iter_content.return_value = [data[i:i + chunk_size]
+                                               for i in range(0, len(data), chunk_size)]
+
+    return http_response
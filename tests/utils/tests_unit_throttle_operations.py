@@ -0,0 +1,71 @@
+"""
+    Throttle operation test class
+"""
+from unittest import TestCase
+
+import time
+from rest_framework import status
+from rest_framework.response import Response
+
+from core_oaipmh_harvester_app.utils import throttle_operations
+
+
+class TestRateLimiter(TestCase):
+    def test_on_error_blocks_requests(self):
+        # Arrange
+        rate_limiter = throttle_operations.RateLimiter(10)
+
+        # Act
+        rate_limiter.on_error(0.2)
+        start = time.time()
+        rate_limiter.acquire()
+
+        # Assert
+        self.assertTrue(time.time() - start >= 0.15)
+        self.assertEquals(rate_limiter.rate, 5)
+
+    def test_on_success_increases_rate_up_to_max_rate(self):
+        # Arrange
+        rate_limiter = throttle_operations.RateLimiter(10)
+        rate_limiter.rate = 1
+
+        # Act
+        for _ in range(50):
+            rate_limiter.on_success(0.1)
+
+        # Assert
+        self.assertEquals(rate_limiter.rate, 10)
+
+    def test_on_success_decreases_rate_if_slow_response(self):
+        # Arrange
+        rate_limiter = throttle_operations.RateLimiter(10)
+        rate_limiter.on_success(0.1)
+
+        # Act
+        rate_limiter.on_success(1)
+
+        # Assert
+        self.assertEquals(rate_limiter.rate, 5)
+
+
+class TestGetRetryAfter(TestCase):
+    def test_get_retry_after_returns_header_seconds(self):
+        # Arrange
+        http_response = Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        http_response['Retry-After'] = '30'
+
+        # Act
+        result = throttle_operations.get_retry_after(http_response, 0)
+
+        # Assert
+        self.assertEquals(result, 30)
+
+    def test_get_retry_after_returns_exponential_backoff_without_header(self):
+        # Arrange
+        http_response = Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        # Act
+        result = throttle_operations.get_retry_after(http_response, 3)
+
+        # Assert
+        self.assertEquals(result, 8)
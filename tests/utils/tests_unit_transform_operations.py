@@ -94,6 +94,93 @@ class TestTransformOaiRecord(TestCase):
         # Assert
         self.assertTrue(all(isinstance(item, OaiRecord) for item in result))
 
+    def test_transform_oai_record_uses_sets_by_spec(self):
+        # Arrange
+        set_spec = self.data[0]['sets'][0]
+        registry_set = OaiHarvesterSet(set_spec=set_spec)
+
+        # Act
+        result = transform_operations.transform_dict_record_to_oai_record(
+            self.data, registry_sets_by_spec=transform_operations.get_sets_by_spec([registry_set]))
+
+        # Assert
+        self.assertEquals(result[0].harvester_sets, [registry_set])
+
+    def test_transform_oai_record_keeps_header_order_of_sets(self):
+        # Arrange
+        sets = [OaiHarvesterSet(set_spec=set_spec) for set_spec in ['c', 'a', 'b']]
+        self.data[0]['sets'] = ['c', 'a', 'c', 'b', 'a']
+
+        # Act
+        result = transform_operations.transform_dict_record_to_oai_record(
+            self.data, registry_sets_by_spec=transform_operations.get_sets_by_spec(sets))
+
+        # Assert
+        self.assertEquals(result[0].harvester_sets, sets)
+
+    def test_transform_oai_record_sets_digest(self):
+        # Act
+        result = transform_operations.transform_dict_record_to_oai_record(self.data)
+
+        # Assert
+        self.assertTrue(all(item.digest is not None for item in result))
+
+    def test_record_digest_changes_with_datestamp(self):
+        # Arrange
+        digest = transform_operations.get_record_digest(self.data[0])
+        self.data[0]['datestamp'] = '2000-01-01T00:00:00Z'
+
+        # Act
+        result = transform_operations.get_record_digest(self.data[0])
+
+        # Assert
+        self.assertNotEquals(result, digest)
+
+    def test_record_digest_differs_when_set_specs_are_split_differently(self):
+        # Arrange
+        self.data[0]['sets'] = ['ab', 'c']
+        digest = transform_operations.get_record_digest(self.data[0])
+        self.data[0]['sets'] = ['a', 'bc']
+
+        # Act
+        result = transform_operations.get_record_digest(self.data[0])
+
+        # Assert
+        self.assertNotEquals(result, digest)
+
+    def test_record_digest_does_not_depend_on_set_order(self):
+        # Arrange
+        self.data[0]['sets'] = ['a', 'b']
+        digest = transform_operations.get_record_digest(self.data[0])
+        self.data[0]['sets'] = ['b', 'a']
+
+        # Act
+        result = transform_operations.get_record_digest(self.data[0])
+
+        # Assert
+        self.assertEquals(result, digest)
+
+    def test_metadata_digest_does_not_change_with_datestamp(self):
+        # Arrange
+        digest = transform_operations.get_metadata_digest(self.data[0])
+        self.data[0]['datestamp'] = '2000-01-01T00:00:00Z'
+
+        # Act
+        result = transform_operations.get_metadata_digest(self.data[0])
+
+        # Assert
+        self.assertEquals(result, digest)
+
+    def test_metadata_digest_of_deleted_record_is_none(self):
+        # Arrange
+        self.data[0]['metadata'] = None
+
+        # Act
+        result = transform_operations.get_metadata_digest(self.data[0])
+
+        # Assert
+        self.assertIsNone(result)
+
     def test_transform_oai_record_catch_key_error(self):
         # Arrange
         del self.data[0]['identifier']